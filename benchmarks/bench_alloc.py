@@ -0,0 +1,128 @@
+"""Аллокации в установившемся режиме: стадии, пресеты и цикл захват -> вывод.
+
+Стадии пишут в буферы, которые конвейер выделил в setup(), а свои
+рабочие буферы заводят в prepare() (см. effects/base.py), так что после
+первых кадров process() не должен выделять памяти под кадры. Здесь это
+проверяется tracemalloc: после прогрева считается пик памяти, выделенной
+за несколько кадров (numpy и массивы OpenCV в нём видны). Мелочь вроде
+случайных параметров кадра в счёт не идёт — порог --limit.
+
+Стадии с allocates=True (jpeg: imdecode не пишет в готовый буфер)
+выделяют кадр сами; у конвейера с ними порог — их собственный пик плюс
+--limit (столбец «кодек»), то есть остальные стадии проверяются так же.
+Без аллокаций они идут с планом approx (jpeg -> jpeg_dc, как у hard-пресетов).
+Код выхода 1 — если проверка не прошла.
+
+Запуск из корня LuminaX:
+    python3 -m benchmarks.bench_alloc
+    python3 -m benchmarks.bench_alloc --res 1080p --yuv
+"""
+
+import argparse
+import os
+import sys
+import tracemalloc
+
+from benchmarks.common import RESOLUTIONS, synthetic_frame
+from benchmarks.suite import stage_specs
+from comets.badcam.effects import Pipeline, from_bgr, get_preset, preset_names
+from comets.badcam.sinks import RawFileSink
+from comets.badcam.sources import SyntheticSource
+
+
+def traced_peak(fn, frames, warmup=3):
+    """Пик памяти (байт), выделенной за frames вызовов fn() после прогрева"""
+    for _ in range(warmup):
+        fn()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        for _ in range(frames):
+            fn()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def codec_peak(pipeline, src, frames):
+    """Пик стадий с allocates=True, каждой отдельно на её буферах в конвейере"""
+    peak = 0
+    for i, stage in enumerate(pipeline.stages):
+        if stage.allocates:
+            s = pipeline.buffers[i - 1] if i else src
+            dst = pipeline.buffers[i]
+            peak = max(peak, traced_peak(lambda: stage.process(s, dst), frames, warmup=1))
+    return peak
+
+
+def pipeline_peak(spec, frame, fmt, plan, frames):
+    pipeline = Pipeline.from_spec(spec, seed=0, plan=plan, fmt=fmt)
+    src = from_bgr(frame) if fmt == "i420" else frame
+    peak = traced_peak(lambda: pipeline.process(src), frames)
+    return peak, codec_peak(pipeline, src, frames)
+
+
+def loop_peak(spec, w, h, fmt, plan, frames):
+    """Как run_serial: генератор -> конвейер -> вывод yuv420p в /dev/null"""
+    cap = SyntheticSource("gradient", w, h)
+    cap.pix_fmt = fmt
+    pipeline = Pipeline.from_spec(spec, seed=0, plan=plan, fmt=fmt)
+    sink = RawFileSink(os.devnull, w, h, 0, pix_fmt="yuv420p")
+    raw = None
+
+    def step():
+        nonlocal raw
+        _, raw = cap.read(raw)
+        sink.write(pipeline.process(raw))
+
+    try:
+        peak = traced_peak(step, frames)
+        return peak, codec_peak(pipeline, raw, frames)
+    finally:
+        sink.close()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--res", choices=list(RESOLUTIONS), default="720p")
+    p.add_argument("--yuv", action="store_true", help="конвейер в I420 (как с --yuv)")
+    p.add_argument("--frames", type=int, default=5, help="кадров под tracemalloc")
+    p.add_argument("--limit", type=int, default=64, help="порог, КиБ")
+    args = p.parse_args(argv)
+
+    w, h = RESOLUTIONS[args.res]
+    fmt = "i420" if args.yuv else "bgr"
+    frame = synthetic_frame(w, h)
+    limit = args.limit * 1024
+    failed = []
+
+    def row(name, peak, codec):
+        ok = peak < codec + limit
+        if not ok:
+            failed.append(name)
+        codec = f"{codec / 1024:.1f}" if codec else ""
+        print(f"{name:<32}{peak / 1024:>10.1f}{codec:>10}  {'ok' if ok else 'FAIL'}")
+
+    print(f"{args.res} {fmt}: КиБ, выделенные за {args.frames} кадров после прогрева (порог {args.limit})")
+    print(f"{'':<32}{'всего':>10}{'кодек':>10}")
+    for name, params in stage_specs(w, h):
+        if name == "convert":
+            params = {"to": "bgr" if args.yuv else "i420"}
+        row(name, *pipeline_peak([(name, params)], frame, fmt, None, args.frames))
+    for name in preset_names():
+        preset = get_preset(name, width=w, height=h)
+        plans = ["none"] + ([preset["plan"]] if preset.get("plan", "none") != "none" else [])
+        for plan in plans:
+            row(f"{name} [{plan}]", *pipeline_peak(preset["stages"], frame, fmt, plan, args.frames))
+    for name in ("b", "hard-horrible"):
+        preset = get_preset(name, width=w, height=h)
+        row(f"цикл {name}", *loop_peak(preset["stages"], w, h, fmt, preset.get("plan"), args.frames))
+
+    if failed:
+        print("Выделяют память под кадры:", ", ".join(failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
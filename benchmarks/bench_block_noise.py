@@ -0,0 +1,70 @@
+"""Битые пиксели и блоковый шум: циклы из b.py/main.py против стадий.
+
+Для блоков дополнительно меряется вариант с одной индексной записью
+(все прямоугольники развёрнуты в плоские индексы), чтобы было видно,
+почему стадия заливает блоки срезами.
+
+Запуск из корня LuminaX:
+    python3 -m benchmarks.bench_block_noise
+"""
+
+import argparse
+import statistics
+
+import numpy as np
+
+from benchmarks import reference
+from benchmarks.common import RESOLUTIONS, synthetic_frame, timeit
+from comets.badcam.effects import create_stage
+
+BLOCKS = 28   # пресет nightmare
+
+
+def block_fancy(stage, frame):
+    """Все блоки кадра одной индексной записью"""
+    h, w = frame.shape[:2]
+    rects = list(stage.blocks(w, h))
+    x0, y0, x1, y1 = (np.array(v) for v in list(zip(*rects))[:4])
+    colors = np.array([r[4] for r in rects])
+    bw, bh = x1 - x0, y1 - y0
+    block = np.repeat(np.arange(len(rects)), bh)
+    row = np.arange(len(block)) - np.repeat(np.cumsum(bh) - bh, bh)
+    starts = (y0[block] + row) * w + x0[block]
+    lens = bw[block]
+    idx = np.repeat(starts - (np.cumsum(lens) - lens), lens) + np.arange(lens.sum())
+    frame.reshape(h * w, -1)[idx] = np.repeat(colors, bw * bh, axis=0)
+
+
+def ms(fn, repeat):
+    return statistics.median(timeit(fn, repeat)) * 1e3
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--repeat", type=int, default=30)
+    args = p.parse_args(argv)
+
+    print(f"{'res':>6} {'dead loop':>10} {'dead idx':>10} {'blk loop':>10} {'blk fancy':>10} {'blk stage':>10}  (ms)")
+    for name, (w, h) in RESOLUTIONS.items():
+        frame = synthetic_frame(w, h)
+        work = frame.copy()
+        max_size = max(16, w // 8)
+
+        dead_map = reference.make_dead_pixel_map(w, h)
+        dead = create_stage("dead_pixels")
+        dead.setup(frame.shape)
+        blocks = create_stage("block_noise", blocks=BLOCKS, max_size=max_size)
+        blocks.setup(frame.shape)
+
+        row = [
+            ms(lambda: reference.simulate_dead_pixels(frame, dead_map), args.repeat),
+            ms(lambda: dead.process(work, work), args.repeat),
+            ms(lambda: reference.add_block_noise(frame, BLOCKS, max_size), args.repeat),
+            ms(lambda: block_fancy(blocks, work), args.repeat),
+            ms(lambda: blocks.process(work, work), args.repeat),
+        ]
+        print(f"{name:>6} " + " ".join(f"{v:10.3f}" for v in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Захват: полный декод MJPEG + resize против уменьшенного декода.
+
+Камеры по умолчанию отдают большой MJPEG, а первая стадия пресета
+сразу уменьшает кадр (a/b — до 320x240, hard-* — до down_res, вплоть до
+40x30). Здесь кадр камеры имитируется JPEG-ом синтетического кадра и
+для каждого пресета сравниваются:
+  full    — cv2.imdecode целиком и первая стадия (как было);
+  reduced — режим и коэффициент из cammodes.choose_mode для типичной
+            MJPEG-камеры, cv2.imdecode(IMREAD_REDUCED_COLOR_N) и та же
+            первая стадия.
+Камера не нужна.
+
+Запуск из корня LuminaX:
+    python3 -m benchmarks.bench_capture
+    python3 -m benchmarks.bench_capture --camera 1920x1080 --quality 90
+"""
+
+import argparse
+import statistics
+
+import cv2
+
+from benchmarks.common import synthetic_frame, timeit
+from comets.badcam import cammodes
+from comets.badcam.effects import Pipeline, get_preset
+from comets.badcam.sources import REDUCED_DECODE
+
+PRESETS = ["a", "b", "hard-bad", "hard-horrible", "hard-nightmare"]
+# только большие MJPEG-режимы — худший для захвата случай
+MJPEG_ONLY = [{"fourcc": "MJPG", "size": s} for s in [(1920, 1080), (1280, 720)]]
+
+
+def parse_size(text):
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+def first_stage(name):
+    stages = get_preset(name)["stages"][:1]
+    return Pipeline.from_spec(stages)
+
+
+def ms(fn, repeat):
+    return statistics.median(timeit(fn, repeat)) * 1e3
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--camera", type=parse_size, default=(1920, 1080), help="режим камеры по умолчанию, WxH")
+    p.add_argument("--quality", type=int, default=85, help="качество JPEG кадра камеры")
+    p.add_argument("--repeat", type=int, default=30)
+    args = p.parse_args(argv)
+
+    def jpeg(size):
+        ok, data = cv2.imencode(".jpg", synthetic_frame(*size), [cv2.IMWRITE_JPEG_QUALITY, args.quality])
+        return data
+
+    default = jpeg(args.camera)
+    print(f"камера по умолчанию: MJPG {args.camera[0]}x{args.camera[1]}, JPEG {default.size // 1024} КБ")
+    print(f"{'пресет':<16}{'нужно':>10}{'full, мс':>10}  {'режим':<34}{'reduced, мс':>12}{'выигрыш':>9}")
+    for name in PRESETS:
+        pipeline = first_stage(name)
+        need = pipeline.input_size() or get_preset(name).get("capture_size")
+        full = ms(lambda: pipeline.process(cv2.imdecode(default, cv2.IMREAD_COLOR)), args.repeat)
+
+        mode = cammodes.choose_mode(MJPEG_ONLY, need)
+        data = jpeg(mode["size"])
+        flag = REDUCED_DECODE.get(mode["reduce"], cv2.IMREAD_COLOR)
+        reduced = ms(lambda: pipeline.process(cv2.imdecode(data, flag)), args.repeat)
+        print(f"{name:<16}{need[0]:>5}x{need[1]:<4}{full:>10.2f}  {cammodes.describe(mode)[:34]:<34}"
+              f"{reduced:>12.2f}{full / reduced:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""План конвейера: исходная цепочка против exact и approx (planner.py).
+
+Для каждого hard-пресета печатает план, время кадра без плана и по
+планам и разницу с исходной цепочкой (verify): MAE, max, PSNR и MAE
+по блокам — без шума, «шум» — отношение энергии шума плана к исходной.
+approx проверяется по planner.APPROX_TOLERANCE; код выхода 1 — если
+какой-то пресет в допуск не уложился.
+
+Запуск из корня LuminaX:
+    python3 -m benchmarks.bench_planner
+    python3 -m benchmarks.bench_planner --width 1280 --height 720
+    python3 -m benchmarks.bench_planner --preset hard-nightmare --plan
+"""
+
+import argparse
+import statistics
+import sys
+
+from benchmarks.common import synthetic_frame, timeit
+from comets.badcam.effects import Pipeline, get_preset
+from comets.badcam.effects import planner
+
+PRESETS = ["hard-bad", "hard-awful", "hard-horrible", "hard-nightmare"]
+MODES = ["none", "exact", "approx"]
+
+
+def frames(w, h, count):
+    return [synthetic_frame(w, h, seed=i) for i in range(count)]
+
+
+def frame_ms(spec, mode, frame, repeat):
+    pipeline = Pipeline.from_spec(spec, seed=0, plan=mode)
+    return statistics.median(timeit(lambda: pipeline.process(frame), repeat)) * 1e3
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--preset", action="append", default=None, help="пресет (можно несколько)")
+    p.add_argument("--width", type=int, default=640)
+    p.add_argument("--height", type=int, default=480)
+    p.add_argument("--repeat", type=int, default=30)
+    p.add_argument("--frames", type=int, default=10, help="кадров для сравнения с исходной цепочкой")
+    p.add_argument("--plan", action="store_true", help="вывести планы стадий")
+    args = p.parse_args(argv)
+
+    test = frames(args.width, args.height, args.frames)
+    t = planner.APPROX_TOLERANCE
+    print(f"{args.width}x{args.height}, мс на кадр (медиана из {args.repeat}), разница — на {args.frames} кадрах")
+    print(f"допуск approx: PSNR >= {t['psnr']}, MAE блоков <= {t['block_mae']}, шум {t['noise'][0]}..{t['noise'][1]}")
+    print(f"{'пресет':<16}{'план':<8}{'мс':>8}{'ускор.':>8}{'MAE':>8}{'max':>6}{'PSNR':>8}{'MAE блоков':>12}"
+          f"{'шум':>7}")
+    failed = []
+    for name in args.preset or PRESETS:
+        spec = get_preset(name, width=args.width, height=args.height)["stages"]
+        base = None
+        for mode in MODES:
+            ms = frame_ms(spec, mode, test[0], args.repeat)
+            base = base or ms
+            diff = planner.verify(spec, mode, test)
+            block = "—" if diff["block_mae"] is None else f"{diff['block_mae']:.2f}"
+            noise = "—" if diff["noise"] is None else f"{diff['noise']:.2f}"
+            mark = ""
+            if mode == "approx" and not planner.within_tolerance(diff):
+                failed.append(name)
+                mark = "  вне допуска"
+            print(f"{name:<16}{mode:<8}{ms:>8.2f}{base / ms:>7.1f}x{diff['mae']:>8.2f}{diff['max']:>6}"
+                  f"{diff['psnr']:>8.1f}{block:>12}{noise:>7}{mark}")
+            if args.plan and mode != "none":
+                planned, origins = planner.plan(spec, mode)
+                for row in planner.describe(planned, origins, spec):
+                    print("    " + row)
+
+    if failed:
+        print("approx вне допуска:", ", ".join(failed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
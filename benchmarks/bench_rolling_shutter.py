@@ -0,0 +1,63 @@
+"""Rolling shutter: построчный цикл из b.py против стадии с копированием полосами.
+
+Запуск из корня LuminaX:
+    python3 -m benchmarks.bench_rolling_shutter
+"""
+
+import argparse
+import statistics
+
+import numpy as np
+
+from benchmarks import reference
+from benchmarks.common import RESOLUTIONS, synthetic_frame, timeit
+from comets.badcam.effects import create_stage
+
+MOTION = 1.5
+PHASE_STEP = 0.03
+
+
+def check_identical(frame, frames=200):
+    """Стадия должна давать побитово тот же кадр, что и исходный цикл"""
+    stage = create_stage("rolling_shutter", motion_amount=MOTION, phase_step=PHASE_STEP)
+    stage.setup(frame.shape)
+    dst = np.empty_like(frame)
+    for i in range(frames):
+        stage.step()
+        stage.process(frame, dst)
+        ref = reference.rolling_shutter(frame, i * PHASE_STEP, motion_amount=MOTION)
+        if not np.array_equal(dst, ref):
+            return False
+    return True
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--repeat", type=int, default=30)
+    args = p.parse_args(argv)
+
+    print(f"{'res':>6} {'loop, ms':>10} {'bands, ms':>10} {'x':>6}  identical")
+    for name, (w, h) in RESOLUTIONS.items():
+        frame = synthetic_frame(w, h)
+        stage = create_stage("rolling_shutter", motion_amount=MOTION, phase_step=PHASE_STEP)
+        stage.setup(frame.shape)
+        dst = np.empty_like(frame)
+
+        phase = [0.0]
+
+        def run_loop():
+            phase[0] += PHASE_STEP
+            reference.rolling_shutter(frame, phase[0], motion_amount=MOTION)
+
+        def run_stage():
+            stage.step()
+            stage.process(frame, dst)
+
+        loop = statistics.median(timeit(run_loop, args.repeat)) * 1e3
+        bands = statistics.median(timeit(run_stage, args.repeat)) * 1e3
+        same = check_identical(frame)
+        print(f"{name:>6} {loop:10.3f} {bands:10.3f} {loop / bands:6.1f}  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Вывод кадров: tobytes() в трубу против V4L2Sink в FIFO.
+
+Вместо /dev/videoN используется FIFO, из которого читает поток-сливщик,
+так что v4l2loopback не нужен. Столбец pipe — то, что делал FFmpegSink
+на стороне BadCam (копия tobytes() и запись в трубу; конвертацию в
+yuv420p ffmpeg делал ещё отдельно), v4l2 — cvtColor в готовый буфер и
+один write(). pipe+cvt добавляет к pipe конвертацию, которую ffmpeg
+делал в своём процессе, — это полная цена кадра на машину.
+
+Перед замером каждый формат вывода проверяется на кадрах BGR и I420:
+V4L2Sink пишет в обычный файл и в FIFO (ioctl там падает с ENOTTY, и
+_negotiate должен оставить запрошенный формат), RawFileSink — в файл;
+байты сверяются с переводом cv2.cvtColor (столбец ok). Поток-читатель
+FIFO на замере тоже сверяет каждый пришедший кадр. Код выхода 1 —
+если хоть одна сверка не прошла.
+
+Запуск из корня LuminaX:
+    python3 -m benchmarks.bench_sinks
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+
+from benchmarks.common import RESOLUTIONS, synthetic_frame, timeit
+from comets.badcam.effects.yuv import from_bgr, planes
+from comets.badcam.sinks import PIX_FORMATS, RawFileSink, V4L2Sink
+
+
+def drain(path):
+    """Читать FIFO, пока пишущая сторона не закроется"""
+    with open(path, "rb", buffering=0) as f:
+        while f.read(1 << 20):
+            pass
+
+
+class Reader(threading.Thread):
+    """Читает FIFO покадрово и сверяет каждый кадр с ожидаемыми байтами"""
+
+    def __init__(self, path, expect):
+        super().__init__(daemon=True)
+        self.path = path
+        self.expect = expect
+        self.frames = 0
+        self.bad = 0
+        self.tail = 0   # байты недописанного кадра в конце
+
+    def run(self):
+        buf = bytearray(len(self.expect))
+        view = memoryview(buf)
+        filled = 0
+        with open(self.path, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(view[filled:])
+                if not n:
+                    break
+                filled += n
+                if filled == len(buf):
+                    self.frames += 1
+                    self.bad += buf != self.expect
+                    filled = 0
+        self.tail = filled
+
+    def ok(self, frames):
+        return self.frames == frames and not self.bad and not self.tail
+
+
+def reference(frame, pix_fmt):
+    """Байты кадра в pix_fmt, посчитанные мимо V4L2Sink"""
+    if frame.ndim == 3:
+        code = PIX_FORMATS[pix_fmt][1]
+        return (frame if code is None else cv2.cvtColor(frame, code)).tobytes()
+    if pix_fmt == "yuv420p":
+        return frame.tobytes()
+    if pix_fmt == "yuyv":
+        y, u, v = planes(frame)
+        uv = np.stack([u, v], axis=-1).reshape(u.shape[0], -1)
+        return np.stack([y, np.repeat(uv, 2, axis=0)], axis=-1).tobytes()
+    code = {"bgr24": cv2.COLOR_YUV2BGR_I420, "rgb24": cv2.COLOR_YUV2RGB_I420}[pix_fmt]
+    return cv2.cvtColor(frame, code).tobytes()
+
+
+def check(frame, tmp):
+    """Сверить вывод всех форматов для кадра; вернуть список несовпадений"""
+    w, h = frame.shape[1], frame.shape[0]
+    failed = []
+    for kind, src in (("BGR", frame), ("I420", from_bgr(frame))):
+        for pix_fmt in PIX_FORMATS:
+            expect = reference(src, pix_fmt)
+            name = f"{kind}->{pix_fmt}"
+            for cls in (V4L2Sink, RawFileSink):
+                path = os.path.join(tmp, "frame.raw")
+                open(path, "wb").close()
+                sink = cls(path, w, h, 30, pix_fmt=pix_fmt)
+                sink.write(src)
+                sink.write(src)
+                sink.close()
+                if sink.pix_fmt != pix_fmt:
+                    failed.append(f"{name} {cls.__name__}: формат {sink.pix_fmt}")
+                elif open(path, "rb").read() != expect * 2:
+                    failed.append(f"{name} {cls.__name__}: файл")
+
+            fifo = os.path.join(tmp, "check.fifo")
+            os.mkfifo(fifo)
+            reader = Reader(fifo, expect)
+            reader.start()
+            sink = V4L2Sink(fifo, w, h, 30, pix_fmt=pix_fmt)
+            sink.write(src)
+            sink.write(src)
+            sink.close()
+            reader.join()
+            os.unlink(fifo)
+            if sink.pix_fmt != pix_fmt:
+                failed.append(f"{name} FIFO: формат {sink.pix_fmt}")
+            elif not reader.ok(2):
+                failed.append(f"{name} FIFO")
+    return failed
+
+
+def ms(fn, repeat):
+    return statistics.median(timeit(fn, repeat)) * 1e3
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--repeat", type=int, default=50)
+    args = p.parse_args(argv)
+
+    failed = []
+    print(f"{'res':>6} {'pipe':>8} {'pipe+cvt':>9} {'v4l2':>8} {'ok':>4}  (ms/кадр)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (w, h) in RESOLUTIONS.items():
+            frame = synthetic_frame(w, h)
+            errors = [f"{name} {e}" for e in check(frame, tmp)]
+
+            fifo = os.path.join(tmp, f"{name}.fifo")
+            os.mkfifo(fifo)
+            reader = threading.Thread(target=drain, args=(fifo,), daemon=True)
+            reader.start()
+            fd = os.open(fifo, os.O_WRONLY)
+            pipe = ms(lambda: os.write(fd, frame.tobytes()), args.repeat)
+            os.close(fd)
+            reader.join()
+
+            yuv = np.empty((h * 3 // 2, w), np.uint8)
+            convert = ms(lambda: cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420, dst=yuv), args.repeat)
+
+            fifo = os.path.join(tmp, f"{name}.v4l2.fifo")
+            os.mkfifo(fifo)
+            reader = Reader(fifo, reference(frame, "yuv420p"))
+            reader.start()
+            sink = V4L2Sink(fifo, w, h, 30, pix_fmt="yuv420p")
+            v4l2 = ms(lambda: sink.write(frame), args.repeat)
+            sink.close()
+            reader.join()
+            if not reader.ok(sink.frames):
+                errors.append(f"{name} замер FIFO: {reader.bad} из {reader.frames} кадров не совпали")
+
+            failed += errors
+            print(f"{name:>6} {pipe:8.3f} {pipe + convert:9.3f} {v4l2:8.3f} {'НЕТ' if errors else 'да':>4}")
+
+    if failed:
+        print("Вывод не совпал с cv2.cvtColor:")
+        for e in failed:
+            print("  " + e)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
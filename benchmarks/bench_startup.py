@@ -0,0 +1,93 @@
+"""Холодный старт LuminaX: от запуска интерпретатора до первой отрисовки окна.
+
+Каждый прогон — новый процесс `python -X importtime` с тем же GUI, что
+и main.py (startup_child.py). Ребёнок отмечает первую отрисовку окна
+(событие Paint) и пишет в stderr метку: строки
+importtime до неё — импорты, за которые платит старт, после — фоновая
+загрузка комет. Потом он ждёт конца фоновой загрузки и выходит.
+
+Печатается медиана времени до первой отрисовки, есть ли numpy/cv2 к
+этому моменту, самые дорогие импорты до отрисовки и время фоновой
+загрузки каждой кометы. --json сохраняет всё для сравнения между
+версиями.
+
+Запуск из корня LuminaX (без дисплея — QT_QPA_PLATFORM=offscreen):
+    python3 -m benchmarks.bench_startup --repeat 5
+    python3 -m benchmarks.bench_startup --root /tmp/luminax-old   # другая версия дерева
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.startup_child import PAINT_MARK
+
+CHILD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_child.py")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+# ------------------ Разбор и сводка ------------------
+def parse_importtime(stderr):
+    """Импорты до метки первой отрисовки: [(имя, своё мкс, всего мкс, глубина)]"""
+    imports = []
+    for line in stderr.splitlines():
+        if line.startswith(PAINT_MARK):
+            break
+        m = _IMPORT_LINE.match(line)
+        if m:
+            imports.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return imports
+
+
+def run_once(platform, root):
+    env = dict(os.environ, BENCH_STARTUP_T0=repr(time.time()), PYTHONPATH=root)
+    if platform:
+        env["QT_QPA_PLATFORM"] = platform
+    proc = subprocess.run([sys.executable, "-X", "importtime", CHILD],
+                          cwd=root, env=env, capture_output=True, text=True, timeout=120)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(proc.stderr)
+    result["imports_before_paint"] = len(imports)
+    result["import_ms_before_paint"] = sum(i[1] for i in imports) / 1e3
+    result["top_imports"] = sorted(((name, total / 1e3) for name, _, total, depth in imports if depth <= 1),
+                                   key=lambda x: -x[1])[:8]
+    return result
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--platform", default=os.environ.get("QT_QPA_PLATFORM", "offscreen"),
+                   help="QT_QPA_PLATFORM ребёнка (по умолчанию offscreen)")
+    p.add_argument("--root", default=ROOT, help="корень LuminaX (например, рабочее дерево старой версии)")
+    p.add_argument("--json", default=None, metavar="PATH", help="сохранить результаты прогонов")
+    args = p.parse_args(argv)
+
+    runs = [run_once(args.platform, args.root) for _ in range(args.repeat)]
+    paint = statistics.median(r["first_paint_ms"] for r in runs)
+    loaded = statistics.median(r["loaded_ms"] for r in runs)
+    imports = statistics.median(r["import_ms_before_paint"] for r in runs)
+    print(f"первая отрисовка: {paint:.0f} мс (медиана {len(runs)} прогонов), "
+          f"импорты до неё: {imports:.0f} мс, {runs[0]['imports_before_paint']} модулей")
+    print(f"тяжёлые модули к отрисовке: {', '.join(runs[0]['heavy_at_paint']) or 'нет'}")
+    print(f"кометы загружены в фоне: {loaded:.0f} мс от старта")
+    for cid, t in runs[0].get("comets", {}).items():
+        print(f"  {cid}: " + ", ".join(f"{k} {v} мс" for k, v in t.items()))
+    print("дорогие импорты до отрисовки (первый прогон, всего мс):")
+    for name, ms in runs[0]["top_imports"]:
+        print(f"  {name:<40} {ms:8.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"first_paint_ms": paint, "loaded_ms": loaded, "runs": runs}, f, indent=1, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
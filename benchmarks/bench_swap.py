@@ -0,0 +1,140 @@
+"""Смена конфига: перезапуск процесса против подмены пресета в движке.
+
+respawn — как раньше делал GUI: старый процесс конфига завершается,
+новый стартует (интерпретатор, импорт cv2/numpy, открытие источника и
+вывода). hot — один comets.badcam.engine, конфиг меняется командой load
+через канал управления. Вывод в обоих случаях — кольцо общей памяти
+(--sink shm), его читает этот процесс и меряет паузу в потоке кадров:
+от последнего кадра до смены до первого кадра после неё. Для hot рядом
+печатается switch_ms из ответа движка (от запроса до первого кадра
+нового конвейера).
+
+Запуск из корня LuminaX:
+    python3 -m benchmarks.bench_swap
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from comets.badcam import control
+from comets.badcam.shmring import ShmRingReader
+
+CONFIGS = ["a", "b", "bad", "main"]
+SOURCE = ["--source", "synthetic", "--sink", "shm"]
+
+
+def attach(name, timeout=20.0):
+    """Подключиться к кольцу, когда процесс его создаст и положит первый кадр"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader = ShmRingReader(name)
+        except (FileNotFoundError, ValueError):
+            time.sleep(0.002)
+            continue
+        while int(reader.seq[0]) == 0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return reader
+    raise TimeoutError(f"нет кадров в кольце {name}")
+
+
+def arrivals(reader, until):
+    """Времена появления новых кадров в кольце, пока until(times) ложно (опрос раз в 1 мс)"""
+    times = []
+    seq = int(reader.seq[0])
+    while not until(times):
+        n = int(reader.seq[0])
+        if n != seq:
+            seq = n
+            times.append(time.perf_counter())
+        time.sleep(0.001)
+    return times
+
+
+def for_seconds(sec):
+    deadline = time.perf_counter() + sec
+    return lambda times: time.perf_counter() > deadline
+
+
+def next_frame(reader, timeout=5.0):
+    """Время появления следующего кадра"""
+    deadline = time.perf_counter() + timeout
+    times = arrivals(reader, lambda times: bool(times) or time.perf_counter() > deadline)
+    if not times:
+        raise TimeoutError("кадры перестали приходить")
+    return times[0]
+
+
+def spawn(cmd):
+    return subprocess.Popen([sys.executable, "-m"] + cmd, stdout=subprocess.DEVNULL)
+
+
+def bench_respawn(ring):
+    gaps = []
+    proc = spawn([f"comets.badcam.configs.{CONFIGS[0]}"] + SOURCE + ["--out", ring])
+    reader = attach(ring)
+    for config in CONFIGS[1:]:
+        before = arrivals(reader, for_seconds(0.5))
+        reader.close()
+        proc.terminate()
+        proc.wait()
+        proc = spawn([f"comets.badcam.configs.{config}"] + SOURCE + ["--out", ring])
+        reader = attach(ring)
+        gaps.append((config, (time.perf_counter() - before[-1]) * 1e3, None))
+    reader.close()
+    proc.terminate()
+    proc.wait()
+    return gaps
+
+
+def bench_hot(ring, sock):
+    gaps = []
+    proc = spawn(["comets.badcam.engine", "--config", CONFIGS[0], "--control", sock] + SOURCE + ["--out", ring])
+    reader = attach(ring)
+    try:
+        for config in CONFIGS[1:] + CONFIGS[:1]:
+            before = arrivals(reader, for_seconds(0.5))
+            reply = {}
+            t = threading.Thread(target=lambda: reply.update(control.request("load", path=sock, config=config)))
+            t.start()
+            during = arrivals(reader, lambda times: not t.is_alive())
+            t.join()
+            # кадр нового конвейера мог ещё не дойти до кольца (вывод в другом потоке)
+            times = before[-1:] + during + [next_frame(reader)]
+            gap = max(b - a for a, b in zip(times, times[1:])) * 1e3
+            gaps.append((config, gap, reply.get("switch_ms")))
+    finally:
+        reader.close()
+        proc.terminate()
+        proc.wait()
+    return gaps
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--rounds", type=int, default=1, help="повторов всего цикла смен")
+    args = p.parse_args(argv)
+
+    ring = f"bench-swap-{os.getpid()}"
+    sock = os.path.join(tempfile.gettempdir(), f"bench-swap-{os.getpid()}.sock")
+    rows = {"respawn": [], "hot": []}
+    for _ in range(args.rounds):
+        rows["respawn"] += bench_respawn(ring)
+        rows["hot"] += bench_hot(ring, sock)
+
+    print(f"{'режим':>8} {'конфиг':>7} {'пауза, мс':>10} {'switch_ms':>10}")
+    for mode, gaps in rows.items():
+        for config, gap, switch in gaps:
+            print(f"{mode:>8} {config:>7} {gap:10.1f} {switch if switch is not None else '—':>10}")
+    for mode, gaps in rows.items():
+        print(f"{mode}: медиана паузы {statistics.median(g for _, g, _ in gaps):.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Счёт стадий полосами: кадров в секунду от числа потоков и разрешения.
+
+Для каждого разрешения пресет собирается без полос и с полосами в 1, 2,
+4, ... потоках (до числа ядер). Перед замером проверяется, что кадр с
+полосами совпадает с кадром без полос при одном seed и одних покадровых
+параметрах (столбец diff — число несовпавших байт, должно быть 0).
+
+Запуск из корня LuminaX:
+    python3 -m benchmarks.bench_tiles --preset hard-nightmare
+"""
+
+import argparse
+import os
+import statistics
+
+import cv2
+import numpy as np
+
+from benchmarks.common import RESOLUTIONS, synthetic_frame, timeit
+from comets.badcam.effects import build_pipeline, get_preset, preset_names
+
+
+def thread_counts(limit):
+    counts = [1]
+    while counts[-1] * 2 <= limit:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != limit:
+        counts.append(limit)
+    return counts
+
+
+def mismatch(preset, frame, tiles):
+    """Сколько байт кадра с полосами отличается от кадра целиком"""
+    whole = build_pipeline(preset, seed=1)
+    tiled = build_pipeline(preset, seed=1, tiles=tiles)
+    whole.setup(frame.shape)
+    tiled.setup(frame.shape)
+    # параметры кадра берём у одного конвейера: mains_flicker зависит от часов
+    whole.step()
+    tiled.load_states(whole.frame_states())
+    a = whole.process(frame, step=False)
+    b = tiled.process(frame, step=False)
+    tiled.close()
+    return int(np.count_nonzero(a != b))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--preset", choices=preset_names(), default="hard-horrible")
+    p.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="максимум потоков")
+    p.add_argument("--repeat", type=int, default=20)
+    args = p.parse_args(argv)
+
+    # внутренние потоки OpenCV мешают честно мерить масштабирование полос
+    cv2.setNumThreads(1)
+    counts = thread_counts(max(1, args.threads))
+    print(f"preset={args.preset} cores={os.cpu_count()}")
+    print(f"{'res':>6} {'whole':>8} " + " ".join(f"{f't={n}':>8}" for n in counts) + f" {'diff':>6}  (fps)")
+    for name, (w, h) in RESOLUTIONS.items():
+        preset = get_preset(args.preset, width=w, height=h)
+        frame = synthetic_frame(w, h)
+
+        row = []
+        for tiles in [0] + counts:
+            pipeline = build_pipeline(preset, seed=1, tiles=tiles)
+            row.append(1.0 / statistics.median(timeit(lambda: pipeline.process(frame), args.repeat)))
+            pipeline.close()
+        diff = mismatch(preset, frame, counts[-1])
+        print(f"{name:>6} " + " ".join(f"{v:8.1f}" for v in row) + f" {diff:6d}")
+
+
+if __name__ == "__main__":
+    main()
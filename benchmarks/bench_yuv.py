@@ -0,0 +1,62 @@
+"""Конвейер в BGR против конвейера в I420 (effects/yuv.py, --yuv).
+
+Полная цена кадра от захвата до вывода yuv420p: bgr — конвейер в BGR и
+перевод в I420 в выводе (как V4L2Sink по умолчанию), i420 — перевод в
+I420 при захвате, конвейер по плоскостям и вывод как есть. Столбец
+convert — сколько переводов формата конвейер вставил сам перед
+стадиями, которые I420 не умеют.
+
+Запуск из корня LuminaX:
+    python3 -m benchmarks.bench_yuv
+    python3 -m benchmarks.bench_yuv --res 720p --preset b
+"""
+
+import argparse
+import statistics
+
+from benchmarks.common import RESOLUTIONS, synthetic_frame, timeit
+from comets.badcam.effects import Pipeline, from_bgr, get_preset
+
+PRESETS = ["a", "b", "bad", "hard-bad", "hard-horrible", "hard-nightmare"]
+
+
+def frame_cost(spec, fmt, plan, frame):
+    """Функция одного кадра: захват (перевод) + конвейер + перевод для вывода"""
+    pipeline = Pipeline.from_spec(spec, seed=0, plan=plan, fmt=fmt)
+    out = None
+
+    def run():
+        nonlocal out
+        src = from_bgr(frame) if fmt == "i420" else frame
+        res = pipeline.process(src)
+        if res.ndim == 3:
+            out = from_bgr(res, out)
+
+    return run, sum(s.name == "convert" for s in pipeline.stages)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--res", choices=list(RESOLUTIONS), default="480p")
+    p.add_argument("--preset", action="append", default=None, help="пресет (можно несколько)")
+    p.add_argument("--repeat", type=int, default=30)
+    args = p.parse_args(argv)
+
+    w, h = RESOLUTIONS[args.res]
+    frame = synthetic_frame(w, h)
+    print(f"{args.res}, мс на кадр до yuv420p (медиана из {args.repeat})")
+    print(f"{'пресет':<16}{'план':<8}{'bgr':>8}{'i420':>8}{'ускор.':>8}{'convert':>9}")
+    for name in args.preset or PRESETS:
+        preset = get_preset(name, width=w, height=h)
+        spec = preset["stages"]
+        plan = preset.get("plan") or "none"
+        times = {}
+        for fmt in ("bgr", "i420"):
+            run, converts = frame_cost(spec, fmt, plan, frame)
+            times[fmt] = statistics.median(timeit(run, args.repeat)) * 1e3
+        print(f"{name:<16}{plan:<8}{times['bgr']:>8.2f}{times['i420']:>8.2f}"
+              f"{times['bgr'] / times['i420']:>7.2f}x{converts:>9}")
+
+
+if __name__ == "__main__":
+    main()
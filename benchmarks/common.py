@@ -0,0 +1,32 @@
+import time
+
+import numpy as np
+
+# разрешения для прогонов: имя -> (w, h)
+RESOLUTIONS = {
+    "240p": (320, 240),
+    "480p": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+}
+
+
+def synthetic_frame(w, h, seed=0):
+    """Детерминированный тестовый кадр: градиент + шум"""
+    rng = np.random.default_rng(seed)
+    xx, yy = np.meshgrid(np.linspace(0, 255, w), np.linspace(0, 255, h))
+    base = np.stack([xx, yy, (xx + yy) / 2], axis=-1)
+    frame = base + rng.normal(0, 20, base.shape)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def timeit(fn, repeat=30, warmup=3):
+    """Время вызовов fn() в секундах (список замеров)"""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
@@ -0,0 +1,61 @@
+"""Исходные реализации эффектов из старых configs/*.py.
+
+Нужны бенчмаркам как эталон: для сравнения скорости и проверки, что
+стадии движка дают тот же результат.
+"""
+
+import math
+import random
+
+import numpy as np
+
+
+def rolling_shutter(frame, phase, motion_amount=2.0):
+    h,w = frame.shape[:2]
+    out = np.zeros_like(frame)
+    for y in range(h):
+        shift = int(((y/h)-0.5)*motion_amount + math.sin(phase + y*0.1)*(motion_amount*0.2))
+        if shift > 0:
+            out[y,shift:] = frame[y,:-shift]
+            out[y,:shift] = frame[y,0:1]
+        elif shift < 0:
+            s = -shift
+            out[y,:-s] = frame[y,s:]
+            out[y,-s:] = frame[y,-1:]
+        else:
+            out[y] = frame[y]
+    return out
+
+
+def make_dead_pixel_map(w, h, density=0.0008):
+    mask = np.zeros((h, w), dtype=bool)
+    count = max(1, int(w * h * density))
+    for _ in range(count):
+        x = random.randint(0, w-1)
+        y = random.randint(0, h-1)
+        mask[y, x] = True
+    return mask
+
+
+def simulate_dead_pixels(frame, dead_map):
+    out = frame.copy()
+    coords = np.argwhere(dead_map)
+    if len(coords) == 0:
+        return out
+    colors = np.random.randint(0, 256, (len(coords),3), dtype=np.uint8)
+    for (y,x), color in zip(coords, colors):
+        out[y,x] = color
+    return out
+
+
+def add_block_noise(frame, blocks=20, max_size=80):
+    out = frame.copy()
+    h,w = out.shape[:2]
+    for _ in range(blocks):
+        bw = random.randint(8, max_size)
+        bh = random.randint(8, max_size)
+        x = random.randint(0, max(0, w-bw))
+        y = random.randint(0, max(0, h-bh))
+        color = np.random.randint(0,256, (3,), dtype=np.uint8)
+        out[y:y+bh, x:x+bw] = color
+    return out
@@ -0,0 +1,57 @@
+"""Процесс-ребёнок bench_startup: GUI LuminaX до первой отрисовки и фоновой загрузки комет.
+
+Импортирует только то, что нужно для замера, чтобы не засорять
+importtime; запускается скриптом (python -X importtime startup_child.py),
+корень LuminaX — в PYTHONPATH.
+"""
+
+import os
+import sys
+import time
+
+PAINT_MARK = "bench_startup: first paint"
+HEAVY = ("numpy", "cv2")
+
+
+def main():
+    t0 = float(os.environ["BENCH_STARTUP_T0"])
+    from PyQt6.QtCore import QEvent, QObject, QTimer
+    from modules.gui_main import LuminaXGUI
+
+    result = {}
+    gui = LuminaXGUI()
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and "first_paint_ms" not in result:
+                result["first_paint_ms"] = (time.time() - t0) * 1e3
+                result["heavy_at_paint"] = [m for m in HEAVY if m in sys.modules]
+                print(PAINT_MARK, file=sys.stderr, flush=True)
+            return False
+
+    paint = FirstPaint()
+    gui.window.installEventFilter(paint)
+
+    def check_loaded():
+        if "first_paint_ms" not in result:
+            return
+        # у дерева без фоновой загрузки ждать нечего
+        loader = getattr(gui.menu, "loader", None)
+        if loader is not None and (loader._thread is None or loader._thread.is_alive()):
+            return
+        result["loaded_ms"] = (time.time() - t0) * 1e3
+        if loader is not None:
+            result["comets"] = {cid: {k: round(v * 1e3, 1) for k, v in t.items()}
+                                for cid, t in loader.timings.items()}
+        gui.app.quit()
+
+    timer = QTimer()
+    timer.timeout.connect(check_loaded)
+    timer.start(5)
+    gui.run()
+    import json  # после замера: json тянет re и попал бы в импорты старта
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
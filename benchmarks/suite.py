@@ -0,0 +1,198 @@
+"""Сквозной прогон BadCam: каждая стадия и каждый пресет на 240p..1080p.
+
+Для каждого случая меряется время кадра через Pipeline.process() на
+синтетическом кадре и пишется в JSON: ns/пиксель, кадров/с, задержка
+p50/p99 и пиковый RSS процесса после прогона. Стадии берутся с
+параметрами из пресетов (первое вхождение, начиная с самых тяжёлых),
+стадии без пресета — с параметрами по умолчанию.
+
+Запуск из корня LuminaX:
+    python3 -m benchmarks.suite run --out results.json
+    python3 -m benchmarks.suite run --only presets --res 720p,1080p
+    python3 -m benchmarks.suite compare baseline.json results.json --threshold 0.1
+
+compare сравнивает p50 по совпадающим случаям и завершается с кодом 1,
+если где-то стало медленнее больше чем на threshold.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.common import RESOLUTIONS, synthetic_frame
+from comets.badcam.effects import STAGES, Pipeline, build_pipeline, get_preset, planner, preset_names
+
+
+def stage_specs(w, h):
+    """Параметры каждой зарегистрированной стадии для разрешения w x h"""
+    specs = {}
+    for name in reversed(preset_names()):
+        preset = get_preset(name, width=w, height=h)
+        # стадии плана (upscale, filter, jpeg_dc, ...) — с параметрами из планов пресетов
+        planned, _ = planner.plan(preset["stages"], preset.get("plan"))
+        for stage, params in preset["stages"] + planned:
+            if stage == "upscale" and params.get("cell", 1) > 1:
+                continue   # ждёт маленький кадр, а стадии здесь гоняются на полном
+            specs.setdefault(stage, params)
+    # без плана на этом разрешении: увеличение 1:1 со сдвигом, как у jitter
+    specs.setdefault("upscale", {"size": (w, h), "shift": max(1, int(min(w, h) * 0.03))})
+    return [(name, specs.get(name, {})) for name in STAGES]
+
+
+def measure(pipeline, frame, repeat, warmup):
+    """Замеры одного кадра, нс"""
+    for _ in range(warmup):
+        pipeline.process(frame)
+    times = np.empty(repeat, np.int64)
+    for i in range(repeat):
+        t0 = time.perf_counter_ns()
+        pipeline.process(frame)
+        times[i] = time.perf_counter_ns() - t0
+    return times
+
+
+def peak_rss_mb():
+    # ru_maxrss в Linux — в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(kind, name, res, w, h, times):
+    p50 = float(np.percentile(times, 50))
+    return {
+        "kind": kind,
+        "name": name,
+        "res": res,
+        "ns_per_px": round(p50 / (w * h), 3),
+        "fps": round(1e9 / float(times.mean()), 2),
+        "p50_ms": round(p50 / 1e6, 4),
+        "p99_ms": round(float(np.percentile(times, 99)) / 1e6, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def cases(only, resolutions, pattern):
+    """(вид, имя, разрешение, w, h, фабрика конвейера)"""
+    for res in resolutions:
+        w, h = RESOLUTIONS[res]
+        if only in (None, "stages"):
+            for name, params in stage_specs(w, h):
+                if not pattern or pattern in name:
+                    yield "stage", name, res, w, h, lambda n=name, p=params: Pipeline.from_spec([(n, p)], seed=0)
+        if only in (None, "presets"):
+            for name in preset_names():
+                if not pattern or pattern in name:
+                    preset = get_preset(name, width=w, height=h)
+                    yield "preset", name, res, w, h, lambda p=preset: build_pipeline(p, seed=0)
+
+
+def meta():
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "cv2_threads": cv2.getNumThreads(),
+    }
+
+
+def key(row):
+    return row["kind"], row["name"], row["res"]
+
+
+def run(args):
+    resolutions = args.res.split(",") if args.res else list(RESOLUTIONS)
+    for res in resolutions:
+        if res not in RESOLUTIONS:
+            sys.exit(f"Неизвестное разрешение: {res} (есть {', '.join(RESOLUTIONS)})")
+    if args.cv_threads is not None:
+        cv2.setNumThreads(args.cv_threads)
+
+    rows = []
+    frames = {}
+    print(f"{'вид':>6} {'имя':>16} {'res':>6} {'ns/px':>8} {'fps':>9} {'p50 ms':>9} {'p99 ms':>9} {'RSS MB':>7}")
+    for kind, name, res, w, h, factory in cases(args.only, resolutions, args.filter):
+        frame = frames.get(res)
+        if frame is None:
+            frame = frames[res] = synthetic_frame(w, h)
+        pipeline = factory()
+        row = summarize(kind, name, res, w, h, measure(pipeline, frame, args.repeat, args.warmup))
+        pipeline.close()
+        rows.append(row)
+        print(f"{kind:>6} {name:>16} {res:>6} {row['ns_per_px']:8.2f} {row['fps']:9.1f} "
+              f"{row['p50_ms']:9.3f} {row['p99_ms']:9.3f} {row['peak_rss_mb']:7.1f}")
+
+    result = {"meta": meta(), "repeat": args.repeat, "results": rows}
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=1, ensure_ascii=False)
+    print(f"Результаты: {args.out}")
+    if args.baseline:
+        return report(load(args.baseline), result, args.threshold)
+    return 0
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def report(base, new, threshold):
+    """Сравнить p50 с базой; 1, если есть регрессии"""
+    old = {key(r): r for r in base["results"]}
+    regressions = 0
+    print(f"{'вид':>6} {'имя':>16} {'res':>6} {'было ms':>9} {'стало ms':>9} {'изм.':>7}")
+    for row in new["results"]:
+        prev = old.get(key(row))
+        if prev is None or not prev["p50_ms"]:
+            continue
+        change = row["p50_ms"] / prev["p50_ms"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  РЕГРЕССИЯ"
+            regressions += 1
+        print(f"{row['kind']:>6} {row['name']:>16} {row['res']:>6} {prev['p50_ms']:9.3f} "
+              f"{row['p50_ms']:9.3f} {change:+7.1%}{flag}")
+    missing = set(old) - {key(r) for r in new["results"]}
+    if missing:
+        print(f"Нет в новом прогоне: {len(missing)} случаев")
+    print(f"Регрессий: {regressions} (порог {threshold:.0%})")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="прогнать стадии и пресеты")
+    r.add_argument("--out", default="bench_results.json", help="куда записать JSON")
+    r.add_argument("--res", default=None, help="разрешения через запятую (по умолчанию все)")
+    r.add_argument("--only", choices=["stages", "presets"], default=None)
+    r.add_argument("--filter", default=None, help="только случаи, в имени которых есть подстрока")
+    r.add_argument("--repeat", type=int, default=50)
+    r.add_argument("--warmup", type=int, default=5)
+    r.add_argument("--cv-threads", type=int, default=None, help="cv2.setNumThreads перед прогоном")
+    r.add_argument("--baseline", default=None, help="сразу сравнить с сохранённым JSON")
+    r.add_argument("--threshold", type=float, default=0.10, help="допустимое замедление p50")
+
+    c = sub.add_parser("compare", help="сравнить два JSON")
+    c.add_argument("baseline")
+    c.add_argument("current")
+    c.add_argument("--threshold", type=float, default=0.10, help="допустимое замедление p50")
+
+    args = p.parse_args(argv)
+    if args.cmd == "run":
+        return run(args)
+    return report(load(args.baseline), load(args.current), args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
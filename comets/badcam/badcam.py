@@ -1,7 +1,8 @@
 import importlib
-import os
 import subprocess
 
+from modules import comet_registry
+
 class BadCam:
     def __init__(self):
         self.enabled = False
@@ -11,17 +12,16 @@ class BadCam:
         self.video_nr = 2  # виртуальная камера /dev/video2
 
     def list_configs(self):
-        """Показать все доступные конфиги"""
-        configs_path = os.path.join(os.path.dirname(__file__), "configs")
-        return [f[:-3] for f in os.listdir(configs_path) if f.endswith(".py")]
+        """Показать все доступные конфиги (из манифеста кометы)"""
+        return [cfg["id"] for cfg in comet_registry.comet("badcam")["configs"]]
 
     def set_config(self, config_name: str):
         """Загрузить конфиг (a.py, b.py и т.д.)"""
         try:
-            module = importlib.import_module(f"comets.badcam.configs.{config_name}")
+            module = importlib.import_module(comet_registry.config("badcam", config_name)["module"])
             self.current_config = module
             print(f"[BadCam] Загружен конфиг: {config_name}")
-        except ModuleNotFoundError:
+        except (KeyError, ModuleNotFoundError):
             print(f"[BadCam] Конфиг {config_name} не найден!")
 
     def set_modprobe_name(self, name: str):
@@ -0,0 +1,109 @@
+"""Буферы кадров, общие для потоков BadCam."""
+
+import collections
+import threading
+
+import numpy as np
+
+
+class FramePool:
+    """Пул переиспользуемых буферов кадров одного размера.
+
+    acquire() отдаёт свободный буфер или выделяет новый, пока их меньше
+    count; дальше ждёт release(). При смене размера старые буферы
+    выбрасываются по мере возврата.
+    """
+
+    def __init__(self, count):
+        self.count = count
+        self.shape = None
+        self.dtype = None
+        self._free = []
+        self._allocated = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, shape, dtype=np.uint8, timeout=None):
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        with self._cond:
+            if shape != self.shape or dtype != self.dtype:
+                self.shape, self.dtype = shape, dtype
+                self._free.clear()
+                self._allocated = 0
+            if not self._free and self._allocated >= self.count:
+                if not self._cond.wait_for(lambda: self._free, timeout):
+                    return None
+            if self._free:
+                return self._free.pop()
+            self._allocated += 1
+            return np.empty(shape, dtype)
+
+    def release(self, buf):
+        with self._cond:
+            if buf.shape == self.shape and buf.dtype == self.dtype:
+                self._free.append(buf)
+                self._cond.notify()
+
+
+class FrameRing:
+    """Ограниченная очередь кадров между потоками.
+
+    policy='drop_oldest' — при переполнении выкидывается самый старый кадр
+    (он возвращается через on_drop), policy='block' — производитель ждёт,
+    пока потребитель не заберёт кадр (backpressure).
+    """
+
+    POLICIES = ("drop_oldest", "block")
+
+    def __init__(self, capacity=2, policy="drop_oldest", on_drop=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Неизвестная политика очереди: {policy}")
+        self.capacity = max(1, capacity)
+        self.policy = policy
+        self.on_drop = on_drop
+        self.dropped = 0
+        self.max_depth = 0
+        self.closed = False
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item):
+        """Положить кадр; False, если очередь уже закрыта"""
+        with self._cond:
+            if self.policy == "block":
+                self._cond.wait_for(lambda: len(self._items) < self.capacity or self.closed)
+            else:
+                while len(self._items) >= self.capacity:
+                    self._drop(self._items.popleft())
+            if self.closed:
+                self._drop(item, count=False)
+                return False
+            self._items.append(item)
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Забрать самый старый кадр; None по таймауту или после close()"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self.closed, timeout):
+                return None
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def _drop(self, item, count=True):
+        if count:
+            self.dropped += 1
+        if self.on_drop is not None:
+            self.on_drop(item)
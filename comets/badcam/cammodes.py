@@ -0,0 +1,174 @@
+"""Режимы камеры: перечисление форматов и разрешений и выбор самого дешёвого.
+
+Камера по умолчанию часто отдаёт 1080p MJPEG, а конвейеру первой же
+стадией нужно 320x240 или даже 40x30 — декодировать полный кадр, чтобы
+тут же его выбросить, дорого. Здесь по списку родных режимов камеры
+(V4L2: VIDIOC_ENUM_FMT и VIDIOC_ENUM_FRAMESIZES, без внешних утилит)
+выбирается наименьший режим, которого хватает конвейеру. Если подходят
+только большие MJPEG-режимы, JPEG декодируется сразу уменьшенным в 2, 4
+или 8 раз (cv2.IMREAD_REDUCED_COLOR_*): декодер пропускает часть
+обратного DCT, и полный кадр не собирается вовсе.
+
+Модуль лёгкий (без numpy и cv2).
+"""
+
+import fcntl
+import os
+import struct
+
+# несжатые форматы: cv2 только переводит их в BGR
+RAW_FOURCCS = ("YUYV", "UYVY", "YU12", "NV12", "BGR3", "RGB3", "GREY")
+JPEG_FOURCCS = ("MJPG", "JPEG")
+REDUCE_FACTORS = (8, 4, 2)   # IMREAD_REDUCED_COLOR_8/4/2
+
+# относительная цена пикселя при захвате (порядок величин из bench_capture):
+# несжатый кадр только переводится в BGR; у JPEG энтропийный разбор идёт по
+# всему кадру режима даже при уменьшенном декоде, а сборка — по выходу
+RAW_COST = 1
+JPEG_SOURCE_COST = 8
+JPEG_DECODE_COST = 6
+
+_V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+_V4L2_FRMSIZE_TYPE_DISCRETE = 1
+_FMTDESC = struct.Struct("=III32sII12x")      # struct v4l2_fmtdesc, 64 байта
+_FRMSIZE = struct.Struct("=IIIIIIIII8x")      # struct v4l2_frmsizeenum, 44 байта
+
+
+def _iowr(nr, size):
+    return (3 << 30) | (size << 16) | (ord("V") << 8) | nr
+
+
+VIDIOC_ENUM_FMT = _iowr(2, _FMTDESC.size)
+VIDIOC_ENUM_FRAMESIZES = _iowr(74, _FRMSIZE.size)
+
+
+def fourcc_str(code):
+    return code.to_bytes(4, "little").decode("ascii", "replace")
+
+
+def fourcc_code(name):
+    return int.from_bytes(name.encode("ascii"), "little")
+
+
+def device_path(target):
+    """Путь к устройству V4L2 по индексу или пути камеры (None — не V4L2)"""
+    if isinstance(target, int):
+        return f"/dev/video{target}"
+    if isinstance(target, str) and target.startswith("/dev/"):
+        return target
+    return None
+
+
+# ------------------ Перечисление ------------------
+def _ioctl_iter(fd, request, pack):
+    index = 0
+    while True:
+        buf = bytearray(pack(index))
+        try:
+            fcntl.ioctl(fd, request, buf)
+        except OSError:
+            return
+        yield bytes(buf)
+        index += 1
+
+
+def _frame_sizes(fd, code):
+    for raw in _ioctl_iter(fd, VIDIOC_ENUM_FRAMESIZES,
+                           lambda i: _FRMSIZE.pack(i, code, 0, 0, 0, 0, 0, 0, 0)):
+        _, _, kind, a, b, c, d, e, f = _FRMSIZE.unpack(raw)
+        if kind == _V4L2_FRMSIZE_TYPE_DISCRETE:
+            yield {"size": (a, b)}
+        else:
+            # непрерывный или пошаговый диапазон: min/max/step по ширине и высоте
+            yield {"range": (a, b, max(c, 1), d, e, max(f, 1))}
+            return
+
+
+def list_modes(target):
+    """Родные режимы камеры [{"fourcc", "size"} или {"fourcc", "range"}]; [] — не удалось узнать"""
+    path = device_path(target)
+    if path is None:
+        return []
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+    except OSError:
+        return []
+    modes = []
+    try:
+        for raw in _ioctl_iter(fd, VIDIOC_ENUM_FMT,
+                               lambda i: _FMTDESC.pack(i, _V4L2_BUF_TYPE_VIDEO_CAPTURE, 0, b"", 0, 0)):
+            code = _FMTDESC.unpack(raw)[4]
+            for mode in _frame_sizes(fd, code):
+                modes.append({"fourcc": fourcc_str(code), **mode})
+    finally:
+        os.close(fd)
+    return modes
+
+
+# ------------------ Выбор ------------------
+def _fit_range(rng, need):
+    """Наименьший размер диапазона (min, max, step по w и h), покрывающий need"""
+    min_w, max_w, step_w, min_h, max_h, step_h = rng
+
+    def fit(v, lo, hi, step):
+        v = max(v, lo)
+        v = lo + -(-(v - lo) // step) * step
+        return min(v, hi)
+
+    return fit(need[0], min_w, max_w, step_w), fit(need[1], min_h, max_h, step_h)
+
+
+def reduce_factor(size, need):
+    """Во сколько раз можно уменьшить JPEG при декодировании, чтобы кадр покрывал need"""
+    for f in REDUCE_FACTORS:
+        if size[0] // f >= need[0] and size[1] // f >= need[1]:
+            return f
+    return 1
+
+
+def capture_cost(mode):
+    """Оценка цены кадра режима в условных единицах (см. RAW_COST, JPEG_*_COST)"""
+    w, h = mode["size"]
+    if mode["fourcc"] not in JPEG_FOURCCS:
+        return RAW_COST * w * h
+    dw, dh = mode["decode"]
+    return JPEG_SOURCE_COST * w * h + JPEG_DECODE_COST * dw * dh
+
+
+def choose_mode(modes, need):
+    """Самый дешёвый режим под need=(w, h): {"fourcc", "size", "reduce", "decode"} или None.
+
+    Из режимов, покрывающих need, берётся самый дешёвый по capture_cost:
+    обычно это наименьший режим, а MJPEG — с уменьшением при
+    декодировании. Если need не покрывает ни один режим — самый большой
+    из известных.
+    """
+    candidates = []
+    for mode in modes:
+        fourcc = mode["fourcc"]
+        if fourcc not in RAW_FOURCCS and fourcc not in JPEG_FOURCCS:
+            continue
+        size = mode["size"] if "size" in mode else _fit_range(mode["range"], need)
+        reduce = reduce_factor(size, need) if fourcc in JPEG_FOURCCS else 1
+        decode = (size[0] // reduce, size[1] // reduce)
+        covers = size[0] >= need[0] and size[1] >= need[1]
+        mode = {"fourcc": fourcc, "size": size, "reduce": reduce, "decode": decode}
+        cost = capture_cost(mode) if covers else -size[0] * size[1]
+        candidates.append((not covers, cost, mode))
+    if not candidates:
+        return None
+    return min(candidates, key=lambda c: c[:2])[2]
+
+
+def describe(mode):
+    """Строка для лога: 'MJPG 1280x720 -> 320x180 (JPEG /4)'"""
+    if mode is None:
+        return "режим камеры по умолчанию"
+    w, h = mode["size"]
+    text = f"{mode['fourcc']} {w}x{h}"
+    if mode.get("reduce", 1) > 1:
+        dw, dh = mode["decode"]
+        text += f" -> {dw}x{dh} (JPEG /{mode['reduce']})"
+    if mode.get("need"):
+        text += f", конвейеру нужно {mode['need'][0]}x{mode['need'][1]}"
+    return text
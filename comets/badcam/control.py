@@ -0,0 +1,134 @@
+"""Канал управления движком BadCam: JSON-строки через Unix-сокет.
+
+Клиент шлёт строку {"cmd": имя, ...параметры}, движок отвечает строкой
+{"ok": true, ...} или {"ok": false, "error": текст}. Команды — словарь
+имя -> функция(**параметры), возвращающая словарь для ответа. Модуль
+лёгкий (без numpy и cv2): его импортирует и GUI.
+
+Из консоли (движок должен быть запущен):
+    python3 -m comets.badcam.control status
+    python3 -m comets.badcam.control stages
+    python3 -m comets.badcam.control load bad
+    python3 -m comets.badcam.control set noise sigma=30
+    python3 -m comets.badcam.control set 2 ksize=7
+    python3 -m comets.badcam.control fps 15
+    python3 -m comets.badcam.control size 640 480
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), f"badcam-{os.getuid()}.sock")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                msg = json.loads(line)
+                cmd = msg.pop("cmd", None)
+                handler = self.server.handlers.get(cmd)
+                if handler is None:
+                    raise ValueError(f"неизвестная команда: {cmd}")
+                reply = {"ok": True, **(handler(**msg) or {})}
+            except Exception as e:
+                reply = {"ok": False, "error": str(e.args[0]) if e.args else repr(e)}
+            self.wfile.write(json.dumps(reply, ensure_ascii=False).encode() + b"\n")
+
+
+class ControlServer:
+    def __init__(self, path=DEFAULT_PATH, handlers=None):
+        self.path = path
+        self.handlers = dict(handlers or {})
+        self.server = None
+        self._thread = None
+
+    def start(self):
+        if os.path.exists(self.path):
+            # сокет остался от упавшего движка
+            os.unlink(self.path)
+        self.server = socketserver.ThreadingUnixStreamServer(self.path, _Handler)
+        self.server.daemon_threads = True
+        self.server.handlers = self.handlers
+        self._thread = threading.Thread(target=self.server.serve_forever, name="badcam-control", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def request(cmd, path=DEFAULT_PATH, timeout=5.0, **params):
+    """Отправить команду движку и вернуть ответ (OSError — движок не слушает)"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(path)
+        s.sendall(json.dumps({"cmd": cmd, **params}).encode() + b"\n")
+        with s.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("движок закрыл соединение без ответа")
+    return json.loads(line)
+
+
+# ------------------ CLI ------------------
+def parse_value(text):
+    """Значение параметра из консоли: JSON (числа, списки, null) или строка"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Команды запущенному движку BadCam")
+    p.add_argument("--control", default=DEFAULT_PATH, help="Unix-сокет движка")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("status")
+    sub.add_parser("stages")
+    load = sub.add_parser("load")
+    load.add_argument("config")
+    setp = sub.add_parser("set")
+    setp.add_argument("stage", help="номер стадии или имя")
+    setp.add_argument("params", nargs="+", metavar="KEY=VALUE")
+    fps = sub.add_parser("fps")
+    fps.add_argument("fps", type=int)
+    size = sub.add_parser("size")
+    size.add_argument("width", type=int)
+    size.add_argument("height", type=int)
+    args = p.parse_args(argv)
+
+    params = {}
+    if args.cmd == "load":
+        params = {"config": args.config}
+    elif args.cmd == "set":
+        stage = int(args.stage) if args.stage.isdigit() else args.stage
+        values = dict(kv.split("=", 1) for kv in args.params)
+        params = {"stage": stage, "params": {k: parse_value(v) for k, v in values.items()}}
+    elif args.cmd == "fps":
+        params = {"fps": args.fps}
+    elif args.cmd == "size":
+        params = {"width": args.width, "height": args.height}
+    try:
+        reply = request(args.cmd, path=args.control, **params)
+    except OSError as e:
+        raise SystemExit(f"Движок не отвечает ({args.control}): {e}")
+    print(json.dumps(reply, ensure_ascii=False, indent=1))
+    if not reply.get("ok"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""Движок эффектов BadCam: реестр стадий, конвейер и пресеты."""
+
+from .base import STAGES, PointwiseStage, Stage, create_stage, register_stage
+from . import stages  # noqa: F401  регистрирует встроенные стадии
+from .fusion import FusedLUT, fuse_pointwise
+from .pipeline import Pipeline
+from .tiling import TileExecutor
+from .yuv import FORMATS, frame_format, frame_size, from_bgr, planes, to_bgr
+from .presets import HARD_PRESETS, PRESETS, build_pipeline, get_preset, hard_preset, preset_names
+
+__all__ = [
+    "STAGES", "Stage", "PointwiseStage", "create_stage", "register_stage",
+    "FusedLUT", "fuse_pointwise", "Pipeline", "TileExecutor",
+    "FORMATS", "frame_format", "frame_size", "from_bgr", "planes", "to_bgr",
+    "PRESETS", "HARD_PRESETS", "build_pipeline", "get_preset", "hard_preset", "preset_names",
+]
@@ -0,0 +1,224 @@
+import cv2
+import numpy as np
+
+from .yuv import luma
+
+# Реестр стадий: имя -> класс
+STAGES = {}
+
+
+def register_stage(cls):
+    """Декоратор: добавить стадию в реестр по её имени"""
+    if not cls.name:
+        raise ValueError(f"У стадии {cls.__name__} не задано имя")
+    if cls.name in STAGES:
+        raise ValueError(f"Стадия {cls.name} уже зарегистрирована")
+    STAGES[cls.name] = cls
+    return cls
+
+
+def create_stage(name, **params):
+    """Создать стадию из реестра по имени"""
+    try:
+        cls = STAGES[name]
+    except KeyError:
+        raise KeyError(f"Неизвестная стадия: {name}") from None
+    return cls(**params)
+
+
+class Stage:
+    """Базовая стадия эффекта.
+
+    Стадия объявляет тип входа/выхода и умеет посчитать разрешение выхода
+    по разрешению входа. Буферы выделяет конвейер, стадия только пишет
+    результат в готовый ``dst``; свои рабочие буферы она заводит в
+    prepare(), так что в установившемся режиме process() не выделяет
+    памяти под кадры (проверка — benchmarks/bench_alloc.py).
+    """
+
+    name = None
+    in_dtype = np.uint8
+    out_dtype = np.uint8
+    inplace = False   # может писать результат прямо во входной буфер
+    pointwise = False  # значение пикселя зависит только от него самого (см. PointwiseStage)
+    sequential = False  # зависит от предыдущего выходного кадра, кадры строго по порядку
+    state_attrs = ()    # атрибуты, которые step() меняет от кадра к кадру
+    tileable = False    # можно считать горизонтальными полосами (см. tiling.py)
+    tile_align = 1      # границы полос должны быть кратны этому числу строк
+    live_params = ()    # параметры, которые читаются каждый кадр: их смена не требует prepare()
+    upscale = None      # "exact" — перестановка с увеличением ближайшим соседом не меняет кадр (planner.py)
+    formats = ("bgr",)  # форматы кадра, которые стадия умеет (yuv.py)
+    allocates = False   # process() выделяет память под кадр каждый раз (кодек без dst)
+    defaults = {}
+
+    def __init__(self, **params):
+        unknown = set(params) - set(self.defaults)
+        if unknown:
+            raise TypeError(f"Стадия {self.name}: неизвестные параметры {sorted(unknown)}")
+        self.params = {**self.defaults, **params}
+        self.in_shape = None
+        self.out_shape = None
+        self.rng = np.random.default_rng()
+        self._bands = {}
+
+    def __repr__(self):
+        args = ", ".join(f"{k}={v!r}" for k, v in self.params.items())
+        return f"{type(self).__name__}({args})"
+
+    def output_shape(self, in_shape):
+        """Разрешение выхода (h, w, c) для входа in_shape"""
+        return in_shape
+
+    def input_size(self):
+        """Наименьший вход (w, h), которого хватает стадии; None — нужен кадр целиком.
+
+        Стадии, которые первым делом уменьшают кадр до заданного размера
+        (resize, pixelate), говорят, до какого: больший захват с камеры
+        им не нужен (см. cammodes.py).
+        """
+        return None
+
+    def block_scale(self, scale, size):
+        """Замена стадии в масштабе блоков пикселизации: [(имя, параметры), ...] или None.
+
+        Кадр после увеличения ближайшим соседом состоит из блоков
+        sx x sy пикселей (scale=(sx, sy)), size=(w, h) — его полное
+        разрешение.
+        Стадии, которые планировщик может выполнить до увеличения (на
+        маленьком кадре), возвращают, чем их там заменить; [] — в масштабе
+        блоков стадия ничего не делает. None — стадию переносить нельзя.
+        """
+        if self.upscale == "exact":
+            return [(self.name, dict(self.params))]
+        return None
+
+    def setup(self, in_shape, rng=None):
+        """Подготовить стадию под разрешение входа, вернуть разрешение выхода"""
+        self._bands = {}
+        self.in_shape = tuple(in_shape)
+        self.out_shape = tuple(self.output_shape(self.in_shape))
+        if rng is not None:
+            self.rng = rng
+        self.prepare()
+        return self.out_shape
+
+    def prepare(self):
+        """Предрасчёт таблиц и масок под текущее разрешение"""
+
+    def update(self, **params):
+        """Поменять параметры на ходу, между кадрами.
+
+        Пересчитывается только своё: prepare() этой стадии, если среди
+        параметров есть не только live_params. Возвращает, что пришлось
+        сделать: "setup" — поменялось разрешение выхода и конвейеру нужен
+        новый setup(), "prepare" — пересчитаны таблицы стадии, None — ничего.
+        """
+        unknown = set(params) - set(self.defaults)
+        if unknown:
+            raise TypeError(f"Стадия {self.name}: неизвестные параметры {sorted(unknown)}")
+        self.params.update(params)
+        if self.in_shape is None:
+            return None
+        if tuple(self.output_shape(self.in_shape)) != self.out_shape:
+            return "setup"
+        if set(params) - set(self.live_params):
+            self._bands = {}
+            self.prepare()
+            return "prepare"
+        return None
+
+    def step(self):
+        """Обновить параметры, меняющиеся от кадра к кадру"""
+
+    def frame_state(self):
+        """Снимок параметров кадра после step() — чтобы обработать кадр в другом процессе"""
+        state = {}
+        for a in self.state_attrs:
+            v = getattr(self, a)
+            state[a] = v.copy() if isinstance(v, np.ndarray) else v
+        return state
+
+    def load_state(self, state):
+        """Применить снимок frame_state() вместо собственного step()"""
+        for a, v in state.items():
+            setattr(self, a, v)
+
+    def process(self, src, dst):
+        """Обработать кадр src и записать результат в dst"""
+        raise NotImplementedError
+
+    # ------------------ Полосы ------------------
+    def halo(self):
+        """Сколько строк контекста сверху и снизу нужно полосе (радиус ядра)"""
+        return 0
+
+    def begin_frame(self):
+        """Покадровая подготовка, которая должна пройти один раз до полос"""
+
+    def process_rows(self, src, dst, y0, y1):
+        """Посчитать строки [y0, y1) кадра; src и dst — целые кадры.
+
+        Полоса берётся с запасом halo() строк, считается во временный
+        буфер (свой на каждую полосу), в dst копируются только её строки.
+        """
+        halo = self.halo()
+        if not halo:
+            self.process(src[y0:y1], dst[y0:y1])
+            return
+        a = max(0, y0 - halo)
+        b = min(src.shape[0], y1 + halo)
+        tmp = self._bands.get((a, b))
+        if tmp is None:
+            tmp = self._bands[(a, b)] = np.empty((b - a,) + dst.shape[1:], dst.dtype)
+        self.process(src[a:b], tmp)
+        dst[y0:y1] = tmp[y0 - a:y1 - a]
+
+
+class PointwiseStage(Stage):
+    """Поканальное отображение значений пикселя, задаётся таблицей на 256 значений.
+
+    Стадия возвращает таблицу (256, C) uint8 и ключ параметров, от которых
+    она зависит; таблица пересобирается только при смене ключа, а кадр
+    проходит одним cv2.LUT. Подряд идущие такие стадии конвейер сливает
+    в одну таблицу (см. fusion.py).
+    """
+
+    pointwise = True
+    inplace = True
+    tileable = True
+    upscale = "exact"
+
+    def lut_key(self):
+        """Ключ текущих параметров таблицы (сравнивается между кадрами)"""
+        return None
+
+    def table(self):
+        """Таблица (256, C) uint8 для текущих параметров"""
+        raise NotImplementedError
+
+    def setup(self, in_shape, rng=None):
+        self._key = self._lut = None
+        return super().setup(in_shape, rng)
+
+    def update(self, **params):
+        self._lut = None  # ключ таблицы может не включать параметры
+        return super().update(**params) or "prepare"
+
+    def channels(self):
+        return self.in_shape[2] if len(self.in_shape) > 2 else 1
+
+    def lut(self):
+        """Таблица в форме для cv2.LUT, пересобирается только при смене ключа"""
+        key = self.lut_key()
+        if self._lut is None or key != self._key:
+            self._lut = np.ascontiguousarray(self.table().reshape(256, 1, -1))
+            self._key = key
+        return self._lut
+
+    def begin_frame(self):
+        self.lut()
+
+    def process(self, src, dst):
+        # у I420 таблица с одним каналом — только для яркости
+        src, dst = luma(src, dst)
+        cv2.LUT(src, self.lut(), dst=dst)
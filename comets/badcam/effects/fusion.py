@@ -0,0 +1,73 @@
+"""Слияние подряд идущих поканальных стадий в одну таблицу.
+
+Цепочка поканальных отображений uint8 -> uint8 — это снова такое
+отображение: таблицы композируются индексированием (256 значений на
+канал), и вместо нескольких проходов по кадру остаётся один cv2.LUT.
+"""
+
+import numpy as np
+
+from .base import PointwiseStage
+
+
+class FusedLUT(PointwiseStage):
+    """Несколько поканальных стадий, выполняемых одной таблицей"""
+
+    name = "fused_lut"
+
+    def __init__(self, parts):
+        super().__init__()
+        self.parts = list(parts)
+        self.formats = tuple(f for f in self.parts[0].formats if all(f in p.formats for p in self.parts))
+
+    def __repr__(self):
+        return f"FusedLUT({', '.join(p.name for p in self.parts)})"
+
+    def setup(self, in_shape, rng=None):
+        rngs = [None] * len(self.parts)
+        if rng is not None:
+            rngs = [np.random.default_rng(rng.integers(1 << 63)) for _ in self.parts]
+        for part, part_rng in zip(self.parts, rngs):
+            part.setup(in_shape, part_rng)
+        return super().setup(in_shape, rng)
+
+    def step(self):
+        for part in self.parts:
+            part.step()
+
+    def frame_state(self):
+        return [part.frame_state() for part in self.parts]
+
+    def load_state(self, state):
+        for part, part_state in zip(self.parts, state):
+            part.load_state(part_state)
+
+    def lut_key(self):
+        return tuple(part.lut_key() for part in self.parts)
+
+    def table(self):
+        c = self.channels()
+        ch = np.arange(c)
+        t = np.repeat(np.arange(256, dtype=np.uint8)[:, None], c, axis=1)
+        for part in self.parts:
+            # t[v, c] -> part[t[v, c], c]
+            t = part.table()[t, ch]
+        return t
+
+
+def fuse_pointwise(stages):
+    """Заменить серии из 2+ подряд идущих поканальных стадий на FusedLUT"""
+    out = []
+    run = []
+    for stage in list(stages) + [None]:
+        if stage is not None and stage.pointwise:
+            run.append(stage)
+            continue
+        if len(run) > 1:
+            out.append(FusedLUT(run))
+        else:
+            out.extend(run)
+        run = []
+        if stage is not None:
+            out.append(stage)
+    return out
@@ -0,0 +1,116 @@
+"""Шум матрицы без генерации float64 на каждый кадр.
+
+NoiseBank заранее генерирует несколько тайлов int16 чуть больше кадра и
+каждый кадр отдаёт вид на случайный тайл со случайным смещением.
+NoiseSource выдаёт поле шума int16 под кадр: из банка или честно
+случайное (генератор PCG64 пишет прямо в заранее выделенные буферы).
+Шум добавляется к uint8 кадру насыщающим cv2.add без перевода кадра во float.
+"""
+
+import cv2
+import numpy as np
+
+# сколько единиц int16 в одной sigma у «единичного» шума (фикс. точка)
+UNIT = 256
+# запас тайла по строкам и столбцам для случайного смещения
+MARGIN = 32
+
+_banks = {}
+
+
+class NoiseBank:
+    """Банк тайлов шума int16 для одного разрешения.
+
+    kind='gaussian' — N(0, scale), kind='uniform' — равномерный [0, scale).
+    """
+
+    def __init__(self, shape, kind="gaussian", scale=UNIT, tiles=2, seed=None):
+        h, w = shape[:2]
+        c = shape[2] if len(shape) > 2 else 1
+        self.shape = (h, w, c)
+        rng = np.random.default_rng(seed)
+        size = (tiles, h + MARGIN, (w + MARGIN) * c)
+        if kind == "gaussian":
+            data = rng.standard_normal(size, dtype=np.float32)
+            data *= scale
+            np.rint(data, out=data)
+            np.clip(data, -32767, 32767, out=data)
+        elif kind == "uniform":
+            data = rng.integers(0, max(1, int(scale)), size)
+        else:
+            raise ValueError(f"Неизвестный вид шума: {kind}")
+        self.tiles = data.astype(np.int16)
+
+    def sample(self, rng):
+        """Вид (h, w, c) на случайный тайл со случайным смещением"""
+        h, w, c = self.shape
+        t = rng.integers(0, len(self.tiles))
+        oy = rng.integers(0, MARGIN + 1)
+        ox = rng.integers(0, MARGIN * c + 1)
+        return self.tiles[t, oy:oy + h, ox:ox + w * c].reshape(h, w, c)
+
+
+def noise_bank(shape, kind="gaussian", scale=UNIT, tiles=2):
+    """Общий банк на (разрешение, вид, масштаб): стадии с одинаковым шумом делят память"""
+    key = (tuple(shape), kind, scale, tiles)
+    bank = _banks.get(key)
+    if bank is None:
+        bank = _banks[key] = NoiseBank(shape, kind, scale, tiles)
+    return bank
+
+
+def clipped_stats(sigma):
+    """Матожидание и СКО clip(v + rint(n), 0, 255) для v = 0..255, n ~ N(0, sigma[v]).
+
+    Считаются по сетке значений n; насыщение сдвигает среднее к середине
+    и срезает СКО у краёв диапазона.
+    """
+    z = np.linspace(-6, 6, 1201)
+    weight = np.exp(-z ** 2 / 2)
+    weight /= weight.sum()
+    levels = np.arange(256.0)
+    x = np.clip(np.rint(levels[:, None] + np.asarray(sigma, np.float64)[:, None] * z), 0, 255)
+    mean = x @ weight
+    return mean, np.sqrt(((x - mean[:, None]) ** 2) @ weight)
+
+
+def add_saturating(src, noise, dst):
+    """dst = clip(src + noise, 0, 255) для uint8 src и int16 noise"""
+    return cv2.add(src, noise, dst=dst, dtype=cv2.CV_8U)
+
+
+class NoiseSource:
+    """Поле шума int16 под кадр: из банка (mode='bank') или случайное (mode='random')"""
+
+    def __init__(self, shape, kind="gaussian", scale=UNIT, mode="bank", tiles=2):
+        if mode not in ("bank", "random"):
+            raise ValueError(f"Неизвестный режим шума: {mode}")
+        self.shape = tuple(shape)
+        self.kind = kind
+        self.scale = scale
+        self.mode = mode
+        if mode == "bank":
+            self.bank = noise_bank(self.shape, kind, scale, tiles)
+        else:
+            self.bank = None
+            self._f = np.empty(self.shape, np.float32)
+            self._field = np.empty(self.shape, np.int16)
+
+    def next(self, rng):
+        """Поле шума для следующего кадра (буфер переиспользуется).
+
+        rng — np.random.Generator (PCG64, как у default_rng) вызывающей стадии.
+        """
+        if self.bank is not None:
+            return self.bank.sample(rng)
+        f = self._f
+        if self.kind == "gaussian":
+            rng.standard_normal(dtype=np.float32, out=f)
+            f *= self.scale
+            np.rint(f, out=f)
+        else:
+            rng.random(dtype=np.float32, out=f)
+            f *= self.scale
+            np.floor(f, out=f)
+        np.copyto(self._field, f, casting="unsafe")
+        return self._field
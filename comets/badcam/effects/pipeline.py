@@ -0,0 +1,286 @@
+import time
+
+import numpy as np
+
+from comets.badcam import trace
+
+from .base import create_stage
+from .fusion import fuse_pointwise
+from .planner import plan as plan_spec
+from .tiling import TileExecutor
+from .yuv import FORMATS, frame_format
+
+
+def build_stages(spec, plan=None, fmt="bgr"):
+    """Стадии по списку [(имя, параметры), ...]: по плану (planner.py) и
+    с переводами формата кадра (convert) перед стадиями, которые не умеют
+    текущий формат. fmt — формат входного кадра ("bgr" или "i420").
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат кадра: {fmt}")
+    if plan not in (None, "none"):
+        spec, _ = plan_spec(spec, plan)
+    stages = []
+    for name, params in spec:
+        stage = create_stage(name, **params)
+        if fmt not in stage.formats:
+            fmt = stage.formats[0]
+            stages.append(create_stage("convert", to=fmt))
+        stages.append(stage)
+    return stages
+
+
+class Pipeline:
+    """Конвейер стадий с заранее выделенными буферами.
+
+    Буферы выделяются один раз в setup() под разрешение входа и
+    переиспользуются каждый кадр. process() возвращает буфер последней
+    стадии: он принадлежит конвейеру и перезаписывается следующим кадром.
+    При fuse=True подряд идущие поканальные стадии сливаются в одну таблицу.
+    tiles — число потоков для счёта стадий полосами (0 — весь кадр целиком,
+    см. tiling.py).
+    """
+
+    def __init__(self, stages, seed=None, fuse=True, tiles=0):
+        self.stages = fuse_pointwise(stages) if fuse else list(stages)
+        self.seed = seed
+        self.fuse = fuse
+        self.plan = None          # режим плана (planner.py), None — стадии как заданы
+        self.fmt = "bgr"          # формат входного кадра
+        self.source_spec = None   # исходный список стадий (при плане или I420)
+        self.tiles = tiles
+        self.tiler = TileExecutor(tiles) if tiles else None
+        self.in_shape = None
+        self.buffers = []
+        self.frame_idx = 0
+        self._input = None
+
+    @classmethod
+    def from_spec(cls, spec, seed=None, fuse=True, tiles=0, plan=None, fmt="bgr"):
+        """Собрать конвейер из списка [(имя стадии, параметры), ...].
+
+        plan — режим планировщика ("exact", "approx", см. planner.py):
+        стадии переставляются, а spec() и set_params() работают с
+        исходным списком. fmt — формат входного кадра (yuv.py): перед
+        стадиями, которые его не умеют, вставляется convert.
+        """
+        if plan in (None, "none") and fmt == "bgr":
+            return cls([create_stage(name, **params) for name, params in spec], seed=seed, fuse=fuse, tiles=tiles)
+        source = [(name, dict(params)) for name, params in spec]
+        pipeline = cls(build_stages(source, plan, fmt), seed=seed, fuse=fuse, tiles=tiles)
+        pipeline.plan = None if plan == "none" else plan
+        pipeline.fmt = fmt
+        pipeline.source_spec = source
+        return pipeline
+
+    def setup(self, in_shape):
+        """Подготовить стадии и выделить буферы под разрешение входа"""
+        shape = tuple(in_shape)
+        dtype = np.dtype(np.uint8)
+        rngs = [np.random.default_rng(s)
+                for s in np.random.SeedSequence(self.seed).spawn(len(self.stages))]
+
+        self._input = None
+        if self.stages and self.stages[0].inplace:
+            # входной кадр не наш — первой in-place стадии нужна копия
+            self._input = np.empty(shape, dtype)
+
+        self.buffers = []
+        prev = self._input
+        for stage, rng in zip(self.stages, rngs):
+            if np.dtype(stage.in_dtype) != dtype:
+                raise TypeError(f"Стадия {stage.name} ждёт {np.dtype(stage.in_dtype)}, а получает {dtype}")
+            if frame_format(shape) not in stage.formats:
+                raise TypeError(f"Стадия {stage.name} не умеет кадры {frame_format(shape)}")
+            out_shape = stage.setup(shape, rng)
+            out_dtype = np.dtype(stage.out_dtype)
+            if stage.inplace and prev is not None and out_shape == shape and out_dtype == dtype:
+                buf = prev
+            else:
+                buf = np.empty(out_shape, out_dtype)
+            self.buffers.append(buf)
+            prev, shape, dtype = buf, out_shape, out_dtype
+
+        self.in_shape = tuple(in_shape)
+        self.out_shape = shape
+
+    @staticmethod
+    def label(stage):
+        """Имя стадии для отладки и трассы (у слитой таблицы — с частями)"""
+        if hasattr(stage, "parts"):
+            return stage.name + "(" + "+".join(p.name for p in stage.parts) + ")"
+        return stage.name
+
+    def describe(self):
+        """Список (стадия, вход, выход, dtype) — для отладки и планирования"""
+        rows = []
+        shape = self.in_shape
+        for stage in self.stages:
+            rows.append((self.label(stage), shape, stage.out_shape, np.dtype(stage.out_dtype).name))
+            shape = stage.out_shape
+        return rows
+
+    def parts(self):
+        """Стадии в исходном порядке (части слитых таблиц по отдельности) с их исполнителем"""
+        for stage in self.stages:
+            for part in getattr(stage, "parts", [stage]):
+                yield part, stage
+
+    def spec(self):
+        """Текущие стадии и параметры в виде [(имя, параметры), ...] (как в пресете)"""
+        if self.source_spec is not None:
+            return [(name, dict(params)) for name, params in self.source_spec]
+        return [(part.name, dict(part.params)) for part, _ in self.parts()]
+
+    def input_size(self):
+        """Наименьший вход (w, h), которого хватает конвейеру (None — любой кадр как есть)"""
+        return self.stages[0].input_size() if self.stages else None
+
+    def find(self, key):
+        """(стадия, исполнитель) по номеру в исходном списке или по имени (первая такая)"""
+        for i, (part, owner) in enumerate(self.parts()):
+            if key == i or key == part.name:
+                return part, owner
+        raise KeyError(f"В конвейере нет стадии {key!r}")
+
+    def set_params(self, key, **params):
+        """Поменять параметры стадии между кадрами; вернуть список пересчитанных стадий.
+
+        Пересчитываются только таблицы и маски этой стадии (у слитой
+        таблицы — общая таблица). Если поменялось разрешение выхода
+        стадии, буферы всего конвейера выделяются заново.
+        У конвейера по плану (или с переводами формата) key — стадия
+        исходного списка: план пересчитывается, и если стадии в нём
+        остались те же, меняются только параметры затронутых, иначе
+        стадии собираются заново.
+        """
+        if self.source_spec is not None:
+            return self._replan(key, params)
+        part, owner = self.find(key)
+        done = part.update(**params)
+        if done == "setup":
+            self.setup(self.in_shape)
+            return [self.label(stage) for stage in self.stages]
+        if done is None:
+            return []
+        if owner is not part:
+            owner._lut = None
+        return [self.label(owner)]
+
+    def _replan(self, key, params):
+        for i, (name, old) in enumerate(self.source_spec):
+            if key == i or key == name:
+                break
+        else:
+            raise KeyError(f"В конвейере нет стадии {key!r}")
+        new = {**old, **params}
+        create_stage(name, **new)   # неизвестные параметры — ошибка до правки плана
+        self.source_spec[i] = (name, new)
+        stages = build_stages(self.source_spec, self.plan, self.fmt)
+        parts = list(self.parts())
+        if [s.name for s in stages] != [part.name for part, _ in parts]:
+            self.stages = stages
+            if self.fuse:
+                self.stages = fuse_pointwise(self.stages)
+            if self.in_shape is not None:
+                self.setup(self.in_shape)
+            return [self.label(stage) for stage in self.stages]
+        rebuilt = []
+        resetup = False
+        for stage, (part, owner) in zip(stages, parts):
+            changed = {k: v for k, v in stage.params.items() if part.params.get(k) != v}
+            if not changed:
+                continue
+            done = part.update(**changed)
+            if done == "setup":
+                resetup = True
+            elif done is not None:
+                if owner is not part:
+                    owner._lut = None
+                if self.label(owner) not in rebuilt:
+                    rebuilt.append(self.label(owner))
+        if resetup:
+            self.setup(self.in_shape)
+            return [self.label(stage) for stage in self.stages]
+        return rebuilt
+
+    def sequential_index(self):
+        """Индекс первой стадии, которой нужен предыдущий выходной кадр (или len)"""
+        for i, stage in enumerate(self.stages):
+            if stage.sequential:
+                return i
+        return len(self.stages)
+
+    def split(self, index):
+        """Разрезать на два конвейера по индексу стадии (стадии общие, не копии)"""
+        head = Pipeline(self.stages[:index], seed=self.seed, fuse=False, tiles=self.tiles)
+        tail = Pipeline(self.stages[index:], seed=self.seed, fuse=False, tiles=self.tiles)
+        return head, tail
+
+    def reseed(self, seed):
+        """Новые генераторы стадий (таблицы и карты из setup() не меняются)"""
+        seqs = np.random.SeedSequence(seed).spawn(len(self.stages))
+        for stage, seq in zip(self.stages, seqs):
+            stage.rng = np.random.default_rng(seq)
+
+    def step(self):
+        """Обновить покадровые параметры всех стадий"""
+        for stage in self.stages:
+            stage.step()
+
+    def frame_states(self):
+        return [stage.frame_state() for stage in self.stages]
+
+    def load_states(self, states):
+        for stage, state in zip(self.stages, states):
+            stage.load_state(state)
+
+    def process(self, frame, out=None, step=True):
+        """Прогнать кадр через все стадии.
+
+        out — куда записать результат вместо собственного буфера (например,
+        слот общей памяти); step=False — параметры кадра уже заданы через
+        load_states().
+        """
+        if frame.shape != self.in_shape:
+            self.setup(frame.shape)
+        src = frame
+        if self._input is not None:
+            np.copyto(self._input, frame)
+            src = self._input
+        tr = trace.tracer
+        ct = trace.counters
+        timed = tr is not None or ct is not None
+        last = len(self.stages) - 1
+        for i, (stage, dst) in enumerate(zip(self.stages, self.buffers)):
+            if step:
+                stage.step()
+            if i == last and out is not None:
+                if dst is src:
+                    # in-place стадия: работаем прямо в out
+                    np.copyto(out, src)
+                    src = out
+                dst = out
+            t0 = timed and time.perf_counter_ns()
+            if self.tiler is not None:
+                self.tiler.run(stage, src, dst)
+            else:
+                stage.process(src, dst)
+            if timed:
+                t1 = time.perf_counter_ns()
+                if tr is not None:
+                    tr.record(self.label(stage), t0, t1, self.frame_idx)
+                if ct is not None:
+                    ct.record(self.label(stage), t0, t1)
+            src = dst
+        if out is not None and not self.stages:
+            np.copyto(out, src)
+            src = out
+        self.frame_idx += 1
+        return src
+
+    def close(self):
+        """Остановить потоки полос (если были)"""
+        if self.tiler is not None:
+            self.tiler.close()
+            self.tiler = None
@@ -0,0 +1,229 @@
+"""Планировщик конвейера: дорогие стадии — в разрешении пикселизации.
+
+pixelate уменьшает кадр до down и увеличивает обратно ближайшим
+соседом, а все стадии после неё считаются в полном разрешении по кадру
+из одинаковых блоков sx x sy (масштаб по осям может быть разным:
+16x12 у 1280x720 при down 80x60). План переписывает список стадий:
+pixelate раскладывается на resize(down) и upscale(size), и стадии,
+которые можно выполнить до увеличения, переезжают на маленький кадр.
+jitter сразу после pixelate входит в upscale (сдвиг окна при увеличении).
+
+Режимы:
+  exact  — переезжают только стадии, перестановочные с увеличением
+           (поканальные таблицы, color_cast, temporal_mix): кадр тот же,
+           что без плана, бит в бит при тех же генераторах;
+  approx — кроме того, цепочка до ближайшего jpeg, если каждая стадия
+           умеет свой аналог в масштабе клеток 8x8 — блоков DCT этого
+           jpeg (Stage.block_scale): размытие — ядром по клеткам, шум —
+           средним по клетке (noise_dc), jpeg — квантованием DC
+           (jpeg_dc), блоковые искажения — по доле клетки под блоком.
+           Маленький кадр увеличивается со сдвигом jitter и усредняется
+           по клеткам (upscale с cell=8), так что клетка — ровно блок DCT
+           исходной цепочки при любом сдвиге; после jpeg_dc кадр
+           увеличивается в 8 раз, и узоры, которые JPEG оставляет от
+           шума, добавляет jpeg_grain. Переносится вся цепочка или
+           ничего: без jpeg, который стирает детали внутри клеток, такая
+           замена видна. Нужны блоки пикселизации не мельче клетки и
+           кадр из целых MCU 16x16. Известная разница: узоры шума лежат
+           и на блоковых искажениях, в исходной цепочке те гладкие.
+
+verify() сравнивает кадры плана с исходной цепочкой: без шума —
+попиксельно, шум — по энергии. approx укладывается в APPROX_TOLERANCE
+(within_tolerance), поэтому hard-пресеты идут с ним; время и разница
+по пресетам — benchmarks/bench_planner.py, он же проверяет допуски.
+"""
+
+import cv2
+import numpy as np
+
+from .base import create_stage
+
+MODES = ("none", "exact", "approx")
+CELL = 8    # блок DCT JPEG: в approx один пиксель цепочки — клетка 8x8 кадра
+# допуски approx против исходной цепочки (verify): PSNR без шума не ниже,
+# MAE по блокам pixelate не выше, энергия шума — в этих пределах
+APPROX_TOLERANCE = {"psnr": 26.0, "block_mae": 5.0, "noise": (0.85, 1.2)}
+
+
+def _pixelate_scale(stage):
+    """Целый масштаб блоков pixelate (sx, sy) или None"""
+    if stage.name != "pixelate" or stage.params["size"] is None:
+        return None
+    (dw, dh), (w, h) = stage.params["down"], stage.params["size"]
+    if w % dw or h % dh:
+        return None
+    return w // dw, h // dh
+
+
+def _cells_fit(scale, size):
+    """approx: блоки пикселизации не мельче клетки, кадр — из целых MCU 16x16"""
+    return min(scale) >= CELL and size[0] % (2 * CELL) == 0 and size[1] % (2 * CELL) == 0
+
+
+def _grain(stages, chain, size):
+    """Увеличение с узорами шума (jpeg_grain), если в цепочке approx шум идёт до jpeg; иначе None"""
+    names = {stages[j].name: j for j, _ in chain}
+    if "noise" not in names or "jpeg" not in names:
+        return None
+    p = stages[names["noise"]].params
+    return ("jpeg_grain", {"size": size, "sigma": p["sigma"], "shot": p["shot"],
+                           "quality": stages[names["jpeg"]].params["quality"], "tiles": p["tiles"]})
+
+
+def plan(spec, mode="exact"):
+    """Переписать [(имя, параметры), ...]; вернуть (план, origins).
+
+    origins[i] — номер стадии исходного списка, из которой получилась
+    i-я стадия плана. Если переставлять нечего, план — исходный список.
+    """
+    spec = [(name, dict(params)) for name, params in spec]
+    origins = list(range(len(spec)))
+    if mode in (None, "none"):
+        return spec, origins
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим плана: {mode}")
+    stages = [create_stage(name, **params) for name, params in spec]
+    out, out_origins = [], []
+    changed = False
+    i, n = 0, len(stages)
+    while i < n:
+        scale = _pixelate_scale(stages[i])
+        if scale is None:
+            out.append(spec[i])
+            out_origins.append(i)
+            i += 1
+            continue
+        p = stages[i].params
+        size = tuple(p["size"])
+        out.append(("resize", {"size": tuple(p["down"]), "interpolation": p["interpolation"]}))
+        out_origins.append(i)
+        shift, up_origin = 0, i
+        k = i + 1
+        if k < n and stages[k].name == "jitter":
+            shift = stages[k].params["max_shift"] or max(1, int(min(size) * 0.03))
+            up_origin = k
+            k += 1
+
+        moved = []
+        if mode == "approx" and _cells_fit(scale, size):
+            chain = []
+            for j in range(k, n):
+                replacement = stages[j].block_scale((CELL, CELL), size)
+                if replacement is None:
+                    break
+                chain.append((j, replacement))
+                if stages[j].name == "jpeg":
+                    moved, k = chain, j + 1
+                    break
+        cells = bool(moved)
+        grain = _grain(stages, moved, size)
+        if cells:
+            # сдвиг и усреднение по клеткам — до цепочки, увеличение в CELL раз — после
+            out.append(("upscale", {"size": size, "shift": shift, "cell": CELL}))
+            out_origins.append(up_origin)
+        # узоры шума (jpeg_grain) ложатся сразу за jpeg: стадии после него остаются на месте
+        while k < n and stages[k].upscale == "exact" and not grain:
+            moved.append((k, [spec[k]]))
+            k += 1
+
+        for j, replacement in moved:
+            out.extend(replacement)
+            out_origins.extend([j] * len(replacement))
+        if grain:
+            out.append(grain)
+            out_origins.append(next(j for j, _ in moved if stages[j].name == "noise"))
+        elif cells:
+            out.append(("upscale", {"size": size}))
+            out_origins.append(i)
+        else:
+            out.append(("upscale", {"size": size, "shift": shift}))
+            out_origins.append(up_origin)
+        changed = changed or bool(moved) or up_origin != i
+        i = k
+    if not changed:
+        return spec, origins
+    return out, out_origins
+
+
+def describe(spec, origins, source):
+    """Строки плана для вывода: стадия плана <- стадия исходного списка"""
+    rows = []
+    for (name, params), j in zip(spec, origins):
+        args = ", ".join(f"{k}={v}" for k, v in params.items())
+        rows.append(f"{name}({args})  <- {j}:{source[j][0]}")
+    return rows
+
+
+# ------------------ Проверка ------------------
+def _quiet(spec):
+    """Та же цепочка без шума матрицы (стадии остаются на местах — те же генераторы)"""
+    return [(n, {**p, "sigma": 0, "shot": 0.0}) if n == "noise" else (n, p) for n, p in spec]
+
+
+def _noise_std(spec, mode, frames, seed):
+    """СКО вклада шума в выходной кадр: цепочка с шумом минус та же без шума"""
+    from .pipeline import Pipeline
+
+    loud = Pipeline.from_spec(spec, seed=seed, fuse=False, plan=mode)
+    calm = Pipeline.from_spec(_quiet(spec), seed=seed, fuse=False, plan=mode)
+    return float(np.mean([np.std(loud.process(f).astype(np.float32) - calm.process(f).astype(np.float32))
+                          for f in frames]))
+
+
+def verify(spec, mode, frames, seed=0):
+    """Сравнить конвейер по плану с исходным на кадрах frames.
+
+    Обе цепочки собираются без слияния таблиц, генератор каждой стадии
+    плана — копия генератора её исходной стадии, так что случайные
+    параметры кадра (смещения, уровни, блоки) совпадают. Шум у approx —
+    другая выборка (по клеткам, noise_dc и jpeg_grain), попиксельно его
+    не сравнить: кадры сравниваются без шума, а шум — по энергии.
+    Возвращает средние по кадрам: MAE, максимум разницы, PSNR, MAE по
+    блокам (кадры, уменьшенные до сетки pixelate усреднением) и noise —
+    отношение СКО вклада шума в кадр плана к исходному (None без шума).
+    """
+    from .pipeline import Pipeline
+
+    quiet = _quiet(spec)
+    planned, origins = plan(quiet, mode)
+    ref = Pipeline.from_spec(quiet, seed=seed, fuse=False)
+    new = Pipeline.from_spec(planned, seed=seed, fuse=False)
+    ref.setup(frames[0].shape)
+    new.setup(frames[0].shape)
+    for stage, j in zip(new.stages, origins):
+        stage.rng = np.random.default_rng()
+        stage.rng.bit_generator.state = ref.stages[j].rng.bit_generator.state
+
+    grid = next((create_stage(n, **p).params["down"] for n, p in spec if n == "pixelate"), None)
+    mae, peak, psnr, block = [], 0, [], []
+    for frame in frames:
+        a = ref.process(frame).astype(np.int16)
+        b = new.process(frame).astype(np.int16)
+        diff = np.abs(a - b)
+        mae.append(diff.mean())
+        peak = max(peak, int(diff.max()))
+        mse = (diff.astype(np.float64) ** 2).mean()
+        psnr.append(99.0 if mse == 0 else 10 * np.log10(255.0 ** 2 / mse))
+        if grid is not None:
+            ga = cv2.resize(a.astype(np.float32), tuple(grid), interpolation=cv2.INTER_AREA)
+            gb = cv2.resize(b.astype(np.float32), tuple(grid), interpolation=cv2.INTER_AREA)
+            block.append(np.abs(ga - gb).mean())
+    noise = None
+    if quiet != spec:
+        noise = _noise_std(spec, mode, frames, seed) / _noise_std(spec, "none", frames, seed)
+    return {
+        "mae": round(float(np.mean(mae)), 3),
+        "max": peak,
+        "psnr": round(float(np.mean(psnr)), 2),
+        "block_mae": round(float(np.mean(block)), 3) if block else None,
+        "noise": round(noise, 3) if noise is not None else None,
+    }
+
+
+def within_tolerance(diff):
+    """Укладывается ли разница verify() в APPROX_TOLERANCE"""
+    t = APPROX_TOLERANCE
+    lo, hi = t["noise"]
+    return (diff["psnr"] >= t["psnr"]
+            and (diff["block_mae"] is None or diff["block_mae"] <= t["block_mae"])
+            and (diff["noise"] is None or lo <= diff["noise"] <= hi))
@@ -0,0 +1,131 @@
+"""Пресеты BadCam как данные.
+
+Пресет — словарь с разрешением, fps, выводом, списком стадий,
+режимом плана (planner.py) и таймингами (выпадение кадров, заморозки,
+подтормаживания).
+"""
+
+from .pipeline import Pipeline
+
+PRESETS = {
+    # Лёгкая версия: мыло, шум, JPEG
+    "a": {
+        "size": (320, 240), "fps": 10, "sink": "v4l2", "capture_size": None, "pace": False, "plan": "exact",
+        "stages": [
+            ("resize", {"size": (320, 240), "interpolation": "linear"}),
+            ("gaussian_blur", {"ksize": 3}),
+            ("noise", {"uniform": 50}),
+            ("jpeg", {"quality": 25}),
+        ],
+        "timing": {},
+    },
+    # Эмулятор дешёвой китайской камеры
+    "b": {
+        "size": (320, 240), "fps": 10, "sink": "v4l2", "capture_size": None, "pace": False, "plan": "exact",
+        "stages": [
+            ("resize", {"size": (320, 240), "interpolation": "area"}),
+            ("exposure_drift", {}),
+            ("vignette", {}),
+            ("noise", {"shot": 0.04, "sigma": 4}),
+            ("chroma_shift", {"max_shift": 1}),
+            ("rolling_shutter", {"motion_amount": 1.5, "phase_step": 0.03}),
+            ("jpeg", {"quality": 20}),
+            ("dead_pixels", {"density": 0.0008}),
+            ("posterize", {"levels": [32, 48, 64]}),
+            ("mains_flicker", {"depth": 0.03}),
+        ],
+        "timing": {"stall_chance": 0.03, "stall": (0.06, 0.18)},
+    },
+    # Пикселизация и плохой баланс белого
+    "bad": {
+        "size": (640, 480), "fps": 10, "sink": "v4l2", "capture_size": (640, 480), "pace": True, "plan": "exact",
+        "stages": [
+            ("gaussian_blur", {"ksize": 9, "sigma": 2}),
+            ("pixelate", {"down": (80, 60), "size": (640, 480), "interpolation": "linear"}),
+            ("noise", {"sigma": 50}),
+            ("color_cast", {}),
+        ],
+        "timing": {"stall_chance": 0.05, "stall": (0.2, 0.2)},
+    },
+}
+
+# пресеты агрессивного режима (configs/main.py): от 'bad' до 'nightmare'
+HARD_PRESETS = {
+    'bad': {
+        'down_res': (160, 120), 'pixelate_scale': 4, 'blur': 5, 'noise': 20,
+        'jpeg_q': 30, 'chroma': 1, 'poster': 32, 'scanlines': 0.06,
+        'blocks': 4, 'frame_drop': 0.02, 'freeze_chance': 0.005, 'temporal_mix': 0.06
+    },
+    'awful': {
+        'down_res': (120, 90), 'pixelate_scale': 6, 'blur': 9, 'noise': 35,
+        'jpeg_q': 15, 'chroma': 2, 'poster': 16, 'scanlines': 0.12,
+        'blocks': 8, 'frame_drop': 0.06, 'freeze_chance': 0.02, 'temporal_mix': 0.14
+    },
+    'horrible': {
+        'down_res': (80, 60), 'pixelate_scale': 8, 'blur': 13, 'noise': 55,
+        'jpeg_q': 8, 'chroma': 3, 'poster': 8, 'scanlines': 0.18,
+        'blocks': 14, 'frame_drop': 0.15, 'freeze_chance': 0.06, 'temporal_mix': 0.28
+    },
+    'nightmare': {
+        'down_res': (40, 30), 'pixelate_scale': 16, 'blur': 21, 'noise': 90,
+        'jpeg_q': 4, 'chroma': 4, 'poster': 4, 'scanlines': 0.28,
+        'blocks': 28, 'frame_drop': 0.35, 'freeze_chance': 0.18, 'temporal_mix': 0.45
+    }
+}
+
+
+def hard_preset(name, width=640, height=480, fps=10):
+    """Собрать пресет агрессивного режима под заданное разрешение"""
+    cfg = HARD_PRESETS.get(name, HARD_PRESETS['horrible'])
+    stages = [
+        ("pixelate", {"down": cfg['down_res'], "size": (width, height), "interpolation": "linear"}),
+        ("jitter", {}),
+        ("gaussian_blur", {"ksize": cfg['blur']}),
+        ("posterize", {"levels": cfg['poster']}),
+    ]
+    if cfg['chroma'] > 1:
+        stages.append(("chroma_subsample", {"factor": cfg['chroma']}))
+    if cfg['noise'] > 0:
+        stages.append(("noise", {"sigma": cfg['noise']}))
+    if cfg['blocks'] > 0:
+        stages.append(("block_noise", {"blocks": cfg['blocks'], "max_size": max(16, width // 8)}))
+    stages.append(("jpeg", {"quality": cfg['jpeg_q']}))
+    stages.append(("scanlines", {"strength": cfg['scanlines'], "period": 2}))
+    if cfg['temporal_mix'] > 0:
+        stages.append(("temporal_mix", {"mix": cfg['temporal_mix']}))
+    return {
+        "size": (width, height), "fps": fps, "sink": "v4l2",
+        "capture_size": (width, height), "pace": True,
+        # дорогие стадии — на кадре клеток 8x8; разница с исходной цепочкой
+        # в пределах planner.APPROX_TOLERANCE (bench_planner)
+        "plan": "approx",
+        "stages": stages,
+        "timing": {"frame_drop": cfg['frame_drop'], "freeze_chance": cfg['freeze_chance'],
+                   "freeze": (0.2, 2.5)},
+    }
+
+
+def get_preset(name, width=None, height=None, fps=None):
+    """Пресет по имени: 'a', 'b', 'bad' или 'hard-<bad|awful|horrible|nightmare>'"""
+    if name.startswith("hard-"):
+        w, h = width or 640, height or 480
+        return hard_preset(name[len("hard-"):], w, h, fps or 10)
+    try:
+        preset = dict(PRESETS[name])
+    except KeyError:
+        raise KeyError(f"Неизвестный пресет: {name}") from None
+    if fps:
+        preset["fps"] = fps
+    return preset
+
+
+def preset_names():
+    return list(PRESETS) + [f"hard-{n}" for n in HARD_PRESETS]
+
+
+def build_pipeline(preset, seed=None, fuse=True, tiles=0):
+    """Собрать конвейер стадий из пресета (имя или словарь)"""
+    if isinstance(preset, str):
+        preset = get_preset(preset)
+    return Pipeline.from_spec(preset["stages"], seed=seed, fuse=fuse, tiles=tiles, plan=preset.get("plan"),
+                              fmt=preset.get("fmt", "bgr"))
@@ -0,0 +1,1077 @@
+import math
+import time
+
+import cv2
+import numpy as np
+
+from .base import PointwiseStage, Stage, register_stage
+from .noise import UNIT, NoiseSource, add_saturating, clipped_stats
+from .yuv import (colors, frame_format, frame_shape, frame_size, from_bgr, is_i420, luma, plane_scales,
+                  plane_shapes, planes, resize_frame, to_bgr)
+
+INTERPOLATIONS = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "area": cv2.INTER_AREA,
+    "cubic": cv2.INTER_CUBIC,
+}
+
+
+# ------------------ Геометрия ------------------
+@register_stage
+class Resize(Stage):
+    """Приведение кадра к заданному разрешению"""
+
+    name = "resize"
+    formats = ("bgr", "i420")
+    defaults = {"size": (320, 240), "interpolation": "linear"}
+
+    def output_shape(self, in_shape):
+        w, h = self.params["size"]
+        return frame_shape(in_shape, w, h)
+
+    def input_size(self):
+        return tuple(self.params["size"])
+
+    def process(self, src, dst):
+        resize_frame(src, dst, INTERPOLATIONS[self.params["interpolation"]])
+
+
+@register_stage
+class Pixelate(Stage):
+    """Сильное уменьшение разрешения и возврат обратно ближайшим соседом"""
+
+    name = "pixelate"
+    formats = ("bgr", "i420")
+    defaults = {"down": (80, 60), "size": None, "interpolation": "linear"}
+
+    def output_shape(self, in_shape):
+        if self.params["size"] is None:
+            return in_shape
+        w, h = self.params["size"]
+        return frame_shape(in_shape, w, h)
+
+    def input_size(self):
+        # без size выход — в разрешении входа, и входу уменьшаться нельзя
+        return tuple(self.params["down"]) if self.params["size"] is not None else None
+
+    def prepare(self):
+        dw, dh = self.params["down"]
+        self._small = np.empty(frame_shape(self.in_shape, dw, dh), np.uint8)
+
+    def process(self, src, dst):
+        resize_frame(src, self._small, INTERPOLATIONS[self.params["interpolation"]])
+        resize_frame(self._small, dst, cv2.INTER_NEAREST)
+
+
+@register_stage
+class Jitter(Stage):
+    """Геометрический джиттер: случайное смещение всего кадра"""
+
+    name = "jitter"
+    state_attrs = ("_M",)
+    tileable = True
+    formats = ("bgr", "i420")
+    defaults = {"max_shift": None}
+
+    def prepare(self):
+        w, h = frame_size(self.in_shape)
+        self._max_shift = self.params["max_shift"] or max(1, int(min(w, h) * 0.03))
+        self._M = np.zeros((2, 3), np.float32)
+        self._M[0, 0] = self._M[1, 1] = 1
+        self._Mc = self._M.copy()   # для цветности I420: сдвиг вдвое меньше, вниз до целого
+
+    def halo(self):
+        return self._max_shift
+
+    def step(self):
+        dx, dy = self.rng.integers(-self._max_shift, self._max_shift + 1, 2)
+        self._M[0, 2] = dx
+        self._M[1, 2] = dy
+
+    def process(self, src, dst):
+        for s, d, k in zip(planes(src), planes(dst), plane_scales(src.shape)):
+            M = self._M
+            if k > 1:
+                M = self._Mc
+                np.floor_divide(self._M[:, 2], k, out=M[:, 2])
+            h, w = s.shape[:2]
+            cv2.warpAffine(s, M, (w, h), dst=d, borderMode=cv2.BORDER_REPLICATE)
+
+
+@register_stage
+class Upscale(Stage):
+    """Увеличение ближайшим соседом в целое число раз, со сдвигом как у jitter.
+
+    Заменяет вторую половину pixelate (и следующий за ней jitter) в
+    плане конвейера (planner.py): стадии между уменьшением и увеличением
+    считаются на маленьком кадре. shift — наибольший сдвиг кадра в
+    пикселях выхода, смещение берётся из генератора так же, как у jitter,
+    и даёт тот же кадр: маленький кадр дополняется повтором краёв на
+    нужное число блоков, увеличивается и из него вырезается окно.
+
+    cell > 1 — выход в cell раз меньше size: каждый пиксель — среднее
+    клетки cell x cell увеличенного кадра (план approx: клетка — блок DCT
+    JPEG, и сдвиг не обязан быть кратен блоку). Клетка не больше блока,
+    так что задевает не больше двух блоков по каждой оси: выход — их
+    смесь по долям, полный кадр не собирается.
+    """
+
+    name = "upscale"
+    state_attrs = ("_shift",)
+    formats = ("bgr", "i420")
+    defaults = {"size": (640, 480), "shift": 0, "cell": 1}
+
+    def output_shape(self, in_shape):
+        w, h = self.params["size"]
+        c = self.params["cell"]
+        return frame_shape(in_shape, w // c, h // c)
+
+    def prepare(self):
+        w, h = frame_size(self.in_shape)
+        ow, oh = self.params["size"]
+        c = self.params["cell"]
+        if ow % w or oh % h or ow % c or oh % c:
+            raise ValueError(f"upscale: {w}x{h} -> {ow}x{oh} (клетка {c}) — не целое число раз")
+        self._scale = sx, sy = (ow // w, oh // h)
+        self._shift = (0, 0)
+        if c > 1:
+            if c > min(sx, sy):
+                raise ValueError(f"upscale: клетка {c} больше блока {sx}x{sy}")
+            # на плоскость: маленький кадр во float, смесь по строкам, смесь по столбцам и запас
+            self._cells = []
+            for shape, out in zip(plane_shapes(self.in_shape), plane_shapes(self.out_shape)):
+                rows = (out[0],) + shape[1:]
+                self._cells.append((np.empty(shape, np.float32), np.empty(rows, np.float32),
+                                    np.empty(rows, np.float32), np.empty(out, np.float32),
+                                    np.empty(out, np.float32)))
+            return
+        # на плоскость: (во сколько раз меньше кадра, запас в блоках по x и y, буферы)
+        self._planes = []
+        m = self.params["shift"]
+        if not m:
+            return
+        for shape, k in zip(plane_shapes(self.in_shape), plane_scales(self.in_shape)):
+            mk = -(-m // k)
+            px, py = -(-mk // sx), -(-mk // sy)
+            ph, pw = shape[0] + 2 * py, shape[1] + 2 * px
+            padded = np.empty((ph, pw) + shape[2:], np.uint8)
+            big = np.empty((ph * sy, pw * sx) + shape[2:], np.uint8)
+            self._planes.append((k, px, py, padded, big))
+
+    def step(self):
+        m = self.params["shift"]
+        if m:
+            dx, dy = self.rng.integers(-m, m + 1, 2)
+            self._shift = (int(dx), int(dy))
+
+    def process(self, src, dst):
+        if self.params["cell"] > 1:
+            self.process_cells(src, dst)
+            return
+        if not self.params["shift"]:
+            resize_frame(src, dst, cv2.INTER_NEAREST)
+            return
+        sx, sy = self._scale
+        dx, dy = self._shift
+        for s, d, (k, px, py, padded, big) in zip(planes(src), planes(dst), self._planes):
+            cv2.copyMakeBorder(s, py, py, px, px, cv2.BORDER_REPLICATE, dst=padded)
+            cv2.resize(padded, (big.shape[1], big.shape[0]), dst=big, interpolation=cv2.INTER_NEAREST)
+            # jitter: dst(x, y) = src(x - dx, y - dy), у цветности I420 — сдвиг dx // 2
+            x0, y0 = px * sx - dx // k, py * sy - dy // k
+            np.copyto(d, big[y0:y0 + d.shape[0], x0:x0 + d.shape[1]])
+
+    def process_cells(self, src, dst):
+        c = self.params["cell"]
+        sx, sy = self._scale
+        dx, dy = self._shift
+        for s, d, k, (sf, rows, rows2, out, out2) in zip(planes(src), planes(dst), plane_scales(src.shape),
+                                                         self._cells):
+            np.copyto(sf, s)
+            # по строкам: клетка i — смесь блоков y0[i] и y1[i] с долей второго wy[i]
+            y0, y1, wy = cell_blocks(d.shape[0], c, sy, dy // k, s.shape[0])
+            np.take(sf, y0, axis=0, out=rows, mode="clip")
+            np.take(sf, y1, axis=0, out=rows2, mode="clip")
+            rows2 -= rows
+            rows2 *= wy.reshape((-1,) + (1,) * (rows.ndim - 1))
+            rows += rows2
+            x0, x1, wx = cell_blocks(d.shape[1], c, sx, dx // k, s.shape[1])
+            np.take(rows, x0, axis=1, out=out, mode="clip")
+            np.take(rows, x1, axis=1, out=out2, mode="clip")
+            out2 -= out
+            out2 *= wx.reshape((1, -1) + (1,) * (out.ndim - 2))
+            out += out2
+            np.rint(out, out=out)
+            np.copyto(d, out, casting="unsafe")
+
+
+def cell_blocks(n, cell, scale, shift, count):
+    """Клетки 0..n-1 увеличенного в scale раз и сдвинутого на shift ряда из count блоков.
+
+    Возвращает номера первого и второго блока под каждой клеткой (с
+    повтором крайних) и долю второго. cell <= scale.
+    """
+    start = np.arange(n) * cell - shift
+    first = np.floor_divide(start, scale)
+    part = np.clip((start + cell - (first + 1) * scale) / cell, 0, 1).astype(np.float32)
+    return np.clip(first, 0, count - 1), np.clip(first + 1, 0, count - 1), part
+
+
+@register_stage
+class RollingShutter(Stage):
+    """Перекос строк, как у дешёвой CMOS-матрицы.
+
+    Сдвиг строки y: int(((y/h)-0.5)*m + sin(phase + y*0.1)*(m*0.2)),
+    строка сдвигается вправо/влево с повтором крайнего пикселя.
+    Линейная часть считается один раз на разрешение, каждый кадр
+    пересчитывается только синусоида (h значений). Сдвиг меняется плавно,
+    поэтому строки с одинаковым сдвигом идут полосами: каждая полоса
+    копируется одним срезом, а не построчно.
+    """
+
+    name = "rolling_shutter"
+    state_attrs = ("phase",)
+    live_params = ("phase_step",)
+    defaults = {"motion_amount": 2.0, "phase_step": 0.03}
+
+    def prepare(self):
+        h = self.in_shape[0]
+        ys = np.arange(h)
+        self._skew = ((ys / h) - 0.5) * self.params["motion_amount"]
+        self._arg = ys * 0.1
+        self._wave = np.empty(h)
+        self._shift = None
+        self._bands = []
+        self.phase = -self.params["phase_step"]
+
+    def step(self):
+        self.phase += self.params["phase_step"]
+
+    def shifts(self):
+        """Целые сдвиги строк для текущей фазы"""
+        wave = self._wave
+        np.add(self._arg, self.phase, out=wave)
+        np.sin(wave, out=wave)
+        wave *= self.params["motion_amount"] * 0.2
+        wave += self._skew
+        return wave.astype(np.int32)
+
+    def bands(self):
+        """Полосы (начало, конец, сдвиг); пересчитываются только при смене сдвигов"""
+        shift = self.shifts()
+        if self._shift is None or not np.array_equal(shift, self._shift):
+            edges = np.flatnonzero(np.diff(shift)) + 1
+            starts = [0] + edges.tolist()
+            ends = edges.tolist() + [len(shift)]
+            self._bands = [(a, b, int(shift[a])) for a, b in zip(starts, ends)]
+            self._shift = shift
+        return self._bands
+
+    def process(self, src, dst):
+        w = src.shape[1]
+        for a, b, s in self.bands():
+            if s >= w or s <= -w:
+                # сдвиг шире кадра: вся строка — крайний пиксель
+                dst[a:b] = src[a:b, :1] if s > 0 else src[a:b, -1:]
+            elif s > 0:
+                dst[a:b, s:] = src[a:b, :-s]
+                dst[a:b, :s] = src[a:b, :1]
+            elif s < 0:
+                dst[a:b, :s] = src[a:b, -s:]
+                dst[a:b, s:] = src[a:b, -1:]
+            else:
+                dst[a:b] = src[a:b]
+
+
+# ------------------ Оптика ------------------
+@register_stage
+class GaussianBlur(Stage):
+    """Мыльная линза"""
+
+    name = "gaussian_blur"
+    tileable = True
+    formats = ("bgr", "i420")
+    live_params = ("ksize", "sigma")
+    defaults = {"ksize": 3, "sigma": 0}
+
+    def ksize(self):
+        k = self.params["ksize"]
+        return k + 1 if k % 2 == 0 else k
+
+    def halo(self):
+        return self.ksize() // 2
+
+    def block_scale(self, scale, size):
+        k = self.ksize()
+        if k <= 1:
+            return []
+        kernel = cv2.getGaussianKernel(k, self.params["sigma"]).ravel()
+        sx, sy = scale
+        return [("filter", {"kernel": block_kernel(kernel, sx), "kernel_y": block_kernel(kernel, sy)})]
+
+    def process(self, src, dst):
+        src, dst = luma(src, dst)
+        k = self.ksize()
+        if k > 1:
+            cv2.GaussianBlur(src, (k, k), self.params["sigma"], dst=dst)
+        else:
+            np.copyto(dst, src)
+
+
+def block_kernel(kernel, scale):
+    """Одномерное ядро в масштабе блоков: сколько каждый соседний блок даёт блоку в среднем"""
+    m = -(-(len(kernel) // 2) // scale)   # блоков, которые задевает ядро, в каждую сторону
+    line = np.zeros((2 * m + 1) * scale)
+    line[m * scale:(m + 1) * scale] = 1
+    response = np.convolve(line, kernel, mode="same")
+    return tuple(response.reshape(2 * m + 1, scale).mean(axis=1).tolist())
+
+
+@register_stage
+class Filter(Stage):
+    """Разделимый фильтр с заданными одномерными ядрами: kernel по строкам, kernel_y по столбцам (None — тот же)"""
+
+    name = "filter"
+    tileable = True
+    formats = ("bgr", "i420")
+    defaults = {"kernel": (0.25, 0.5, 0.25), "kernel_y": None}
+
+    def prepare(self):
+        self._kernel = np.array(self.params["kernel"], np.float32)
+        ky = self.params["kernel_y"]
+        self._kernel_y = self._kernel if ky is None else np.array(ky, np.float32)
+
+    def halo(self):
+        return len(self.params["kernel_y"] or self.params["kernel"]) // 2   # по строкам режет только ядро по столбцам
+
+    def process(self, src, dst):
+        src, dst = luma(src, dst)
+        cv2.sepFilter2D(src, -1, self._kernel, self._kernel_y, dst=dst)
+
+
+@register_stage
+class Vignette(Stage):
+    """Затемнение к краям кадра"""
+
+    name = "vignette"
+    tileable = True
+    defaults = {"strength": 0.9, "floor": 0.3}
+
+    def prepare(self):
+        h, w = self.in_shape[:2]
+        xx, yy = np.meshgrid(np.linspace(-1, 1, w), np.linspace(-1, 1, h))
+        mask = np.clip(1.0 - (xx ** 2 + yy ** 2) * self.params["strength"], self.params["floor"], 1.0)
+        self._mask = mask.astype(np.float32)[..., None]
+        self._f = np.empty(self.in_shape, np.float32)
+
+    def process(self, src, dst):
+        self.process_rows(src, dst, 0, src.shape[0])
+
+    def process_rows(self, src, dst, y0, y1):
+        f = self._f[y0:y1]
+        # uint8 * float32 в один проход numpy считал бы через свои временные буферы
+        np.copyto(f, src[y0:y1], casting="unsafe")
+        np.multiply(f, self._mask[y0:y1], out=f)
+        np.copyto(dst[y0:y1], f, casting="unsafe")
+
+
+# ------------------ Сенсор ------------------
+def noise_sigma(sigma, shot):
+    """СКО шума по яркости I = 0..255: дробовой + чтения, sqrt((shot*(127.5 + I))^2 + sigma^2)"""
+    return np.sqrt((shot * (127.5 + np.arange(256))) ** 2 + sigma ** 2)
+
+
+@register_stage
+class Noise(Stage):
+    """Шум матрицы.
+
+    uniform — положительный равномерный шум [0, uniform) как в a.py,
+    shot — шум, зависящий от яркости, sigma — гауссов шум чтения.
+    mode='bank' берёт шум из заранее сгенерированных тайлов int16,
+    mode='random' генерирует его каждый кадр генератором стадии (PCG64)
+    в готовые буферы.
+    Для shot-шума sigma(I) берётся из таблицы по яркости пикселя.
+    """
+
+    name = "noise"
+    tileable = True
+    formats = ("bgr", "i420")
+    defaults = {"sigma": 0, "shot": 0.0, "uniform": 0, "mode": "bank", "tiles": 2}
+
+    def prepare(self):
+        p = self.params
+        shape = plane_shapes(self.in_shape)[0]   # у I420 — шум только яркости
+        kw = {"mode": p["mode"], "tiles": p["tiles"]}
+        self._source = None
+        self._gain_lut = None
+        if p["uniform"]:
+            self._source = NoiseSource(shape, "uniform", p["uniform"], **kw)
+        elif p["shot"]:
+            sigma = noise_sigma(p["sigma"], p["shot"])
+            self._gain_scale = 255.0 / sigma.max()
+            self._gain_lut = np.rint(sigma * self._gain_scale).astype(np.uint8)
+            self._gain = np.empty(shape, np.uint8)
+            self._field = np.empty(shape, np.int16)
+            self._source = NoiseSource(shape, "gaussian", UNIT, **kw)
+        elif p["sigma"]:
+            self._source = NoiseSource(shape, "gaussian", p["sigma"], **kw)
+
+    def block_scale(self, scale, size):
+        p = self.params
+        if p["uniform"]:
+            return None
+        return [("noise_dc", {"sigma": p["sigma"], "shot": p["shot"], "cell": tuple(scale),
+                              "mode": p["mode"], "tiles": p["tiles"]})]
+
+    def begin_frame(self):
+        self._noise = self._source.next(self.rng) if self._source is not None else None
+
+    def process(self, src, dst):
+        src, dst = luma(src, dst)
+        self.begin_frame()
+        self.process_rows(src, dst, 0, src.shape[0])
+
+    def process_rows(self, src, dst, y0, y1):
+        src, dst = src[y0:y1], dst[y0:y1]
+        if self._noise is None:
+            np.copyto(dst, src)
+            return
+        noise = self._noise[y0:y1]
+        if self._gain_lut is not None:
+            gain, field = self._gain[y0:y1], self._field[y0:y1]
+            cv2.LUT(src, self._gain_lut, dst=gain)
+            cv2.multiply(noise, gain, dst=field,
+                         scale=1.0 / (UNIT * self._gain_scale), dtype=cv2.CV_16S)
+            noise = field
+        add_saturating(src, noise, dst)
+
+
+@register_stage
+class NoiseDC(Stage):
+    """Шум матрицы в масштабе блоков: один пиксель — среднее клетки cell=(cx, cy) зашумлённых пикселей.
+
+    Замена noise в плане approx (planner.py): от шума после JPEG низкого
+    качества остаётся DC блоков 8x8, то есть среднее clip(v + n) по
+    блоку. Насыщение сдвигает это среднее к середине — на сильном шуме
+    это заметнее самого шума. Матожидание и СКО clip(v + n) для каждого v
+    считаются в prepare() (noise.clipped_stats), каждый кадр — две
+    таблицы и гауссово поле с СКО в sqrt(cx * cy) раз меньше.
+    """
+
+    name = "noise_dc"
+    formats = ("bgr", "i420")
+    defaults = {"sigma": 0, "shot": 0.0, "cell": (8, 8), "mode": "bank", "tiles": 2}
+
+    def prepare(self):
+        p = self.params
+        shape = plane_shapes(self.in_shape)[0]   # у I420 — шум только яркости
+        self._source = None
+        if not p["sigma"] and not p["shot"]:
+            return
+        mean, std = clipped_stats(noise_sigma(p["sigma"], p["shot"]))
+        self._mean_lut = mean.astype(np.float32)
+        self._std_lut = (std / math.sqrt(p["cell"][0] * p["cell"][1])).astype(np.float32)
+        self._mean = np.empty(shape, np.float32)
+        self._std = np.empty(shape, np.float32)
+        self._field = np.empty(shape, np.float32)
+        self._source = NoiseSource(shape, "gaussian", UNIT, mode=p["mode"], tiles=p["tiles"])
+
+    def process(self, src, dst):
+        src, dst = luma(src, dst)
+        if self._source is None:
+            np.copyto(dst, src)
+            return
+        noise = self._source.next(self.rng).reshape(self._field.shape)
+        cv2.LUT(src, self._mean_lut, dst=self._mean)
+        cv2.LUT(src, self._std_lut, dst=self._std)
+        cv2.multiply(noise, self._std, dst=self._field, scale=1.0 / UNIT, dtype=cv2.CV_32F)
+        cv2.add(self._mean, self._field, dst=dst, dtype=cv2.CV_8U)
+
+
+@register_stage
+class DeadPixels(Stage):
+    """Битые пиксели: фиксированная карта, случайный цвет каждый кадр.
+
+    Карта хранится плоскими индексами пикселей, все битые пиксели
+    записываются одной индексной записью прямо в рабочий буфер.
+    """
+
+    name = "dead_pixels"
+    inplace = True
+    defaults = {"density": 0.0008}
+
+    def prepare(self):
+        h, w = self.in_shape[:2]
+        count = max(1, int(w * h * self.params["density"]))
+        self._flat = np.unique(self.rng.integers(0, w * h, count))
+
+    def process(self, src, dst):
+        if dst is not src:
+            np.copyto(dst, src)
+        h, w = dst.shape[:2]
+        colors = self.rng.integers(0, 256, (len(self._flat), dst.shape[2]), dtype=np.uint8)
+        dst.reshape(h * w, -1)[self._flat] = colors
+
+
+@register_stage
+class ExposureDrift(PointwiseStage):
+    """Плавающие автоэкспозиция и баланс белого"""
+
+    name = "exposure_drift"
+    state_attrs = ("gains",)
+    defaults = {}
+
+    def __init__(self, **params):
+        super().__init__(**params)
+        self.ae_phase = None
+        self.awb_phase = None
+
+    def prepare(self):
+        if self.ae_phase is None:
+            self.ae_phase = self.rng.random() * 10.0
+            self.awb_phase = self.rng.random() * 10.0
+        self.gains = np.ones(3, np.float32)
+
+    def step(self):
+        self.ae_phase += 0.02 + self.rng.uniform(-0.005, 0.01)
+        self.awb_phase += 0.015 + self.rng.uniform(-0.004, 0.008)
+        ae_gain = 0.85 + 0.3 * math.sin(self.ae_phase)
+        self.gains[0] = (0.9 + 0.2 * math.sin(self.awb_phase + 0.5)) * ae_gain
+        self.gains[1] = (1.0 + 0.08 * math.sin(self.awb_phase + 1.1)) * ae_gain
+        self.gains[2] = (0.85 + 0.18 * math.sin(self.awb_phase - 0.7)) * ae_gain
+
+    def lut_key(self):
+        return tuple(self.gains.tolist())
+
+    def table(self):
+        t = np.arange(256, dtype=np.float32)[:, None] * self.gains
+        return np.clip(t, 0, 255).astype(np.uint8)
+
+
+@register_stage
+class MainsFlicker(PointwiseStage):
+    """Мерцание ламп на частоте сети"""
+
+    name = "mains_flicker"
+    formats = ("bgr", "i420")
+    state_attrs = ("gain",)
+    live_params = ("depth",)
+    defaults = {"depth": 0.03, "freq": None}
+
+    def prepare(self):
+        self.freq = self.params["freq"] or (50 if self.rng.random() < 0.5 else 60)
+        self.gain = 1.0
+
+    def step(self):
+        t = time.time()
+        self.gain = 1.0 + self.params["depth"] * math.sin(2 * math.pi * self.freq * t)
+
+    def lut_key(self):
+        return self.gain
+
+    def table(self):
+        t = np.arange(256, dtype=np.float32) * np.float32(self.gain)
+        t = np.clip(t, 0, 255).astype(np.uint8)
+        return np.repeat(t[:, None], self.channels(), axis=1)
+
+
+# ------------------ Цвет ------------------
+@register_stage
+class Posterize(PointwiseStage):
+    """Уменьшение глубины цвета; levels — число или список для случайного выбора"""
+
+    name = "posterize"
+    formats = ("bgr", "i420")
+    state_attrs = ("levels",)
+    defaults = {"levels": 8}
+
+    def prepare(self):
+        self.levels = self._pick()
+
+    def _pick(self):
+        levels = self.params["levels"]
+        if isinstance(levels, (list, tuple)):
+            return int(self.rng.choice(levels))
+        return int(levels)
+
+    def step(self):
+        self.levels = self._pick()
+
+    def lut_key(self):
+        return self.levels
+
+    def table(self):
+        div = 256 // max(1, self.levels)
+        t = (np.arange(256) // div * div).astype(np.uint8)
+        return np.repeat(t[:, None], self.channels(), axis=1)
+
+
+@register_stage
+class Contrast(PointwiseStage):
+    """Контраст и яркость вокруг середины шкалы: (v - 128) * alpha + 128 + beta"""
+
+    name = "contrast"
+    defaults = {"alpha": 1.0, "beta": 0}
+
+    def lut_key(self):
+        return (self.params["alpha"], self.params["beta"])
+
+    def table(self):
+        t = (np.arange(256) - 128.0) * self.params["alpha"] + 128.0 + self.params["beta"]
+        t = np.clip(np.rint(t), 0, 255).astype(np.uint8)
+        return np.repeat(t[:, None], self.channels(), axis=1)
+
+
+@register_stage
+class ChromaSubsample(Stage):
+    """Потеря цветовой детализации: Cr/Cb в пониженном разрешении.
+
+    У I420 цветность и так в половинном разрешении: её плоскости
+    уменьшаются прямо, без перевода цвета; factor <= 2 ничего не меняет.
+    """
+
+    name = "chroma_subsample"
+    formats = ("bgr", "i420")
+    defaults = {"factor": 2}
+
+    def prepare(self):
+        w, h = frame_size(self.in_shape)
+        f = self.params["factor"]
+        if not is_i420(self.in_shape):
+            self._ycrcb = np.empty(self.in_shape, np.uint8)
+            self._plane = np.empty((h, w), np.uint8)
+        self._small = np.empty((max(1, h // f), max(1, w // f)), np.uint8)
+
+    def block_scale(self, scale, size):
+        f = self.params["factor"]
+        sx, sy = scale
+        if f <= min(sx, sy):
+            return []   # цветность и так одна на блок
+        if sx != sy:
+            return None   # factor один на обе оси
+        return [(self.name, {"factor": round(f / sx)})]
+
+    def process(self, src, dst):
+        f = self.params["factor"]
+        if f <= 1 or (f <= 2 and is_i420(src.shape)):
+            np.copyto(dst, src)
+            return
+        small = self._small
+        if is_i420(src.shape):
+            y, u, v = planes(src)
+            dy, du, dv = planes(dst)
+            np.copyto(dy, y)
+            for plane, out in ((u, du), (v, dv)):
+                cv2.resize(plane, (small.shape[1], small.shape[0]), dst=small, interpolation=cv2.INTER_LINEAR)
+                cv2.resize(small, (out.shape[1], out.shape[0]), dst=out, interpolation=cv2.INTER_NEAREST)
+            return
+        plane = self._plane
+        cv2.cvtColor(src, cv2.COLOR_BGR2YCrCb, dst=self._ycrcb)
+        for c in (1, 2):
+            np.copyto(plane, self._ycrcb[..., c])
+            cv2.resize(plane, (small.shape[1], small.shape[0]), dst=small,
+                       interpolation=cv2.INTER_LINEAR)
+            cv2.resize(small, (plane.shape[1], plane.shape[0]), dst=plane, interpolation=cv2.INTER_NEAREST)
+            self._ycrcb[..., c] = plane
+        cv2.cvtColor(self._ycrcb, cv2.COLOR_YCrCb2BGR, dst=dst)
+
+
+@register_stage
+class ChromaShift(Stage):
+    """Случайный сдвиг синего и красного каналов"""
+
+    name = "chroma_shift"
+    live_params = ("max_shift",)
+    defaults = {"max_shift": 1}
+
+    def prepare(self):
+        h, w = self.in_shape[:2]
+        self._planes = [np.empty((h, w), np.uint8) for _ in range(3)]
+        self._shifted = [np.empty((h, w), np.uint8) for _ in range(2)]
+        self._M = np.float32([[1, 0, 0], [0, 1, 0]])
+
+    def process(self, src, dst):
+        m = self.params["max_shift"]
+        b, g, r = self._planes
+        for c, plane in enumerate(self._planes):
+            np.copyto(plane, src[..., c])
+        h, w = b.shape
+        M = self._M
+        for ch, out in zip((b, r), self._shifted):
+            M[:, 2] = self.rng.integers(-m, m + 1, 2)
+            cv2.warpAffine(ch, M, (w, h), dst=out, borderMode=cv2.BORDER_REFLECT)
+        cv2.merge([self._shifted[0], g, self._shifted[1]], dst=dst)
+
+
+@register_stage
+class ColorCast(Stage):
+    """Плохая цветопередача: перебор зелёного, красный уходит в синеву"""
+
+    name = "color_cast"
+    tileable = True
+    upscale = "exact"
+    defaults = {"matrix": ((1.0, 0.0, 0.0),
+                           (0.0, 1.2, -0.1),
+                           (0.2, 0.0, 0.8))}
+
+    def prepare(self):
+        self._M = np.array(self.params["matrix"], np.float32)
+
+    def process(self, src, dst):
+        cv2.transform(src, self._M, dst=dst)
+
+
+@register_stage
+class Convert(Stage):
+    """Перевод кадра между BGR и I420.
+
+    Конвейер вставляет его перед стадиями, которые не умеют текущий
+    формат кадра (см. pipeline.build_stages), в пресетах он не нужен.
+    """
+
+    name = "convert"
+    formats = ("bgr", "i420")
+    defaults = {"to": "bgr"}
+
+    def output_shape(self, in_shape):
+        w, h = frame_size(in_shape)
+        return (h * 3 // 2, w) if self.params["to"] == "i420" else (h, w, 3)
+
+    def process(self, src, dst):
+        if frame_format(src.shape) == self.params["to"]:
+            np.copyto(dst, src)
+        elif self.params["to"] == "i420":
+            from_bgr(src, dst)
+        else:
+            to_bgr(src, dst)
+
+
+# ------------------ Артефакты ------------------
+@register_stage
+class Jpeg(Stage):
+    """Артефакты сжатия JPEG"""
+
+    name = "jpeg"
+    tileable = True
+    formats = ("bgr", "i420")
+    allocates = True  # imdecode не пишет в готовый буфер; без аллокаций — jpeg_dc (план approx)
+    tile_align = 16   # MCU 16x16 при 4:2:0
+    live_params = ("quality",)
+    defaults = {"quality": 20}
+
+    def halo(self):
+        return 16
+
+    def block_scale(self, scale, size):
+        sx, sy = scale
+        if sx % 8 or sy % 8:
+            return None   # блок DCT не лежит в одном блоке пикселизации
+        chroma_block = (max(1, 16 // sx), max(1, 16 // sy))
+        return [("jpeg_dc", {"quality": self.params["quality"], "chroma_block": chroma_block})]
+
+    def process(self, src, dst):
+        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), int(self.params["quality"])]
+        if is_i420(src.shape):
+            # плоскости — отдельными картинками, как компоненты JPEG 4:2:0 (без перевода цвета)
+            for s, d in zip(planes(src), planes(dst)):
+                _, enc = cv2.imencode(".jpg", s, encode_param)
+                np.copyto(d, cv2.imdecode(enc, cv2.IMREAD_GRAYSCALE))
+            return
+        _, enc = cv2.imencode(".jpg", src, encode_param)
+        np.copyto(dst, cv2.imdecode(enc, cv2.IMREAD_COLOR))
+
+
+def jpeg_dc_step(quality, base):
+    """Шаг квантования DC-коэффициента в libjpeg для quality (base: 16 — яркость, 17 — цвет)"""
+    q = min(100, max(1, int(quality)))
+    scale = 5000 // q if q < 50 else 200 - 2 * q
+    return min(255, max(1, (base * scale + 50) // 100))
+
+
+@register_stage
+class JpegDC(Stage):
+    """JPEG в масштабе блоков: один пиксель — целый блок DCT 8x8.
+
+    У однотонного блока есть только DC-коэффициент (8 * (v - 128)), и
+    сжатие сводится к квантованию яркости шагом DC из таблиц libjpeg.
+    Цветность 4:2:0 ещё и усредняется по блокам chroma_block пикселей
+    (число или (по x, по y); блок DCT цветности — 16x16 пикселей
+    исходного кадра).
+    У I420 цветность уже усреднена по 2x2.
+    """
+
+    name = "jpeg_dc"
+    formats = ("bgr", "i420")
+    defaults = {"quality": 20, "chroma_block": 2}
+
+    def prepare(self):
+        w, h = frame_size(self.in_shape)
+        cb = self.params["chroma_block"]
+        cx, cy = cb if isinstance(cb, (tuple, list)) else (cb, cb)
+        v = np.arange(256) - 128.0
+        lut = np.empty((256, 1, 3), np.uint8)
+        for c, base in enumerate((16, 17, 17)):
+            q = jpeg_dc_step(self.params["quality"], base)
+            lut[:, 0, c] = np.clip(np.rint(128 + np.rint(8 * v / q) * q / 8), 0, 255)
+        self._lut = lut
+        if is_i420(self.in_shape):
+            self._luts = [np.ascontiguousarray(lut[:, :, c:c + 1]) for c in range(3)]
+            cx, cy = max(1, cx // 2), max(1, cy // 2)
+            shape = (max(1, h // 2 // cy), max(1, w // 2 // cx)) if cx > 1 or cy > 1 else None
+        else:
+            self._ycrcb = np.empty(self.in_shape, np.uint8)
+            shape = (max(1, h // cy), max(1, w // cx), 3) if cx > 1 or cy > 1 else None
+            if shape:
+                self._up = np.empty(self.in_shape, np.uint8)
+        self._small = np.empty(shape, np.uint8) if shape else None
+
+    def process(self, src, dst):
+        if is_i420(src.shape):
+            for i, (s, d) in enumerate(zip(planes(src), planes(dst))):
+                if i and self._small is not None:
+                    small = self._small
+                    cv2.resize(s, (small.shape[1], small.shape[0]), dst=small, interpolation=cv2.INTER_AREA)
+                    cv2.resize(small, (d.shape[1], d.shape[0]), dst=d, interpolation=cv2.INTER_NEAREST)
+                    s = d
+                cv2.LUT(s, self._luts[i], dst=d)
+            return
+        ycrcb = self._ycrcb
+        cv2.cvtColor(src, cv2.COLOR_BGR2YCrCb, dst=ycrcb)
+        if self._small is not None:
+            small = self._small
+            cv2.resize(ycrcb, (small.shape[1], small.shape[0]), dst=small, interpolation=cv2.INTER_AREA)
+            cv2.resize(small, (ycrcb.shape[1], ycrcb.shape[0]), dst=self._up, interpolation=cv2.INTER_NEAREST)
+            ycrcb[..., 1:] = self._up[..., 1:]
+        cv2.LUT(ycrcb, self._lut, dst=ycrcb)
+        cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR, dst=dst)
+
+
+@register_stage
+class JpegGrain(Stage):
+    """Увеличение кадра клеток до size с узорами DCT, которые JPEG оставляет от шума.
+
+    Конец цепочки noise ... jpeg в плане approx (planner.py): jpeg_dc
+    даёт только DC блоков 8x8, а от сильного шума после JPEG низкого
+    качества остаются и AC — шахматные узоры внутри блоков. Их банк
+    строится в prepare(): серый кадр с тем же шумом через настоящий JPEG
+    минус средние его блоков 8x8. Каждый кадр к увеличенному кадру
+    добавляется случайный тайл со сдвигом, кратным MCU 16x16, чтобы узоры
+    легли в сетку блоков. Величина узора — по яркости клетки: у краёв
+    диапазона шум срезан насыщением, а квантование оставляет от слабого
+    шума непропорционально мало, поэтому таблица усиления замеряется тем
+    же JPEG на однотонных кадрах разной яркости.
+    """
+
+    name = "jpeg_grain"
+    formats = ("bgr", "i420")
+    defaults = {"size": (640, 480), "sigma": 0, "shot": 0.0, "quality": 20, "tiles": 2}
+    margin = 32   # запас тайла для сдвига, кратен 16
+
+    def output_shape(self, in_shape):
+        return frame_shape(in_shape, *self.params["size"])
+
+    def prepare(self):
+        p = self.params
+        self._tiles = None
+        if not p["sigma"] and not p["shot"]:
+            return
+        cells = plane_shapes(self.in_shape)[0]   # у I420 шум был только в яркости
+        shape = plane_shapes(self.out_shape)[0]
+        h, w = shape[:2]
+        c = shape[2] if len(shape) > 2 else 1
+        sigma = noise_sigma(p["sigma"], p["shot"])
+        rng = np.random.default_rng(0)
+        m = self.margin
+        tiles = np.empty((p["tiles"], h + m, w + m, c), np.int16)
+        for tile in tiles:
+            tile[...] = self.residual(rng, (h + m, w + m, c), 128, sigma[128])
+        # банк — шум вокруг серого 128; усиление по яркости — СКО остатка на однотонных
+        # кадрах 16 уровней: 64 — единица, не больше 128, чтобы узор * усиление уместилось в int16
+        levels = np.arange(8, 256, 16)
+        probe = [np.std(self.residual(rng, (64, 64, c), v, sigma[v])) for v in levels]
+        gain = np.interp(np.arange(256), levels, probe) / np.std(tiles[0])
+        self._gain_lut = np.clip(np.rint(64 * gain), 0, 128).astype(np.uint8)
+        self._tiles = tiles if c > 1 else tiles[..., 0]
+        self._cell_gain = np.empty(cells, np.uint8)
+        self._gain = np.empty(shape, np.uint8)
+        self._field = np.empty(shape, np.int16)
+
+    def residual(self, rng, shape, level, sigma):
+        """Однотонный кадр level с шумом sigma через JPEG минус средние блоков 8x8 (int16)"""
+        h, w, c = shape
+        field = rng.standard_normal(shape, dtype=np.float32) * float(sigma)
+        frame = np.clip(np.rint(level + field), 0, 255).astype(np.uint8)
+        _, enc = cv2.imencode(".jpg", frame if c > 1 else frame[..., 0],
+                              [int(cv2.IMWRITE_JPEG_QUALITY), int(self.params["quality"])])
+        dec = cv2.imdecode(enc, cv2.IMREAD_COLOR if c > 1 else cv2.IMREAD_GRAYSCALE).reshape(shape)
+        blocks = dec.reshape(h // 8, 8, w // 8, 8, c).astype(np.float32)
+        return np.rint(blocks - blocks.mean(axis=(1, 3), keepdims=True)).reshape(shape).astype(np.int16)
+
+    def process(self, src, dst):
+        resize_frame(src, dst, cv2.INTER_NEAREST)
+        if self._tiles is None:
+            return
+        if is_i420(src.shape):
+            src, dst = planes(src)[0], planes(dst)[0]
+        h, w = dst.shape[:2]
+        t, oy, ox = self.rng.integers(0, [len(self._tiles), self.margin // 16 + 1, self.margin // 16 + 1])
+        grain = self._tiles[t, oy * 16:oy * 16 + h, ox * 16:ox * 16 + w]
+        # клетки после jpeg_dc однотонные: усиление считается по клеткам и увеличивается вместе с кадром
+        cv2.LUT(src, self._gain_lut, dst=self._cell_gain)
+        cv2.resize(self._cell_gain, (w, h), dst=self._gain, interpolation=cv2.INTER_NEAREST)
+        np.multiply(grain, self._gain, out=self._field)
+        np.right_shift(self._field, 6, out=self._field)
+        add_saturating(dst, self._field, dst)
+
+
+@register_stage
+class Scanlines(Stage):
+    """Тёмные горизонтальные полосы.
+
+    Кадр рассматривается как (строки / 2*period) групп: первые period
+    строк группы затемняются одним cv2.LUT по 2D-виду на все группы.
+    """
+
+    name = "scanlines"
+    inplace = True
+    tileable = True
+    formats = ("bgr", "i420")
+    defaults = {"strength": 0.2, "period": 2}
+
+    def prepare(self):
+        self.tile_align = 2 * self.params["period"]
+        k = 1.0 - self.params["strength"]
+        self._lut = (np.arange(256) * k).astype(np.uint8)
+
+    def process(self, src, dst):
+        src, dst = luma(src, dst)   # у I420 темнеют строки яркости
+        self.process_rows(src, dst, 0, src.shape[0])
+
+    def process_rows(self, src, dst, y0, y1):
+        # y0 кратно 2*period: чётность групп совпадает с целым кадром
+        if dst is not src:
+            np.copyto(dst[y0:y1], src[y0:y1])
+        period = self.params["period"]
+        group = 2 * period
+        rows = dst[y0:y1].reshape(y1 - y0, -1)
+        full = (y1 - y0) // group * group
+        if full:
+            dark = rows[:full].reshape(full // group, -1)[:, :period * rows.shape[1]]
+            cv2.LUT(dark, self._lut, dst=dark)
+        if full < len(rows):
+            tail = rows[full:full + period]
+            cv2.LUT(tail, self._lut, dst=tail)
+
+
+@register_stage
+class BlockNoise(Stage):
+    """Блоковые искажения: случайные залитые прямоугольники.
+
+    Размеры, координаты и цвета всех блоков кадра тянутся из генератора
+    одним вызовом на параметр, блоки заливаются срезами прямо в рабочем
+    буфере. Заливка среза — memset по строкам, это быстрее, чем
+    разворачивать прямоугольники в плоские индексы (см. bench_block_noise).
+    """
+
+    name = "block_noise"
+    inplace = True
+    formats = ("bgr", "i420")
+    live_params = ("blocks",)
+    defaults = {"blocks": 20, "max_size": None, "min_size": 8, "cell": (1, 1)}
+
+    def prepare(self):
+        w = frame_size(self.in_shape)[0] * self.params["cell"][0]
+        self._max_size = max(self.params["min_size"], self.params["max_size"] or max(16, w // 8))
+
+    def block_scale(self, scale, size):
+        # те же прямоугольники, что на полном кадре, только на кадре клеток
+        return [(self.name, {**self.params, "cell": tuple(scale)})]
+
+    def blocks(self, w, h):
+        """Прямоугольники (x0, y0, x1, y1) и цвета блоков текущего кадра (w, h — полный кадр)"""
+        n = self.params["blocks"]
+        rng = self.rng
+        lo = self.params["min_size"]
+        bw = np.minimum(rng.integers(lo, self._max_size + 1, n), w)
+        bh = np.minimum(rng.integers(lo, self._max_size + 1, n), h)
+        x = rng.integers(0, w - bw + 1)
+        y = rng.integers(0, h - bh + 1)
+        colors = rng.integers(0, 256, (n, 3), dtype=np.uint8)
+        return zip(x.tolist(), y.tolist(), (x + bw).tolist(), (y + bh).tolist(), colors)
+
+    def process(self, src, dst):
+        if dst is not src:
+            np.copyto(dst, src)
+        if self.params["blocks"] <= 0:
+            return
+        w, h = frame_size(dst.shape)
+        cx, cy = self.params["cell"]
+        if cx > 1 or cy > 1:
+            self.paint_cells(dst, list(self.blocks(w * cx, h * cy)))
+            return
+        if is_i420(dst.shape):
+            rects = list(self.blocks(w, h))
+            y, u, v = planes(dst)
+            ys, us, vs = colors([r[4] for r in rects])
+            for (x0, y0, x1, y1, _), cy, cu, cv in zip(rects, ys, us, vs):
+                y[y0:y1, x0:x1] = cy
+                u[y0 // 2:(y1 + 1) // 2, x0 // 2:(x1 + 1) // 2] = cu
+                v[y0 // 2:(y1 + 1) // 2, x0 // 2:(x1 + 1) // 2] = cv
+            return
+        for x0, y0, x1, y1, color in self.blocks(w, h):
+            dst[y0:y1, x0:x1] = color
+
+    def paint_cells(self, dst, rects):
+        """Прямоугольники полного кадра на кадре клеток cell.
+
+        Клетка смешивается с цветом блока по доле, которую блок закрывает:
+        это среднее клетки полного кадра, то есть DC блока JPEG.
+        """
+        cx, cy = self.params["cell"]
+        bgr = np.array([r[4] for r in rects], np.uint8)
+        if is_i420(dst.shape):
+            layers = zip(planes(dst), (1, 2, 2), colors(bgr))   # цветность — клетки вдвое крупнее
+        else:
+            layers = [(dst, 1, bgr)]
+        for plane, k, cols in layers:
+            for (x0, y0, x1, y1, _), color in zip(rects, cols.astype(np.float32)):
+                i0, i1, wx = cell_coverage(x0, x1, cx * k)
+                j0, j1, wy = cell_coverage(y0, y1, cy * k)
+                region = plane[j0:j1, i0:i1]
+                a = np.multiply.outer(wy, wx)
+                if region.ndim == 3:
+                    a = a[..., None]
+                region[:] = np.rint(region + (color - region) * a)
+
+
+def cell_coverage(a0, a1, cell):
+    """Клетки [i0, i1), которые задевает отрезок [a0, a1) полного кадра, и доли клеток под ним"""
+    i0, i1 = a0 // cell, -(-a1 // cell)
+    edges = np.arange(i0, i1 + 1) * cell
+    cover = np.minimum(edges[1:], a1) - np.maximum(edges[:-1], a0)
+    return i0, i1, (cover / cell).astype(np.float32)
+
+
+@register_stage
+class TemporalMix(Stage):
+    """Смешивание с предыдущим кадром (эффект «смазывания/ghost»)"""
+
+    name = "temporal_mix"
+    sequential = True
+    formats = ("bgr", "i420")
+    upscale = "exact"
+    live_params = ("mix",)
+    defaults = {"mix": 0.5}
+
+    def prepare(self):
+        self._prev = np.empty(self.out_shape, np.uint8)
+        self._primed = False
+
+    def process(self, src, dst):
+        mix = self.params["mix"]
+        if not self._primed:
+            np.copyto(dst, src)
+            self._primed = True
+        else:
+            cv2.addWeighted(src, 1.0 - mix, self._prev, mix, 0, dst=dst)
+        np.copyto(self._prev, dst)
@@ -0,0 +1,55 @@
+"""Параллельный счёт стадий горизонтальными полосами.
+
+Кадр режется на полосы по строкам, полосы одной стадии считаются в пуле
+потоков (OpenCV и NumPy отпускают GIL), стадии по-прежнему идут по
+очереди. Стадии с ядром (blur, jpeg, jitter) берут полосу с запасом
+halo() строк, поэтому результат совпадает с обработкой целого кадра.
+Покадровые случайные параметры выбираются в step()/begin_frame() до
+разрезания, так что полосы одного кадра видят одно и то же состояние.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TileExecutor:
+    """Пул потоков для счёта стадий полосами.
+
+    threads — число потоков (по умолчанию по числу ядер), bands — число
+    полос на кадр (по умолчанию равно threads).
+    """
+
+    def __init__(self, threads=None, bands=None):
+        self.threads = max(1, threads or os.cpu_count() or 1)
+        self.band_count = max(1, bands or self.threads)
+        self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix="badcam-tile")
+        self._bands = {}
+
+    def bands(self, height, align=1):
+        """Границы полос [(y0, y1), ...]: внутренние границы кратны align"""
+        key = (height, align)
+        bands = self._bands.get(key)
+        if bands is None:
+            step = -(-height // self.band_count)
+            step = max(align, -(-step // align) * align)
+            bands = self._bands[key] = [(y, min(y + step, height)) for y in range(0, height, step)]
+        return bands
+
+    def run(self, stage, src, dst):
+        """Прогнать стадию по полосам (или целиком, если стадия не режется)"""
+        # in-place стадия с ядром читала бы строки, уже переписанные соседней полосой;
+        # у I420 (двумерный буфер) строки кадра — это разные плоскости, полосами не режем
+        if not stage.tileable or (src is dst and stage.halo()) or src.ndim == 2:
+            stage.process(src, dst)
+            return
+        bands = self.bands(src.shape[0], stage.tile_align)
+        stage.begin_frame()
+        if len(bands) == 1:
+            stage.process_rows(src, dst, 0, src.shape[0])
+            return
+        futures = [self._pool.submit(stage.process_rows, src, dst, y0, y1) for y0, y1 in bands]
+        for f in futures:
+            f.result()
+
+    def close(self):
+        self._pool.shutdown(wait=True)
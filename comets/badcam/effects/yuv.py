@@ -0,0 +1,107 @@
+"""Кадры в планарном YUV 4:2:0 (I420).
+
+Вывод в v4l2loopback — yuv420p, JPEG внутри тоже работает в YCbCr, а
+конвейер по умолчанию гоняет BGR: цвет переводится туда и обратно на
+каждом кадре. Кадр I420 — один буфер (h * 3 / 2, w) uint8, ровно в
+раскладке yuv420p: плоскость Y (h, w), за ней U и V (h / 2, w / 2).
+Формат кадра определяется по форме: у BGR три оси, у I420 — две.
+
+Стадии, которые умеют I420, перечисляют его в Stage.formats и работают
+по плоскостям (planes), яркостные эффекты — только с Y (luma).
+"""
+
+import cv2
+import numpy as np
+
+FORMATS = ("bgr", "i420")
+
+
+def is_i420(shape):
+    return len(shape) == 2
+
+
+def frame_format(shape):
+    return "i420" if is_i420(shape) else "bgr"
+
+
+def frame_size(shape):
+    """(w, h) кадра по форме буфера"""
+    if is_i420(shape):
+        return shape[1], shape[0] * 2 // 3
+    return shape[1], shape[0]
+
+
+def frame_shape(like, w, h):
+    """Форма буфера кадра w x h в том же формате, что и like"""
+    if is_i420(like):
+        if w % 2 or h % 2:
+            raise ValueError(f"I420: размеры кадра должны быть чётными, а не {w}x{h}")
+        return (h * 3 // 2, w)
+    return (h, w) + tuple(like[2:])
+
+
+def planes(buf):
+    """Плоскости кадра (виды, без копий): [Y, U, V] у I420, [кадр] у BGR"""
+    if not is_i420(buf.shape):
+        return [buf]
+    w, h = frame_size(buf.shape)
+    u, v = buf[h:].reshape(2, h // 2, w // 2)
+    return [buf[:h], u, v]
+
+
+def plane_shapes(shape):
+    """Формы плоскостей кадра (как у planes)"""
+    if not is_i420(shape):
+        return [tuple(shape)]
+    w, h = frame_size(shape)
+    return [(h, w), (h // 2, w // 2), (h // 2, w // 2)]
+
+
+def plane_scales(shape):
+    """Во сколько раз каждая плоскость меньше кадра"""
+    return [1, 2, 2] if is_i420(shape) else [1]
+
+
+def luma(src, dst):
+    """(Y src, Y dst) для стадий, которые меняют только яркость; цветность I420 копируется.
+
+    У BGR — кадры целиком: там яркость не отделить от цвета.
+    """
+    if not is_i420(src.shape):
+        return src, dst
+    h = frame_size(src.shape)[1]
+    if dst is not src:
+        np.copyto(dst[h:], src[h:])
+    return src[:h], dst[:h]
+
+
+def resize_frame(src, dst, interpolation=cv2.INTER_LINEAR):
+    """cv2.resize под размер dst, по плоскостям"""
+    for s, d in zip(planes(src), planes(dst)):
+        cv2.resize(s, (d.shape[1], d.shape[0]), dst=d, interpolation=interpolation)
+
+
+def from_bgr(src, dst=None):
+    return cv2.cvtColor(src, cv2.COLOR_BGR2YUV_I420, dst=dst)
+
+
+def to_bgr(src, dst=None):
+    return cv2.cvtColor(src, cv2.COLOR_YUV2BGR_I420, dst=dst)
+
+
+def to_yuyv(src, dst):
+    """I420 -> YUYV (4:2:2) без пересчёта цвета: U и V повторяются на две строки"""
+    y, u, v = planes(src)
+    dst[..., 0] = y
+    for row in (0, 1):
+        dst[row::2, 0::2, 1] = u
+        dst[row::2, 1::2, 1] = v
+    return dst
+
+
+def colors(bgr):
+    """Цвета (n, 3) BGR -> (Y, U, V) каждого, как их даёт перевод кадра в I420"""
+    n = len(bgr)
+    block = np.repeat(np.repeat(np.asarray(bgr, np.uint8)[None], 2, axis=0), 2, axis=1)
+    out = from_bgr(block)   # (3, 2n): Y — строки 0-1, U — строка 2 [:n], V — [n:]
+    return out[0, ::2], out[2, :n], out[2, n:]
@@ -0,0 +1,97 @@
+"""Долгоживущий движок BadCam: один процесс на всю сессию GUI.
+
+Источник и вывод открываются один раз, а конфиги переключаются командой
+через канал управления (control.py) без перезапуска Python: новый
+конвейер собирается и готовится в потоке канала, цикл подменяет его
+между кадрами, поток в виртуальную камеру не прерывается. Разрешение и
+fps вывода при смене пресета не меняются.
+
+Через тот же канал на ходу меняются параметры стадий, fps и разрешение
+вывода — со следующего кадра, с пересчётом только затронутых таблиц.
+
+Запуск (из корня LuminaX):
+    python3 -m comets.badcam.engine --config a
+    python3 -m comets.badcam.control load b
+    python3 -m comets.badcam.control set jpeg quality=10
+"""
+
+import importlib
+
+from comets.badcam import control
+from comets.badcam.runtime import BadCamRuntime, build_parser, finish_trace, start_stats, start_trace
+from modules import comet_registry
+
+
+def config_preset(config):
+    """Пресет конфига: из манифеста кометы, иначе константа PRESET модуля configs/"""
+    try:
+        cfg = comet_registry.config("badcam", config)
+    except KeyError:
+        cfg = {"module": "comets.badcam.configs." + config}
+    if "preset" in cfg:
+        return cfg["preset"]
+    return importlib.import_module(cfg["module"]).PRESET
+
+
+def control_handlers(rt):
+    def load(config=None, preset=None, wait=2.0):
+        if config is not None:
+            preset = config_preset(config)
+        if preset is None:
+            raise ValueError("нужен config или preset")
+        return rt.swap_preset(preset, wait)
+
+    def status():
+        return {"preset": rt.preset_name, "size": [rt.W, rt.H], "fps": rt.fps,
+                "capture": getattr(rt.cap, "mode", None), "stats": rt.stats()}
+
+    def stages():
+        return {"preset": rt.preset_name, "stages": rt.pipeline.spec()}
+
+    def set_params(stage, params, wait=2.0):
+        return rt.set_params(stage, params, wait)
+
+    def fps(fps, wait=2.0):
+        return rt.set_fps(int(fps), wait)
+
+    def size(width, height, wait=2.0):
+        return rt.set_size(width, height, wait)
+
+    return {"load": load, "status": status, "stages": stages, "set": set_params, "fps": fps, "size": size}
+
+
+def main(argv=None):
+    p = build_parser()
+    p.add_argument('--config', default=None, help='начальный конфиг из configs/ (вместо --preset)')
+    p.add_argument('--control', default=control.DEFAULT_PATH, help='Unix-сокет канала управления')
+    args = p.parse_args(argv)
+    if args.workers:
+        p.error("движок меняет пресет на ходу, --workers не поддерживается")
+    if args.config:
+        args.preset = config_preset(args.config)
+
+    rt = BadCamRuntime(args.preset, src=args.src, vdev=args.vdev, sink=args.sink,
+                       width=args.width, height=args.height, fps=args.fps,
+                       threads=args.threads, queue_size=args.queue, policy=args.policy, report=args.report,
+                       tiles=args.tiles, out=args.out, pix_fmt=args.pix_fmt,
+                       source=args.source, source_fps=args.source_fps, preview=args.preview,
+                       latest=args.latest, plan=args.plan, yuv=args.yuv)
+    print("Движок: src=%s %s=%s %dx%d@%dfps preset=%s control=%s"
+          % (rt.src, rt.sink_kind, rt.out, rt.W, rt.H, rt.fps, rt.preset_name, args.control))
+    start_trace(args)
+    rt.open()
+    publisher = start_stats(args, rt)
+    server = control.ControlServer(args.control, control_handlers(rt))
+    server.start()
+    try:
+        rt.run()
+    finally:
+        server.stop()
+        if publisher is not None:
+            publisher.stop()
+        rt.close()
+        finish_trace(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,22 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QComboBox, QLineEdit
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QComboBox, QLineEdit, QCheckBox
 from PyQt6.QtGui import QFont, QImage, QPixmap
 from PyQt6.QtCore import Qt, QTimer
 import subprocess
 import os
+import signal
+import sys
 import cv2
+import numpy as np
+
+from comets.badcam import control
+from comets.badcam.shmring import ShmRingReader
+from comets.badcam.sinks import SINKS
+from modules import comet_registry
+
+# корень LuminaX: конфиги запускаются модулями (python -m comets.badcam.configs.X)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TRACE_PATH = os.path.join(ROOT_DIR, "badcam_trace.json")
+PREVIEW_RING = "badcam-preview"  # кольцо общей памяти с выходом конфига для окна превью
 
 
 class BadCamComet:
@@ -13,6 +26,9 @@ class BadCamComet:
         self.active_config = None
         self.vcam_active = False
         self.video_nr = 2  # номер устройства
+        self.sink = None   # способ вывода (None — из пресета конфига)
+        self.trace = False  # запускать конфиг с --trace
+        self._engine_args = None  # с чем запущен движок (другие — перезапуск)
 
     # ------------------ Виртуальная камера ------------------
     def start_virtual_camera(self):
@@ -42,19 +58,51 @@ class BadCamComet:
             print("Ошибка остановки виртуальной камеры:", e)
 
     # ------------------ Конфиги ------------------
+    def engine_args(self):
+        """Параметры запуска движка, которые нельзя поменять на ходу"""
+        args = []
+        if self.sink:
+            args += ["--sink", self.sink]
+        if self.trace:
+            args += ["--trace", TRACE_PATH]
+        # в звонке важнее свежесть кадра, чем каждый кадр камеры
+        args += ["--latest"]
+        # метрики для панели производительности в настройках LuminaX
+        args += ["--stats", "badcam"]
+        args += ["--preview", PREVIEW_RING]
+        return args
+
     def launch_config(self):
-        if self.proc:
-            self.stop_config()
+        """Переключить движок на выбранный конфиг; движок запускается один раз"""
         if not self.active_config:
             return
+        config = self.active_config
+        args = self.engine_args()
+        if self.proc and self.proc.poll() is None and args == self._engine_args:
+            try:
+                reply = control.request("load", config=config)
+            except OSError as e:
+                reply = {"ok": False, "error": e}
+            if reply["ok"]:
+                print(f"Конфиг {self.active_config}: подготовка {reply['prepare_ms']} мс, "
+                      f"первый кадр через {reply['switch_ms']} мс")
+                return
+            print("Движок не переключился, перезапуск:", reply["error"])
+        self.stop_config()
         try:
-            configs_dir = os.path.join(os.path.dirname(__file__), "configs")
-            script_path = os.path.join(configs_dir, self.active_config)
-            self.proc = subprocess.Popen(["python3", script_path])
+            cmd = [sys.executable, "-m", "comets.badcam.engine", "--config", config] + args
+            self.proc = subprocess.Popen(cmd, cwd=ROOT_DIR)
+            self._engine_args = args
             print(f"Запущен конфиг: {self.active_config}")
         except Exception as e:
             print("Ошибка запуска конфига:", e)
 
+    def dump_trace(self):
+        """Попросить запущенный конфиг записать трассу (SIGUSR1)"""
+        if self.proc and self.trace and self.proc.poll() is None:
+            self.proc.send_signal(signal.SIGUSR1)
+            print(f"Трасса: {TRACE_PATH}")
+
     def stop_config(self):
         if self.proc:
             self.proc.terminate()
@@ -65,7 +113,17 @@ class BadCamComet:
 
 # ------------------ Окно превью ------------------
 class PreviewWindow(QWidget):
-    def __init__(self, video_nr=2):
+    """Превью выхода конвейера прямо из кольца общей памяти (--preview).
+
+    Кадр не проходит через v4l2loopback: окно раз в POLL_MS сверяет номер
+    последнего кадра и перерисовывает только новый — уменьшает его сразу
+    до размера метки в переиспользуемый буфер, без копии полного кадра.
+    """
+
+    POLL_MS = 15
+    ATTACH_EVERY = 60  # попыток подключиться к кольцу — раз в ~секунду
+
+    def __init__(self, ring_name=PREVIEW_RING):
         super().__init__()
         self.setWindowTitle("Превью виртуальной камеры")
         self.resize(320, 240)
@@ -77,34 +135,66 @@ class PreviewWindow(QWidget):
         layout.addWidget(self.label)
         self.setLayout(layout)
 
-        self.cap = cv2.VideoCapture(f"/dev/video{video_nr}")
-        if not self.cap.isOpened():
-            self.label.setText("Не удалось открыть виртуальную камеру")
-            return
+        self.ring_name = ring_name
+        self.ring = None
+        self._ticks = self._idle = 0
+        self._small = self._mirror = None
 
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)
-        
+        self.timer.start(self.POLL_MS)
+
+    def attach(self):
+        self._ticks += 1
+        if self._ticks % self.ATTACH_EVERY != 1:
+            return False
+        try:
+            self.ring = ShmRingReader(self.ring_name)
+        except (FileNotFoundError, ValueError):
+            self.label.setText("Нет кадров: конфиг не запущен")
+            return False
+        return True
+
+    def target_size(self, w, h):
+        """Размер под метку с сохранением пропорций"""
+        scale = min(self.label.width() / w, self.label.height() / h)
+        return max(1, int(w * scale)), max(1, int(h * scale))
+
     def update_frame(self):
-        ret, frame = self.cap.read()
-        if not ret:
+        if self.ring is None and not self.attach():
             return
-
-        frame = cv2.flip(frame, 1)
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = frame.shape
-        qimg = QImage(frame.data, w, h, ch * w, QImage.Format.Format_RGB888)
-        self.label.setPixmap(QPixmap.fromImage(qimg).scaled(
-            self.label.width(), self.label.height(),
-            Qt.AspectRatioMode.KeepAspectRatio
-        ))
+        n, frame = self.ring.peek()
+        if n is None:
+            self._idle += 1
+            if self._idle >= self.ATTACH_EVERY:
+                # кадров давно нет: конфиг мог перезапуститься с новым кольцом
+                self.detach()
+            return
+        self._idle = 0
+
+        h, w = frame.shape[:2]
+        tw, th = self.target_size(w, h)
+        if self._small is None or self._small.shape[:2] != (th, tw):
+            self._small = np.empty((th, tw, 3), np.uint8)
+            self._mirror = np.empty_like(self._small)
+        interp = cv2.INTER_AREA if tw < w else cv2.INTER_LINEAR
+        cv2.resize(frame, (tw, th), dst=self._small, interpolation=interp)
+        if not self.ring.valid(n):
+            return  # слот перезаписан во время чтения — возьмём следующий кадр
+        cv2.flip(self._small, 1, dst=self._mirror)
+
+        qimg = QImage(self._mirror.data, tw, th, 3 * tw, QImage.Format.Format_BGR888)
+        self.label.setPixmap(QPixmap.fromImage(qimg))
+
+    def detach(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+            self._ticks = self._idle = 0
 
     def closeEvent(self, event):
-        if hasattr(self, "timer"):
-            self.timer.stop()
-        if hasattr(self, "cap") and self.cap.isOpened():
-            self.cap.release()
+        self.timer.stop()
+        self.detach()
         event.accept()
 
 
@@ -147,13 +237,23 @@ def create_page():
 
     # ------------------ Конфиги ------------------
     layout.addWidget(QLabel("Выберите конфиг:"))
-    configs_dir = os.path.join(os.path.dirname(__file__), "configs")
-    COMF_FILES = [f for f in os.listdir(configs_dir) if f.endswith(".py")]
-
     config_combo = QComboBox()
-    config_combo.addItems(COMF_FILES)
+    for cfg in comet_registry.comet("badcam")["configs"]:
+        config_combo.addItem(cfg["title"], cfg["id"])
+        if cfg.get("description"):
+            config_combo.setItemData(config_combo.count() - 1, cfg["description"], Qt.ItemDataRole.ToolTipRole)
     layout.addWidget(config_combo)
 
+    layout.addWidget(QLabel("Вывод:"))
+    sink_combo = QComboBox()
+    sink_combo.addItem("из конфига", None)
+    for name in SINKS:
+        sink_combo.addItem(name, name)
+    layout.addWidget(sink_combo)
+
+    trace_check = QCheckBox("Трассировка стадий")
+    layout.addWidget(trace_check)
+
     toggle_btn = QPushButton("Включить комету")
     layout.addWidget(toggle_btn)
 
@@ -162,10 +262,12 @@ def create_page():
 
     def toggle_comet():
         if toggle_btn.text() == "Включить комету":
-            comet.active_config = config_combo.currentText()
+            comet.active_config = config_combo.currentData()
+            comet.sink = sink_combo.currentData()
+            comet.trace = trace_check.isChecked()
             comet.launch_config()
             toggle_btn.setText("Выключить комету")
-            status_label.setText(f"Статус: Включена ({comet.active_config})")
+            status_label.setText(f"Статус: Включена ({config_combo.currentText()})")
         else:
             comet.stop_config()
             toggle_btn.setText("Включить комету")
@@ -173,6 +275,19 @@ def create_page():
 
     toggle_btn.clicked.connect(toggle_comet)
 
+    def switch_config(index):
+        # во включённой комете конфиг меняется на ходу, без перезапуска движка
+        if comet.proc and comet.proc.poll() is None:
+            comet.active_config = config_combo.itemData(index)
+            comet.launch_config()
+            status_label.setText(f"Статус: Включена ({config_combo.currentText()})")
+
+    config_combo.currentIndexChanged.connect(switch_config)
+
+    trace_btn = QPushButton("Снять трассу")
+    trace_btn.clicked.connect(comet.dump_trace)
+    layout.addWidget(trace_btn)
+
     # ------------------ Кнопка превью ------------------
     preview_btn = QPushButton("Превью виртуальной камеры")
     layout.addWidget(preview_btn)
@@ -182,7 +297,7 @@ def create_page():
             page.preview_window.close()
             page.preview_window = None
         else:
-            win = PreviewWindow(comet.video_nr)
+            win = PreviewWindow()
             win.show()
             page.preview_window = win
 
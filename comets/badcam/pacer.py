@@ -0,0 +1,124 @@
+"""Темп вывода BadCam: дедлайны по monotonic и имитация плохих таймингов.
+
+Кадры отправляются по сетке дедлайнов deadline += 1/fps: сон считается
+от дедлайна, а не от конца обработки, поэтому время обработки и ошибка
+sleep() не копятся. Если вывод отстал больше чем на кадр, сетка
+сдвигается на текущий момент (кадры не досылаются пачкой).
+
+Выпадения, заморозки и подтормаживания пресета (timing) тоже делаются
+здесь, на стороне вывода: кадр не отдаётся (выпадение, подтормаживание)
+или вместо нового кадра повторяется замороженный. Захват и обработка при
+этом не спят и продолжают работать.
+"""
+
+import collections
+import random
+import time
+
+import numpy as np
+
+
+class Pacer:
+    def __init__(self, fps, timing=None, pace=True, window=300, seed=None):
+        self.interval = 1.0 / max(1, fps)
+        self.timing = timing or {}
+        self.pace = pace
+        self.rng = random.Random(seed)
+        self.emitted = 0     # новых кадров отправлено
+        self.repeated = 0    # повторов замороженного кадра
+        self.withheld = 0    # кадров не отдано (выпадения и подтормаживания)
+        self.late = 0        # сколько раз вывод отстал больше чем на кадр
+        self._deadline = None
+        self._hold_until = 0.0
+        self._freeze_until = 0.0
+        self._frozen = None
+        self._last = None
+        self._intervals = collections.deque(maxlen=window)
+        self._ages = collections.deque(maxlen=window)  # от захвата до отправки, с
+        self._fresh = False  # filter() отдал новый кадр, а не повтор замороженного
+
+    # ------------------ Тайминги ------------------
+    def filter(self, frame):
+        """Что отправить вместо готового кадра: сам кадр, замороженный кадр или None"""
+        timing = self.timing
+        now = time.monotonic()
+        self._fresh = False
+        if now < self._freeze_until:
+            self.repeated += 1
+            return self._frozen
+        if now < self._hold_until:
+            self.withheld += 1
+            return None
+        # подтормаживание: какое-то время новые кадры не уходят
+        if self.rng.random() < timing.get("stall_chance", 0):
+            self._hold_until = now + self.rng.uniform(*timing["stall"])
+            self.withheld += 1
+            return None
+        # выпадение одного кадра
+        if self.rng.random() < timing.get("frame_drop", 0):
+            self.withheld += 1
+            return None
+        # заморозка: этот кадр повторяется вместо новых
+        if self.rng.random() < timing.get("freeze_chance", 0):
+            if self._frozen is None or self._frozen.shape != frame.shape:
+                self._frozen = np.empty_like(frame)
+            np.copyto(self._frozen, frame)
+            self._freeze_until = now + self.rng.uniform(*timing["freeze"])
+            frame = self._frozen
+        self.emitted += 1
+        self._fresh = True
+        return frame
+
+    def retime(self, timing, pace):
+        """Тайминги другого пресета; сетка дедлайнов и счётчики сохраняются"""
+        self.timing = timing or {}
+        self.pace = pace
+        # заморозка или подтормаживание старого пресета не должны тянуться после смены
+        self._hold_until = self._freeze_until = 0.0
+        self._frozen = None
+
+    def set_fps(self, fps):
+        """Новый темп со следующего такта"""
+        self.interval = 1.0 / max(1, fps)
+
+    # ------------------ Темп ------------------
+    def tick(self, sent=True, captured_at=None):
+        """Отметить такт вывода (sent — кадр ушёл) и дождаться следующего дедлайна.
+
+        captured_at — момент захвата отправленного кадра (monotonic): из
+        него считается возраст кадра на выходе (повторы заморозки не в счёт).
+        """
+        now = time.monotonic()
+        if sent:
+            if self._last is not None:
+                self._intervals.append(now - self._last)
+            self._last = now
+            if captured_at is not None and self._fresh:
+                self._ages.append(now - captured_at)
+        if not self.pace:
+            return
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += self.interval
+        delay = self._deadline - now
+        if delay > 0:
+            time.sleep(delay)
+        elif -delay > self.interval:
+            self.late += 1
+            self._deadline = now
+
+    def stats(self):
+        """Фактический fps, разброс интервалов между отправками и возраст кадров (по последним кадрам)"""
+        iv = np.array(self._intervals)
+        stats = {"emitted": self.emitted, "repeated": self.repeated,
+                 "withheld": self.withheld, "late": self.late}
+        if len(iv):
+            stats.update(
+                fps=round(len(iv) / iv.sum(), 2),
+                jitter_ms=round(iv.std() * 1e3, 2),
+                max_gap_ms=round(iv.max() * 1e3, 2),
+            )
+        if self._ages:
+            ages = np.array(self._ages)
+            stats.update(age_ms=round(float(np.median(ages)) * 1e3, 2), age_max_ms=round(ages.max() * 1e3, 2))
+        return stats
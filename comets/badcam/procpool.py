@@ -0,0 +1,315 @@
+"""Многопроцессный режим BadCam для тяжёлых пресетов.
+
+Кадры лежат в слотах multiprocessing.shared_memory и никогда не
+сериализуются: захват пишет кадр прямо во входной слот, воркер
+обрабатывает его и пишет результат в выходной слот того же номера,
+координатор собирает кадры по порядку и отдаёт в вывод. По очередям
+ходят только номера слотов и снимки покадровых параметров.
+
+Состояние стадий:
+- покадровые параметры (фаза AE/AWB, сдвиг джиттера, фаза rolling
+  shutter, уровни posterize, мерцание) считает координатор через step()
+  и отправляет воркеру снимком frame_states(), поэтому они идут
+  непрерывно, как в одном процессе;
+- таблицы и карты из setup() (карта битых пикселей и т.п.) у всех
+  воркеров одинаковые — конвейеры строятся с общим seed;
+- стадии, которым нужен предыдущий выходной кадр (temporal_mix), и всё
+  после них выполняются потоком вывода, строго по порядку.
+
+Поток вывода держит темп (Pacer) и возвращает слот координатору через ту
+же очередь done, так что захват и раздача кадров не спят на выводе.
+
+Задержка: захват идёт в своём потоке и начинается, когда воркеры уже
+поднялись, так что готовый кадр не ждёт, пока координатор дождётся
+камеры. При policy='drop_oldest' вывод, у которого накопилось несколько
+готовых кадров, пишет самый свежий, а старые выкидывает (dropped), как
+и многопоточный режим.
+
+Останавливает всё координатор: воркеры игнорируют SIGINT (Ctrl+C
+получает только родитель) и выходят по None в очереди задач, поток
+вывода — по событию остановки; общая память закрывается только после
+того, как он завершился.
+"""
+
+import multiprocessing as mp
+import queue
+import signal
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from comets.badcam import trace
+from comets.badcam.effects import build_pipeline
+from comets.badcam.effects.yuv import resize_frame
+
+
+class FrameSlots:
+    """Входные и выходные кадры в одном блоке общей памяти"""
+
+    def __init__(self, count, in_shape, out_shape, name=None):
+        self.count = count
+        self.in_shape = tuple(in_shape)
+        self.out_shape = tuple(out_shape)
+        in_size = int(np.prod(in_shape))
+        out_size = int(np.prod(out_shape))
+        total = count * (in_size + out_size)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=total)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.inputs = [np.ndarray(self.in_shape, np.uint8, self.shm.buf, i * in_size)
+                       for i in range(count)]
+        base = count * in_size
+        self.outputs = [np.ndarray(self.out_shape, np.uint8, self.shm.buf, base + i * out_size)
+                        for i in range(count)]
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self, unlink=False):
+        # имя убираем первым: даже если close() не пройдёт, сегмент не утечёт
+        if unlink:
+            self.shm.unlink()
+        # виды на буфер нужно отпустить до закрытия памяти
+        self.inputs = self.outputs = []
+        self.shm.close()
+
+
+def _worker_main(index, preset, seed, split, slots_args, tasks, done):
+    """Процесс-воркер: обрабатывает слоты, номера которых приходят в tasks"""
+    # Ctrl+C в терминале приходит всей группе процессов; останавливает воркер координатор
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    cv2.setNumThreads(1)
+    slots = FrameSlots(*slots_args)
+    pipeline = build_pipeline(preset, seed=seed)
+    head, _ = pipeline.split(split)
+    head.setup(slots.in_shape)
+    head.reseed((seed, index + 1))
+    done.put((None, index))   # воркер готов
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, idx, states = task
+            head.load_states(states)
+            head.process(slots.inputs[slot], out=slots.outputs[slot], step=False)
+            done.put((slot, idx))
+    finally:
+        slots.close()
+
+
+class ProcessRunner:
+    """Захват и сборка в этом процессе, эффекты — в N процессах-воркерах"""
+
+    def __init__(self, runtime, workers=2, slots=None):
+        self.rt = runtime
+        self.workers = max(1, workers)
+        self.slot_count = slots or self.workers * 2
+        self.seed = int(np.random.SeedSequence().entropy % (1 << 63))
+        self.captured = 0
+        self.dispatched = 0
+        self.written = 0
+        self.dropped = 0
+        self.running = False
+        self.error = None
+        self._procs = []
+        self._tasks = []
+        self._writer = None
+        self._capture = None
+        self._stop = threading.Event()   # поток вывода больше не трогает слоты
+
+    def _first_frame(self):
+        while True:
+            ret, frame = self.rt.cap.read()
+            if ret:
+                return frame
+            time.sleep(0.05)
+
+    def run(self):
+        rt = self.rt
+        first = self._first_frame()
+        in_shape = first.shape
+
+        # координатор держит те же стадии для step() и для последовательного хвоста
+        pipeline = build_pipeline(rt.preset, seed=self.seed)
+        split = pipeline.sequential_index()
+        head, tail = pipeline.split(split)
+        head.setup(in_shape)
+        mid_shape = head.out_shape if head.stages else in_shape
+        if tail.stages:
+            tail.setup(mid_shape)
+
+        slots = FrameSlots(self.slot_count, in_shape, mid_shape)
+        self._stamps = [None] * self.slot_count  # момент захвата кадра в слоте
+        ctx = mp.get_context("spawn")
+        done = ctx.Queue()
+        # игнорирование SIGINT наследуется новым процессом с самого старта, до _worker_main
+        main = threading.current_thread() is threading.main_thread()
+        old_sigint = signal.signal(signal.SIGINT, signal.SIG_IGN) if main else None
+        try:
+            for i in range(self.workers):
+                tasks = ctx.Queue()
+                proc = ctx.Process(
+                    target=_worker_main, name=f"badcam-worker-{i}", daemon=True,
+                    args=(i, rt.preset, self.seed, split,
+                          (self.slot_count, in_shape, mid_shape, slots.name), tasks, done),
+                )
+                proc.start()
+                self._procs.append(proc)
+                self._tasks.append(tasks)
+        finally:
+            if main:
+                signal.signal(signal.SIGINT, old_sigint)
+
+        ordered = queue.Queue()
+        free = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name="badcam-writer", daemon=True,
+                                        args=(slots, tail, ordered, done))
+        self._capture = threading.Thread(target=self._capture_loop, name="badcam-capture", daemon=True,
+                                         args=(slots, head, free))
+        self._writer.start()
+        ready = {}
+        next_write = 0
+        last_report = time.monotonic()
+        self.running = True
+        try:
+            # захват — только когда воркеры поднялись: кадры, снятые за время их
+            # запуска (около секунды), ушли бы в вывод устаревшими; первый кадр
+            # нужен был только для формы слотов
+            started = 0
+            while started < self.workers:
+                started += self._next_done(done, block=True) == (None, None)
+            for slot in range(self.slot_count):
+                free.put(slot)
+            self._capture.start()
+
+            while self.running and self.error is None:
+                # готовые кадры (idx) и освободившиеся после вывода слоты (idx=None)
+                item = self._next_done(done, block=True)
+                while item is not None:
+                    slot, idx = item
+                    if idx is None:
+                        free.put(slot)
+                    else:
+                        ready[idx] = slot
+                    item = self._next_done(done, block=False)
+                # в вывод строго по порядку
+                while next_write in ready:
+                    ordered.put(ready.pop(next_write))
+                    next_write += 1
+
+                if rt.report and time.monotonic() - last_report >= rt.report:
+                    last_report = time.monotonic()
+                    rt.print_stats(rt.stats())
+        finally:
+            try:
+                self.running = False
+                self._stop.set()
+                ordered.put(None)
+                # без таймаута: пока потоки живы, они могут держать вид на слот
+                if self._capture.is_alive():
+                    self._capture.join()
+                self._writer.join()
+                for tasks in self._tasks:
+                    tasks.put(None)
+                for proc in self._procs:
+                    proc.join(timeout=2)
+                    if proc.is_alive():
+                        proc.terminate()
+            finally:
+                slots.close(unlink=True)
+
+    def _next_done(self, done, block):
+        """Следующее сообщение воркеров или вывода; None, если пусто (block — ждать до секунды)"""
+        try:
+            item = done.get(block=block, timeout=1.0 if block else None)
+        except queue.Empty:
+            if block and not all(p.is_alive() for p in self._procs):
+                raise RuntimeError("Воркер BadCam завершился")
+            return None
+        # сообщение «воркер готов» — (None, номер воркера)
+        return (None, None) if item[0] is None else item
+
+    def _capture_loop(self, slots, head, free):
+        """Поток захвата: кадр прямо во входной слот и сразу воркеру.
+
+        Отдельно от координатора: пока камера ждёт следующий кадр, готовые
+        кадры уже уходят в вывод.
+        """
+        rt = self.rt
+        in_shape = slots.in_shape
+        try:
+            while not self._stop.is_set():
+                try:
+                    slot = free.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                buf = slots.inputs[slot]
+                with trace.span("capture"):
+                    ret, frame = rt.cap.read(buf)
+                if ret and frame is not buf:
+                    if frame.shape == in_shape:
+                        np.copyto(buf, frame)
+                    else:
+                        # камера сменила разрешение — приводим к размеру слотов
+                        resize_frame(frame, buf)
+                if not ret:
+                    free.put(slot)
+                    time.sleep(0.05)
+                    continue
+                self.captured += 1
+                self._stamps[slot] = rt.cap.last_ts
+                head.step()
+                idx = self.dispatched
+                self._tasks[idx % self.workers].put((slot, idx, head.frame_states()))
+                self.dispatched += 1
+        except Exception as e:
+            print("Ошибка захвата:", e)
+            self.error = e
+
+    def _writer_loop(self, slots, tail, ordered, done):
+        rt = self.rt
+        while True:
+            slot = ordered.get()
+            if slot is None or self._stop.is_set():
+                break
+            if rt.policy == "drop_oldest":
+                # готов кадр новее — старый не выводим, иначе очередь копит задержку
+                while not ordered.empty():
+                    newer = ordered.get_nowait()
+                    if newer is None:
+                        ordered.put(None)
+                        break
+                    done.put((slot, None))
+                    self.dropped += 1
+                    slot = newer
+            out = slots.outputs[slot]
+            if tail.stages:
+                out = tail.process(out)
+            out = rt.pacer.filter(out)
+            try:
+                if out is not None:
+                    with trace.span("sink.write"):
+                        rt.sink.write(out)
+            except Exception as e:
+                print("Ошибка записи в виртуальное устройство:", e)
+                self.error = e
+                done.put((slot, None))
+                break
+            done.put((slot, None))
+            if out is not None:
+                self.written += 1
+            with trace.span("pace"):
+                rt.pacer.tick(out is not None, self._stamps[slot])
+
+    def stop(self):
+        self.running = False
+
+    def stats(self):
+        return {"captured": self.captured, "dispatched": self.dispatched, "written": self.written,
+                "dropped": self.dropped, **self.rt.pacer.stats()}
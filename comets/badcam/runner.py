@@ -0,0 +1,134 @@
+"""Многопоточный режим BadCam: захват, обработка и вывод в разных потоках.
+
+Потоки связаны ограниченными очередями FrameRing; кадры живут в пулах
+FramePool и возвращаются в них после вывода или выкидывания, так что в
+установившемся режиме буферы кадров не выделяются заново. OpenCV и NumPy
+отпускают GIL на чтении камеры, эффектах и записи, поэтому на
+многоядерной машине стадии реально идут параллельно. Темп и имитация
+плохих таймингов (Pacer) — только в потоке вывода. В очередях лежат пары
+(кадр, момент захвата): по ним вывод считает возраст кадра.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from comets.badcam import trace
+from comets.badcam.buffers import FramePool, FrameRing
+
+
+class ThreadedRunner:
+    def __init__(self, runtime, queue_size=2, policy="drop_oldest"):
+        self.rt = runtime
+        # очередь + буфер в работе у каждой из сторон
+        self.cap_pool = FramePool(queue_size + 2)
+        self.out_pool = FramePool(queue_size + 2)
+        self.in_ring = FrameRing(queue_size, policy, on_drop=lambda item: self.cap_pool.release(item[0]))
+        self.out_ring = FrameRing(queue_size, policy, on_drop=lambda item: self.out_pool.release(item[0]))
+        self.stop_event = threading.Event()
+        self.error = None
+        self.captured = 0
+        self.processed = 0
+        self.written = 0
+        self._threads = []
+
+    # ------------------ Потоки ------------------
+    def _capture_loop(self):
+        cap = self.rt.cap
+        shape = None
+        while not self.stop_event.is_set():
+            buf = None
+            if shape is not None:
+                buf = self.cap_pool.acquire(shape, timeout=0.5)
+                if buf is None:
+                    continue
+            with trace.span("capture"):
+                ret, frame = cap.read(buf) if buf is not None else cap.read()
+            if not ret:
+                if buf is not None:
+                    self.cap_pool.release(buf)
+                time.sleep(0.05)
+                continue
+            shape = frame.shape
+            self.captured += 1
+            if not self.in_ring.put((frame, cap.last_ts)):
+                break
+
+    def _writer_loop(self):
+        pacer = self.rt.pacer
+        while True:
+            item = self.out_ring.get(timeout=0.5)
+            if item is None:
+                if self.out_ring.closed:
+                    break
+                continue
+            frame, captured_at = item
+            out = pacer.filter(frame)
+            try:
+                if out is not None:
+                    with trace.span("sink.write"):
+                        self.rt.write(out)
+            except Exception as e:
+                print("Ошибка записи в виртуальное устройство:", e)
+                self.error = e
+                self.stop_event.set()
+                break
+            finally:
+                self.out_pool.release(frame)
+            if out is not None:
+                self.written += 1
+            with trace.span("pace"):
+                pacer.tick(out is not None, captured_at)
+
+    # ------------------ Обработка ------------------
+    def run(self):
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="badcam-capture", daemon=True),
+            threading.Thread(target=self._writer_loop, name="badcam-writer", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        last_report = time.monotonic()
+        try:
+            while not self.stop_event.is_set():
+                item = self.in_ring.get(timeout=0.5)
+                if item is None:
+                    continue
+                raw, captured_at = item
+                out = self.rt.process(raw)
+                self.cap_pool.release(raw)
+
+                buf = self.out_pool.acquire(out.shape, out.dtype)
+                np.copyto(buf, out)
+                self.processed += 1
+                if not self.out_ring.put((buf, captured_at)):
+                    break
+
+                if self.rt.report and time.monotonic() - last_report >= self.rt.report:
+                    last_report = time.monotonic()
+                    self.rt.print_stats(self.rt.stats())
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.stop_event.set()
+        self.in_ring.close()
+        self.out_ring.close()
+        for t in self._threads:
+            t.join(timeout=2)
+
+    def stats(self):
+        """Счётчики кадров и глубина очередей"""
+        return {
+            "captured": self.captured,
+            "processed": self.processed,
+            "written": self.written,
+            "in_depth": len(self.in_ring),
+            "out_depth": len(self.out_ring),
+            "in_max": self.in_ring.max_depth,
+            "out_max": self.out_ring.max_depth,
+            "in_dropped": self.in_ring.dropped,
+            "out_dropped": self.out_ring.dropped,
+            **self.rt.pacer.stats(),
+        }
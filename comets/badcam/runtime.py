@@ -0,0 +1,414 @@
+"""Общий цикл BadCam: захват -> конвейер эффектов -> вывод.
+
+Каждый конфиг из configs/ только выбирает пресет и вызывает main().
+"""
+
+import argparse
+import collections
+import signal
+import sys
+import threading
+import time
+
+from comets.badcam.effects import Pipeline, build_pipeline, frame_size, get_preset, preset_names
+from comets.badcam import cammodes, trace
+from comets.badcam.pacer import Pacer
+from comets.badcam.procpool import ProcessRunner
+from comets.badcam.runner import ThreadedRunner
+from comets.badcam.sinks import DEFAULT_TARGETS, PIX_FORMATS, SINKS, ShmRingSink, TeeSink, open_sink
+from comets.badcam.sources import SOURCES, SyntheticSource, guess_source, open_source
+from comets.badcam.stats import StatsPublisher
+
+
+def parse_src(src):
+    """Индекс камеры или путь к устройству/файлу"""
+    src = str(src)
+    return int(src) if src.isdigit() else src
+
+
+class BadCamRuntime:
+    def __init__(self, preset, src=0, vdev="/dev/video2", sink=None, width=None, height=None, fps=None,
+                 threads=False, queue_size=2, policy="drop_oldest", report=0, workers=0, tiles=0,
+                 out=None, pix_fmt=None, source=None, source_fps=None, preview=None, latest=False, plan=None,
+                 yuv=False):
+        self.preset_name = preset if isinstance(preset, str) else preset.get("name", "custom")
+        if isinstance(preset, str):
+            preset = get_preset(preset, width=width, height=height, fps=fps)
+        self.plan = plan        # режим плана конвейера вместо пресетного (None — как в пресете)
+        if plan is not None:
+            preset = dict(preset, plan=plan)
+        self.yuv = yuv          # конвейер в I420 (effects/yuv.py): цвет переводится один раз, при захвате
+        if yuv:
+            preset = dict(preset, fmt="i420")
+        self.preset = preset
+        self.src = parse_src(src)
+        self.source_kind = source or guess_source(src)
+        self.source_fps = source_fps  # None — по умолчанию для источника, 0 — без ограничения
+        self.latest = latest    # камера: всегда самый свежий кадр (DeviceSource latest=True)
+        self.vdev = vdev
+        self.sink_kind = sink or preset["sink"]
+        # цель вывода: устройство для v4l2/ffmpeg/fakewebcam, путь или имя сегмента для file/shm
+        self.out = out or DEFAULT_TARGETS.get(self.sink_kind, vdev)
+        self.pix_fmt = pix_fmt
+        self.preview = preview  # имя кольца превью в общей памяти (None — без превью)
+        self.W, self.H = preset["size"]
+        self.fps = preset["fps"]
+        self.timing = preset.get("timing", {})
+        self.tiles = tiles      # потоков для счёта стадий полосами (0 — кадр целиком)
+        self.pipeline = build_pipeline(preset, tiles=tiles)
+        self.threads = threads
+        self.queue_size = queue_size
+        self.policy = policy
+        self.report = report   # период вывода статистики, с (0 — не выводить)
+        self.workers = workers  # процессов-воркеров (0 — эффекты в этом процессе)
+        # темп вывода и имитация выпадений/заморозок/подтормаживаний
+        self.pacer = Pacer(self.fps, self.timing, pace=preset.get("pace", False))
+        self.runner = None
+        self.cap = None
+        self.sink = None
+        self.in_shape = None      # форма кадров источника (для подготовки нового конвейера)
+        self.swaps = 0
+        self.switch_ms = None     # от запроса смены пресета до первого кадра нового конвейера
+        self._pending = None      # подготовленный пресет, ждущий границы кадра
+        self._swap_lock = threading.Lock()
+        self._ops = collections.deque()  # изменения параметров, ждущие границы кадра
+        self.overrides = []       # [(стадия, параметры)], поменянные на ходу в текущем пресете
+        self._out_size = None     # (h, w), под которые открыт вывод
+
+    def open(self):
+        self.cap = self.open_source()
+        self.cap.pix_fmt = self.pipeline.fmt
+        if getattr(self.cap, "mode", None):
+            print("Захват:", cammodes.describe(self.cap.mode))
+        self.open_output(self.W, self.H)
+
+    def open_output(self, width, height):
+        opts = {"pix_fmt": self.pix_fmt} if self.pix_fmt else {}
+        self.sink = open_sink(self.sink_kind, self.out, width, height, self.fps, **opts)
+        if self.preview:
+            # превью GUI читает кадры отсюда, а не через v4l2loopback
+            self.sink = TeeSink(self.sink, ShmRingSink(self.preview, width, height, self.fps))
+        self._out_size = (height, width)
+
+    def write(self, frame):
+        """Кадр в вывод; после смены разрешения вывод переоткрывается под новый размер"""
+        w, h = frame_size(frame.shape)
+        if (h, w) != self._out_size:
+            self.sink.close()
+            self.open_output(w, h)
+        self.sink.write(frame)
+
+    def capture_need(self):
+        """Сколько нужно конвейеру от камеры: вход первой стадии или capture_size пресета"""
+        return self.pipeline.input_size() or self.preset.get("capture_size")
+
+    def update_capture(self):
+        """После смены конвейера — перевести камеру в режим под новые нужды (со следующего кадра)"""
+        need = self.capture_need()
+        if need and hasattr(self.cap, "request_size"):
+            self.cap.request_size(need)
+
+    def open_source(self):
+        kind = self.source_kind
+        capture = self.preset.get("capture_size")
+        if kind == "device":
+            # камера сама выбирает самый дешёвый режим под нужды конвейера
+            need = self.capture_need()
+            return open_source(kind, self.src, fps=self.fps if need else None, need=need, latest=self.latest)
+        cw, ch = capture or (self.W, self.H)
+        target = self.src
+        if kind == "synthetic" and target not in SyntheticSource.PATTERNS:
+            target = None
+        fps = self.source_fps
+        if fps is None and kind != "video":
+            fps = self.fps
+        return open_source(kind, target, cw, ch, fps)
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+        if self.sink is not None:
+            self.sink.close()
+            if self.report:
+                self.print_stats({"sink_" + k: v for k, v in self.sink.stats().items()})
+                self.print_stats(self.pacer.stats())
+        self.pipeline.close()
+
+    # ------------------ Цикл ------------------
+    def run(self):
+        if self.workers:
+            self.runner = ProcessRunner(self, self.workers)
+        elif self.threads:
+            self.runner = ThreadedRunner(self, self.queue_size, self.policy)
+        if self.runner is not None:
+            self.runner.run()
+        else:
+            self.run_serial()
+
+    def stats(self):
+        """Счётчики текущего режима (у последовательного — только темп вывода) и смен пресета"""
+        stats = self.runner.stats() if self.runner is not None else self.pacer.stats()
+        if self.cap is not None:
+            stats.update({"cap_" + k: v for k, v in self.cap.stats().items()})
+        if self.swaps:
+            stats.update(swaps=self.swaps, switch_ms=self.switch_ms)
+        return stats
+
+    def process(self, raw):
+        """Кадр через текущий конвейер; отложенная смена пресета — здесь, между кадрами"""
+        self.in_shape = raw.shape
+        while self._ops:
+            self._ops.popleft()()
+        pending = self._pending
+        if pending is None:
+            return self.pipeline.process(raw)
+        self._pending = None
+        name, preset, pipeline, overrides, t0, done = pending
+        old = self.pipeline
+        with trace.span("swap"):
+            self.pipeline = pipeline
+            self.preset, self.preset_name = preset, name
+            self.overrides = list(overrides)
+            self.timing = preset.get("timing", {})
+            self.pacer.retime(self.timing, preset.get("pace", False))
+            out = pipeline.process(raw)
+        self.update_capture()
+        self.switch_ms = round((time.perf_counter() - t0) * 1e3, 2)
+        self.swaps += 1
+        done.set()
+        old.close()
+        return out
+
+    # ------------------ Смена пресета на ходу ------------------
+    def prepare_preset(self, name, overrides=()):
+        """Пресет name под текущий вывод и готовый конвейер для него (кадры не трогает)"""
+        preset = get_preset(name, width=self.W, height=self.H, fps=self.fps)
+        if self.plan is not None:
+            preset["plan"] = self.plan
+        if self.yuv:
+            preset["fmt"] = "i420"
+        stages = list(preset["stages"])
+        if tuple(preset["size"]) != (self.W, self.H):
+            # вывод открыт под своё разрешение и не переоткрывается
+            stages.append(("resize", {"size": (self.W, self.H), "interpolation": "area"}))
+        pipeline = Pipeline.from_spec(stages, tiles=self.tiles, plan=preset.get("plan"),
+                                      fmt=preset.get("fmt", "bgr"))
+        for key, params in overrides:
+            pipeline.set_params(key, **params)
+        if self.in_shape is not None:
+            # таблицы, маски и буферы — заранее, а не на первом кадре после смены
+            pipeline.setup(self.in_shape)
+        return preset, pipeline
+
+    def swap_preset(self, name, wait=2.0, overrides=()):
+        """Подменить пресет между кадрами, не останавливая захват и вывод.
+
+        Конвейер собирается в вызывающем потоке, цикл только меняет ссылку
+        на границе кадра. Возвращает время подготовки и время до первого
+        кадра нового конвейера (None, если за wait секунд кадра не было).
+        """
+        self._check_live()
+        with self._swap_lock:
+            t0 = time.perf_counter()
+            preset, pipeline = self.prepare_preset(name, overrides)
+            prepare_ms = round((time.perf_counter() - t0) * 1e3, 2)
+            done = threading.Event()
+            self._pending = (name, preset, pipeline, overrides, t0, done)
+            if not done.wait(wait):
+                return {"preset": name, "prepare_ms": prepare_ms, "switch_ms": None}
+            return {"preset": name, "prepare_ms": prepare_ms, "switch_ms": self.switch_ms}
+
+    # ------------------ Параметры на ходу ------------------
+    def _check_live(self):
+        if self.workers:
+            raise RuntimeError("с --workers конвейер меняется только перезапуском")
+
+    def at_frame_boundary(self, fn, wait=2.0):
+        """Выполнить fn() в потоке обработки между кадрами и вернуть её результат"""
+        self._check_live()
+        done = threading.Event()
+        box = {}
+
+        def op():
+            try:
+                box["result"] = fn()
+            except Exception as e:
+                box["error"] = e
+            done.set()
+
+        self._ops.append(op)
+        if not done.wait(wait):
+            raise TimeoutError("нет кадров: изменение применится со следующим кадром")
+        if "error" in box:
+            raise box["error"]
+        return box["result"]
+
+    def set_params(self, stage, params, wait=2.0):
+        """Поменять параметры стадии (номер или имя) со следующего кадра"""
+        def apply():
+            rebuilt = self.pipeline.set_params(stage, **params)
+            self.overrides.append((stage, params))
+            self.update_capture()
+            return rebuilt
+
+        t0 = time.perf_counter()
+        rebuilt = self.at_frame_boundary(apply, wait)
+        return {"stage": stage, "rebuilt": rebuilt, "apply_ms": round((time.perf_counter() - t0) * 1e3, 2)}
+
+    def set_fps(self, fps, wait=2.0):
+        """Темп вывода (и генератора/картинок, если их fps не задан отдельно) со следующего кадра"""
+        def apply():
+            self.fps = fps
+            self.pacer.set_fps(fps)
+            if self.source_fps is None and self.source_kind in ("images", "synthetic"):
+                self.cap.fps = fps
+
+        self.at_frame_boundary(apply, wait)
+        return {"fps": fps}
+
+    def set_size(self, width, height, wait=2.0):
+        """Разрешение вывода: пресет пересобирается под него с сохранением правок параметров"""
+        self.W, self.H = int(width), int(height)
+        return self.swap_preset(self.preset_name, wait, self.overrides)
+
+    def run_serial(self):
+        last_report = time.monotonic()
+        raw = None
+        while True:
+            with trace.span("capture"):
+                # следующий кадр — в буфер предыдущего: в цикле кадры не выделяются
+                ret, frame = self.cap.read(raw)
+            if not ret:
+                # если нет кадра — пауза и повтор
+                time.sleep(0.05)
+                continue
+            raw = frame
+
+            frame = self.pacer.filter(self.process(raw))
+            if frame is not None:
+                try:
+                    with trace.span("sink.write"):
+                        self.write(frame)
+                except Exception as e:
+                    print("Ошибка записи в виртуальное устройство:", e)
+                    break
+            with trace.span("pace"):
+                self.pacer.tick(frame is not None, self.cap.last_ts)
+
+            if self.report and time.monotonic() - last_report >= self.report:
+                last_report = time.monotonic()
+                self.print_stats(self.stats())
+
+    def print_stats(self, stats):
+        print("[BadCam] " + " ".join(f"{k}={v}" for k, v in stats.items()))
+
+
+def build_parser(default_preset="hard-horrible"):
+    p = argparse.ArgumentParser()
+    p.add_argument('--src', default=0, help='камера (индекс или путь), видеофайл, папка картинок или шаблон генератора')
+    p.add_argument('--vdev', default='/dev/video2', help='виртуальное устройство (v4l2loopback)')
+    p.add_argument('--width', type=int, default=None)
+    p.add_argument('--height', type=int, default=None)
+    p.add_argument('--fps', type=int, default=None)
+    p.add_argument('--preset', choices=preset_names(), default=default_preset)
+    add_source_args(p)
+    add_sink_args(p)
+    add_runner_args(p)
+    return p
+
+
+def add_source_args(p):
+    """Параметры источника кадров (общие для всех конфигов)"""
+    p.add_argument('--source', choices=list(SOURCES), default=None,
+                   help='откуда брать кадры (по умолчанию по --src: камера, видео, папка или '
+                        + '/'.join(SyntheticSource.PATTERNS) + ')')
+    p.add_argument('--source-fps', type=float, default=None,
+                   help='частота кадров файла/картинок/генератора (0 — без ограничения)')
+    p.add_argument('--latest', action='store_true',
+                   help='камера: выбирать очередь драйвера в отдельном потоке и обрабатывать только свежий кадр')
+
+
+def add_sink_args(p):
+    """Параметры вывода (общие для всех конфигов)"""
+    p.add_argument('--sink', choices=list(SINKS), default=None, help='способ вывода (по умолчанию из пресета)')
+    p.add_argument('--out', default=None,
+                   help='куда писать для file/shm: путь к файлу или имя сегмента (по умолчанию --vdev)')
+    p.add_argument('--pix-fmt', choices=list(PIX_FORMATS), default=None,
+                   help='формат кадров для v4l2/file')
+    p.add_argument('--preview', default=None, metavar='NAME',
+                   help='дублировать выходные кадры в кольцо общей памяти NAME для превью')
+
+
+def add_runner_args(p):
+    """Параметры многопоточного режима (общие для всех конфигов)"""
+    p.add_argument('--threads', action='store_true', help='захват, обработка и вывод в отдельных потоках')
+    p.add_argument('--queue', type=int, default=2, help='ёмкость очередей между потоками')
+    p.add_argument('--policy', choices=['drop_oldest', 'block'], default='drop_oldest',
+                   help='переполнение очереди: выкинуть старый кадр или ждать')
+    p.add_argument('--report', type=float, default=0, help='выводить статистику очередей раз в N секунд')
+    p.add_argument('--workers', type=int, default=0,
+                   help='обрабатывать кадры в N процессах через общую память (для тяжёлых пресетов)')
+    p.add_argument('--tiles', type=int, default=0,
+                   help='считать стадии полосами кадра в N потоках (для 720p/1080p)')
+    p.add_argument('--plan', choices=['none', 'exact', 'approx'], default=None,
+                   help='перестановка стадий на маленький кадр пикселизации (по умолчанию из пресета; exact — кадр бит в бит тот же, '
+                        'approx — в допуске planner.APPROX_TOLERANCE, см. bench_planner)')
+    p.add_argument('--yuv', action='store_true',
+                   help='гнать кадры через конвейер в I420 (yuv420p): цвет переводится один раз, при захвате')
+    p.add_argument('--trace', default=None, metavar='PATH',
+                   help='писать трассу стадий и ввода-вывода; дамп в PATH при выходе и по SIGUSR1')
+    p.add_argument('--trace-size', type=int, default=1 << 16, help='ёмкость кольца трассы, отрезков')
+    p.add_argument('--stats', default=None, metavar='COMET',
+                   help='публиковать метрики в канал статистики LuminaX (панель в настройках); '
+                        'задержки стадий — лёгкими счётчиками, трасса не включается')
+
+
+def start_trace(args):
+    """Включить трассировку, если задан --trace"""
+    if args.trace:
+        trace.enable(args.trace_size)
+        trace.dump_on_signal(args.trace)
+
+
+def start_stats(args, rt):
+    """Поток публикации метрик, если задан --stats (иначе None)"""
+    # terminate() из GUI — обычный выход, чтобы отработали finally и общая память убралась
+    signal.signal(signal.SIGTERM, lambda signo, frame: sys.exit(0))
+    if not args.stats:
+        return None
+    publisher = StatsPublisher(rt, args.stats)
+    publisher.start()
+    return publisher
+
+
+def finish_trace(args):
+    """Снять последний дамп трассы и вывести сводку"""
+    if args.trace and trace.tracer is not None:
+        trace.print_summary(trace.tracer.dump(args.trace))
+        print(f"[BadCam] трасса записана: {args.trace}")
+
+
+def main(default_preset="hard-horrible", argv=None):
+    args = build_parser(default_preset).parse_args(argv)
+    run(args)
+
+
+def run(args):
+    rt = BadCamRuntime(args.preset, src=args.src, vdev=args.vdev, sink=args.sink,
+                       width=args.width, height=args.height, fps=args.fps,
+                       threads=args.threads, queue_size=args.queue, policy=args.policy, report=args.report,
+                       workers=args.workers, tiles=args.tiles,
+                       out=args.out, pix_fmt=args.pix_fmt,
+                       source=args.source, source_fps=args.source_fps, preview=args.preview,
+                       latest=args.latest, plan=args.plan, yuv=args.yuv)
+    print("Запуск: src=%s %s=%s %dx%d@%dfps preset=%s" % (rt.src, rt.sink_kind, rt.out, rt.W, rt.H, rt.fps, args.preset))
+    start_trace(args)
+    rt.open()
+    publisher = start_stats(args, rt)
+    try:
+        rt.run()
+    finally:
+        if publisher is not None:
+            publisher.stop()
+        rt.close()
+        finish_trace(args)
@@ -0,0 +1,130 @@
+"""Кольцо последних кадров в общей памяти.
+
+Писатель (ShmRingSink) кладёт кадр в следующий слот и увеличивает
+счётчик; читатель (ShmRingReader) берёт самый свежий слот. Блокировок
+нет: у каждого слота свой номер кадра, читатель сверяет его до и после
+копирования и повторяет, если слот успели перезаписать. Читать можно из
+того же процесса или из любого другого по имени сегмента.
+
+Раскладка: заголовок _HEADER, номера кадров слотов (uint64 на слот),
+затем слоты кадров подряд.
+"""
+
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+_MAGIC = b"BCRING01"
+# magic, высота, ширина, каналы, слотов
+_HEADER = struct.Struct("=8sIIII")
+_SEQ_OFFSET = 32   # счётчик кадров (uint64) после заголовка
+
+
+class ShmRing:
+    """Сегмент общей памяти с кольцом кадров (общая часть писателя и читателя)"""
+
+    def __init__(self, shm, shape, slots):
+        self.shm = shm
+        self.shape = tuple(shape)
+        self.slots = slots
+        size = int(np.prod(self.shape))
+        self.seq = np.ndarray((1,), np.uint64, shm.buf, _SEQ_OFFSET)
+        self.slot_seq = np.ndarray((slots,), np.uint64, shm.buf, _SEQ_OFFSET + 8)
+        base = _SEQ_OFFSET + 8 * (slots + 1)
+        self.frames = [np.ndarray(self.shape, np.uint8, shm.buf, base + i * size) for i in range(slots)]
+
+    @staticmethod
+    def nbytes(shape, slots):
+        return _SEQ_OFFSET + 8 * (slots + 1) + slots * int(np.prod(shape))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        # виды на буфер нужно отпустить до закрытия памяти
+        self.seq = self.slot_seq = None
+        self.frames = []
+        self.shm.close()
+
+
+class ShmRingWriter(ShmRing):
+    def __init__(self, name, shape, slots=3):
+        size = self.nbytes(shape, slots)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # сегмент остался от упавшего процесса
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        h, w = shape[:2]
+        c = shape[2] if len(shape) > 2 else 1
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, h, w, c, slots)
+        super().__init__(shm, shape, slots)
+        self.seq[0] = 0
+        self.slot_seq[:] = 0
+
+    def put(self, frame):
+        n = int(self.seq[0])
+        slot = n % self.slots
+        self.slot_seq[slot] = 0          # слот в записи
+        np.copyto(self.frames[slot], frame)
+        self.slot_seq[slot] = n + 1
+        self.seq[0] = n + 1
+
+    def close(self, unlink=True):
+        shm = self.shm
+        super().close()
+        if unlink:
+            shm.unlink()
+
+
+class ShmRingReader(ShmRing):
+    def __init__(self, name):
+        shm = shared_memory.SharedMemory(name=name)
+        # сегмент принадлежит писателю: трекер читателя не должен удалять его при выходе
+        resource_tracker.unregister(shm._name, "shared_memory")
+        magic, h, w, c, slots = _HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC:
+            shm.close()
+            raise ValueError(f"Сегмент {name} — не кольцо кадров BadCam")
+        super().__init__(shm, (h, w, c) if c > 1 else (h, w), slots)
+        self.last = 0
+
+    def peek(self):
+        """(номер, вид на слот) самого свежего кадра без копирования или (None, None).
+
+        Вид действителен, пока писатель не дошёл до этого слота снова:
+        после использования проверьте valid(номер).
+        """
+        n = int(self.seq[0])
+        if n == 0 or n == self.last:
+            return None, None
+        return n, self.frames[(n - 1) % self.slots]
+
+    def valid(self, n):
+        """Слот кадра n не перезаписан; запоминает n как прочитанный"""
+        if int(self.slot_seq[(n - 1) % self.slots]) != n:
+            return False
+        self.last = n
+        return True
+
+    def latest(self, out=None, retries=3):
+        """Копия самого свежего кадра или None, если нового кадра нет"""
+        for _ in range(retries):
+            n = int(self.seq[0])
+            if n == 0 or n == self.last:
+                return None
+            slot = (n - 1) % self.slots
+            if int(self.slot_seq[slot]) != n:
+                continue
+            if out is None:
+                out = np.empty(self.shape, np.uint8)
+            np.copyto(out, self.frames[slot])
+            if int(self.slot_seq[slot]) == n:
+                self.last = n
+                return out
+        return None
@@ -0,0 +1,285 @@
+"""Выводы BadCam: куда уходят обработанные кадры.
+
+Все выводы создаются одинаково — cls(target, width, height, fps, **opts),
+где target — устройство, путь к файлу или имя сегмента общей памяти, — и
+умеют write(frame), close() и stats() (сколько кадров и байт ушло).
+Кадр — BGR или I420 (effects/yuv.py, конвейер с --yuv): I420 уходит в
+yuv420p как есть, в остальные форматы — одним переводом.
+"""
+
+import errno
+import fcntl
+import os
+import struct
+import subprocess
+
+import cv2
+import numpy as np
+
+from comets.badcam.effects.yuv import is_i420, to_bgr, to_yuyv
+from comets.badcam.shmring import ShmRingWriter
+
+
+class Sink:
+    """Общий интерфейс вывода"""
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    def write(self, frame):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {"frames": self.frames, "bytes": self.bytes}
+
+
+class NullSink(Sink):
+    """Выбрасывает кадры, только считает их — для замеров без устройства"""
+
+    def __init__(self, target=None, width=None, height=None, fps=None):
+        super().__init__()
+
+    def write(self, frame):
+        self.frames += 1
+        self.bytes += frame.nbytes
+
+
+class ShmRingSink(Sink):
+    """Кольцо последних кадров в общей памяти (см. shmring.py); target — имя сегмента"""
+
+    def __init__(self, target, width, height, fps, slots=3):
+        super().__init__()
+        self.ring = ShmRingWriter(target, (height, width, 3), slots)
+        self._bgr = None   # превью читает BGR
+
+    def write(self, frame):
+        if is_i420(frame.shape):
+            self._bgr = to_bgr(frame, self._bgr)
+            self.ring.put(self._bgr)
+        else:
+            self.ring.put(frame)
+        self.frames += 1
+        self.bytes += frame.nbytes
+
+    def close(self):
+        self.ring.close()
+
+
+class TeeSink(Sink):
+    """Кадр уходит в основной вывод и копией — в дополнительные (например, кольцо превью)"""
+
+    def __init__(self, primary, *taps):
+        super().__init__()
+        self.primary = primary
+        self.taps = taps
+
+    def write(self, frame):
+        self.primary.write(frame)
+        for tap in self.taps:
+            tap.write(frame)
+
+    def close(self):
+        for sink in (self.primary, *self.taps):
+            sink.close()
+
+    def stats(self):
+        return self.primary.stats()
+
+
+class FFmpegSink(Sink):
+    """Вывод в виртуальную камеру через процесс ffmpeg (bgr24 или yuv420p -> yuv420p).
+
+    ffmpeg запускается на первом кадре: формат входа — по кадру.
+    """
+
+    def __init__(self, vdev, width, height, fps):
+        super().__init__()
+        self.vdev = vdev
+        self.width, self.height, self.fps = width, height, fps
+        self.proc = None
+
+    def _start(self, pix_fmt):
+        self.proc = subprocess.Popen([
+            "ffmpeg",
+            "-y",
+            "-f", "rawvideo",
+            "-vcodec", "rawvideo",
+            "-pix_fmt", pix_fmt,
+            "-s", f"{self.width}x{self.height}",
+            "-r", str(self.fps),
+            "-i", "-",                     # stdin
+            "-f", "v4l2",
+            "-pix_fmt", "yuv420p",
+            self.vdev
+        ], stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        if self.proc is None:
+            self._start("yuv420p" if is_i420(frame.shape) else "bgr24")
+        # без tobytes(): копия кадра на каждый write не нужна
+        self.proc.stdin.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+        self.frames += 1
+        self.bytes += frame.nbytes
+
+    def close(self):
+        if self.proc is not None:
+            self.proc.stdin.close()
+            self.proc.wait()
+
+
+class FakeWebcamSink(Sink):
+    """Вывод через pyfakewebcam (ждёт RGB)"""
+
+    def __init__(self, vdev, width, height, fps):
+        super().__init__()
+        import pyfakewebcam
+        self.cam = pyfakewebcam.FakeWebcam(vdev, width, height)
+        self._rgb = None
+
+    def write(self, frame):
+        code = cv2.COLOR_YUV2RGB_I420 if is_i420(frame.shape) else cv2.COLOR_BGR2RGB
+        self._rgb = cv2.cvtColor(frame, code, dst=self._rgb)
+        self.cam.schedule_frame(self._rgb)
+        self.frames += 1
+        self.bytes += frame.nbytes
+
+
+# ------------------ V4L2 напрямую ------------------
+def _fourcc(code):
+    return struct.unpack("<I", code.encode())[0]
+
+
+# struct v4l2_format: type + 4 байта выравнивания + union fmt[200]
+_FMT = struct.Struct("=I4x12I152x")
+_VIDIOC_S_FMT = (3 << 30) | (_FMT.size << 16) | (ord("V") << 8) | 5
+_BUF_TYPE_VIDEO_OUTPUT = 2
+_FIELD_NONE = 1
+_COLORSPACE_SRGB = 8
+
+# формат -> (fourcc, cvtColor-код или None, форма буфера (h, w) -> shape)
+PIX_FORMATS = {
+    "yuv420p": ("YU12", cv2.COLOR_BGR2YUV_I420, lambda h, w: (h * 3 // 2, w)),
+    "bgr24": ("BGR3", None, lambda h, w: (h, w, 3)),
+    "rgb24": ("RGB3", cv2.COLOR_BGR2RGB, lambda h, w: (h, w, 3)),
+}
+if hasattr(cv2, "COLOR_BGR2YUV_YUYV"):
+    PIX_FORMATS["yuyv"] = ("YUYV", cv2.COLOR_BGR2YUV_YUYV, lambda h, w: (h, w, 2))
+
+# формат -> cvtColor-код для кадров I420 (None — пишется как есть, yuyv — to_yuyv)
+I420_CODES = {
+    "yuv420p": None,
+    "bgr24": cv2.COLOR_YUV2BGR_I420,
+    "rgb24": cv2.COLOR_YUV2RGB_I420,
+}
+
+
+class V4L2Sink(Sink):
+    """Вывод прямо в устройство v4l2loopback, без ffmpeg и pyfakewebcam.
+
+    Формат согласуется через VIDIOC_S_FMT; если драйвер выбрал другой
+    поддерживаемый формат, пишем в нём. Кадр конвертируется cv2.cvtColor
+    в заранее выделенный буфер и уходит одним write(). Вместо устройства
+    можно передать обычный файл или FIFO — тогда согласование пропускается.
+    """
+
+    default_pix_fmt = "yuv420p"
+    open_flags = os.O_WRONLY
+
+    def __init__(self, vdev, width, height, fps, pix_fmt=None):
+        super().__init__()
+        pix_fmt = pix_fmt or self.default_pix_fmt
+        if pix_fmt not in PIX_FORMATS:
+            raise ValueError(f"Неподдерживаемый формат вывода: {pix_fmt}")
+        self.width, self.height = width, height
+        self.fd = os.open(vdev, self.open_flags, 0o644)
+        try:
+            self.pix_fmt = self._negotiate(pix_fmt)
+        except BaseException:
+            os.close(self.fd)
+            raise
+        _, self._code, shape = PIX_FORMATS[self.pix_fmt]
+        self.buf = np.empty(shape(height, width), np.uint8)
+        self._view = memoryview(self.buf).cast("B")
+
+    def _negotiate(self, pix_fmt):
+        """Выставить формат устройству; вернуть формат, который оно приняло"""
+        fourcc = _fourcc(PIX_FORMATS[pix_fmt][0])
+        req = bytearray(_FMT.pack(_BUF_TYPE_VIDEO_OUTPUT, self.width, self.height, fourcc,
+                                  _FIELD_NONE, 0, 0, _COLORSPACE_SRGB, 0, 0, 0, 0, 0))
+        try:
+            fcntl.ioctl(self.fd, _VIDIOC_S_FMT, req)
+        except OSError as e:
+            if e.errno in (errno.ENOTTY, errno.EINVAL):
+                # обычный файл/FIFO или драйвер без S_FMT — пишем как просили
+                return pix_fmt
+            raise
+        _, width, height, got = _FMT.unpack(req)[:4]
+        if (width, height) != (self.width, self.height):
+            raise ValueError(f"Устройство приняло {width}x{height} вместо {self.width}x{self.height}")
+        for name, (code, _, _) in PIX_FORMATS.items():
+            if _fourcc(code) == got:
+                return name
+        raise ValueError(f"Устройство выбрало неподдерживаемый формат {struct.pack('<I', got)!r}")
+
+    def write(self, frame):
+        code = self._code
+        if is_i420(frame.shape):
+            code = I420_CODES.get(self.pix_fmt)
+            if self.pix_fmt == "yuyv":
+                to_yuyv(frame, self.buf)
+                frame = self.buf
+        if code is not None:
+            cv2.cvtColor(frame, code, dst=self.buf)
+            view = self._view
+        elif frame.flags.c_contiguous:
+            view = memoryview(frame).cast("B")
+        else:
+            np.copyto(self.buf, frame)
+            view = self._view
+        self.bytes += len(view)
+        while view:
+            view = view[os.write(self.fd, view):]
+        self.frames += 1
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class RawFileSink(V4L2Sink):
+    """Сырые кадры подряд в файл (по умолчанию bgr24, как отдаёт конвейер)"""
+
+    default_pix_fmt = "bgr24"
+    open_flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+
+    def _negotiate(self, pix_fmt):
+        return pix_fmt
+
+
+SINKS = {
+    "v4l2": V4L2Sink,
+    "ffmpeg": FFmpegSink,
+    "fakewebcam": FakeWebcamSink,
+    "file": RawFileSink,
+    "null": NullSink,
+    "shm": ShmRingSink,
+}
+
+# куда писать, если цель не задана явно (для v4l2/ffmpeg/fakewebcam — устройство)
+DEFAULT_TARGETS = {
+    "file": "badcam.raw",
+    "shm": "badcam",
+}
+
+
+def open_sink(kind, vdev, width, height, fps, **opts):
+    try:
+        cls = SINKS[kind]
+    except KeyError:
+        raise KeyError(f"Неизвестный вывод: {kind}") from None
+    return cls(vdev, width, height, fps, **opts)
@@ -0,0 +1,427 @@
+"""Источники кадров BadCam: камера, видеофайл по кругу, папка картинок, генератор.
+
+Все источники ведут себя как cv2.VideoCapture там, где это нужно
+конвейеру: read(buf=None) -> (ok, frame) (кадр пишется в buf, если он
+подходит по размеру) и release(). Файлы, картинки и генератор отдают
+кадры с заданной частотой fps; fps=0 — без ограничения, так быстро, как
+их забирают (для нагрузки и профилирования без камеры).
+
+После read() в last_ts — момент захвата отданного кадра (time.monotonic):
+по нему считается возраст кадра на выходе.
+
+pix_fmt="i420" — отдавать кадры в I420 (см. effects/yuv.py): цвет
+переводится один раз, здесь, а не в каждой стадии и в выводе.
+"""
+
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from comets.badcam import cammodes
+from comets.badcam.effects.yuv import from_bgr
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+# штамп кадра: 2 строки по 32 клетки (номер кадра и время в мс), см. decode_stamp
+STAMP_BITS = 32
+STAMP_ROWS = 2
+
+REDUCED_DECODE = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+
+class Source:
+    """Общая часть источников: ограничение частоты кадров и формат кадров"""
+
+    pix_fmt = "bgr"   # "i420" — _deliver переводит кадр в I420
+
+    def __init__(self, fps=0):
+        self.fps = fps
+        self.frames = 0
+        self.last_ts = None   # когда захвачен кадр последнего read() (monotonic)
+        self._deadline = None
+
+    def _pace(self):
+        if not self.fps:
+            return
+        now = time.monotonic()
+        if self._deadline is None or now - self._deadline > 1.0:
+            # первый кадр или долго не читали — не отдаём пачку кадров подряд
+            self._deadline = now
+        delay = self._deadline - now
+        if delay > 0:
+            time.sleep(delay)
+        self._deadline += 1.0 / self.fps
+
+    def _deliver(self, frame, buf, ts=None):
+        """Отдать кадр в buf (если подходит) или в новом массиве; ts — момент захвата (по умолчанию сейчас)"""
+        self.frames += 1
+        self.last_ts = time.monotonic() if ts is None else ts
+        shape = frame.shape
+        if self.pix_fmt == "i420":
+            shape = (frame.shape[0] * 3 // 2, frame.shape[1])
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, np.uint8)
+        if self.pix_fmt == "i420":
+            from_bgr(frame, buf)
+        else:
+            np.copyto(buf, frame)
+        return True, buf
+
+    def read(self, buf=None):
+        raise NotImplementedError
+
+    def isOpened(self):
+        return True
+
+    def stats(self):
+        """Счётчики источника для статистики (у большинства — пусто)"""
+        return {}
+
+    def release(self):
+        pass
+
+
+class DeviceSource(Source):
+    """Настоящая камера (индекс или путь к устройству).
+
+    need=(w, h) — сколько нужно конвейеру: камера переключается в самый
+    дешёвый родной режим, который его покрывает (см. cammodes.py), и
+    большой MJPEG декодируется сразу уменьшенным. Без need — режим по
+    умолчанию или ровно width x height, как раньше. Выбранный режим —
+    в self.mode.
+
+    latest=True — режим низкой задержки. Драйвер и cv2.VideoCapture держат
+    очередь из нескольких кадров, и отстающий конвейер обрабатывал бы
+    кадры сотни миллисекунд назад. Здесь отдельный поток непрерывно
+    выбирает очередь grab()-ом (без декодирования), а read() декодирует
+    (retrieve) только самый свежий кадр; непрочитанные считаются в
+    drained. grab() и retrieve() одного VideoCapture не идут параллельно.
+    """
+
+    def __init__(self, target=0, width=None, height=None, fps=None, need=None, latest=False):
+        super().__init__(0)   # частоту задаёт сама камера
+        self.target = target
+        self.cap = cv2.VideoCapture(target)
+        self.mode = None
+        self.reduce = 1       # во сколько раз уменьшать JPEG при декодировании
+        self._need = None
+        self._want = None     # новый need, запрошенный из другого потока (request_size)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        if need:
+            self.negotiate(need)
+        elif width and height:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.latest = latest
+        self.grabbed = 0      # кадров выбрано из очереди драйвера
+        self.drained = 0      # из них выброшено без декодирования
+        self._grabbed_ts = None
+        self._read_seq = 0    # какой по счёту grab отдан последним read()
+        self._waiting = False
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._grabber = None
+        self._bgr = None      # кадр камеры до перевода в I420 (pix_fmt="i420")
+        if latest and self.cap.isOpened():
+            self._grabber = threading.Thread(target=self._grab_loop, name="badcam-grab", daemon=True)
+            self._grabber.start()
+
+    def negotiate(self, need):
+        """Переключить камеру в самый дешёвый режим, покрывающий need=(w, h)"""
+        need = tuple(need)
+        mode = cammodes.choose_mode(cammodes.list_modes(self.target), need)
+        if mode is None:
+            # режимы узнать не удалось: просим need, драйвер подберёт ближайший
+            mode = {"fourcc": None, "size": need, "reduce": 1}
+        current = self.mode and (self.mode["fourcc"], self.mode["size"])
+        if current != (mode["fourcc"], mode["size"]):
+            if mode["fourcc"]:
+                self.cap.set(cv2.CAP_PROP_FOURCC, cammodes.fourcc_code(mode["fourcc"]))
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode["size"][0])
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode["size"][1])
+        # что камера поставила на самом деле
+        size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        code = int(self.cap.get(cv2.CAP_PROP_FOURCC)) & 0xFFFFFFFF
+        fourcc = cammodes.fourcc_str(code) if code else mode["fourcc"]
+        reduce = cammodes.reduce_factor(size, need) if fourcc in cammodes.JPEG_FOURCCS else 1
+        # сжатый кадр как есть (чтобы декодировать его самим) умеет отдавать бэкенд V4L2
+        if reduce > 1 and (self.cap.getBackendName() != "V4L2"
+                           or not self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)):
+            reduce = 1
+        if reduce == 1 and self.reduce > 1:
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+        self.reduce = reduce
+        self._need = need
+        self.mode = {"fourcc": fourcc, "size": size, "reduce": reduce,
+                     "decode": (size[0] // reduce, size[1] // reduce), "need": need}
+        return self.mode
+
+    def request_size(self, need):
+        """Поменять need со следующего read() (можно из другого потока)"""
+        self._want = tuple(need)
+
+    def _grab_loop(self):
+        cond = self._cond
+        while True:
+            with cond:
+                # свежий кадр уже ждёт read() — не затирать его следующим grab()
+                cond.wait_for(lambda: self._stopped or not (self._waiting and self.grabbed != self._read_seq))
+                if self._stopped:
+                    return
+                ok = self.cap.grab()
+                if ok:
+                    if self.grabbed != self._read_seq:
+                        self.drained += 1
+                    self.grabbed += 1
+                    self._grabbed_ts = time.monotonic()
+                    cond.notify_all()
+            if not ok:
+                time.sleep(0.01)
+
+    def _target(self, buf):
+        """Куда камере писать готовый BGR: прямо в buf или в свой буфер перед переводом в I420"""
+        return buf if self.pix_fmt == "bgr" else self._bgr
+
+    def _decode(self, data, buf):
+        """Кадр из retrieve()/read(): сжатый JPEG при уменьшенном декоде или готовый BGR"""
+        if self.reduce > 1:
+            data = data.reshape(-1)
+            if data[:2].tobytes() == b"\xff\xd8":
+                return self._deliver(cv2.imdecode(data, REDUCED_DECODE[self.reduce]), buf, self.last_ts)
+            # бэкенд отдал не JPEG: дальше пусть декодирует сам, в полный размер
+            print("Уменьшенный декод JPEG недоступен для", self.target)
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            self.reduce = 1
+            self.mode.update(reduce=1, decode=self.mode["size"])
+            return False, None
+        if self.pix_fmt != "bgr":
+            self._bgr = data
+            return self._deliver(data, buf, self.last_ts)
+        self.frames += 1
+        return True, data
+
+    def read(self, buf=None):
+        if self._grabber is not None:
+            return self._read_latest(buf)
+        want = self._want
+        if want is not None and want != self._need:
+            self.negotiate(want)
+        target = self._target(buf)
+        if self.reduce > 1:
+            ret, data = self.cap.read()
+        else:
+            ret, data = self.cap.read(target) if target is not None else self.cap.read()
+        if not ret:
+            return ret, data
+        self.last_ts = time.monotonic()
+        return self._decode(data, buf)
+
+    def _read_latest(self, buf, timeout=1.0):
+        cond = self._cond
+        with cond:
+            want = self._want
+            if want is not None and want != self._need:
+                self.negotiate(want)
+            self._waiting = True
+            try:
+                if not cond.wait_for(lambda: self.grabbed != self._read_seq or self._stopped, timeout):
+                    return False, None
+                if self._stopped:
+                    return False, None
+                self._read_seq = self.grabbed
+                self.last_ts = self._grabbed_ts
+                target = self._target(buf)
+                if self.reduce > 1:
+                    ret, data = self.cap.retrieve()
+                else:
+                    ret, data = self.cap.retrieve(target) if target is not None else self.cap.retrieve()
+            finally:
+                self._waiting = False
+                cond.notify_all()
+            if not ret:
+                return ret, data
+            return self._decode(data, buf)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def stats(self):
+        if self._grabber is None:
+            return {}
+        return {"grabbed": self.grabbed, "drained": self.drained}
+
+    def release(self):
+        if self._grabber is not None:
+            with self._cond:
+                self._stopped = True
+                self._cond.notify_all()
+            self._grabber.join(timeout=2)
+        self.cap.release()
+
+
+class VideoFileSource(Source):
+    """Видеофайл по кругу; fps=None — родная частота файла"""
+
+    def __init__(self, target, width=None, height=None, fps=None):
+        self.cap = cv2.VideoCapture(target)
+        if not self.cap.isOpened():
+            raise FileNotFoundError(f"Не удалось открыть видео: {target}")
+        if fps is None:
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        super().__init__(fps)
+        self.size = (width, height) if width and height else None
+        self._raw = None      # декодированный кадр и его уменьшенная копия — между read() одни и те же
+        self._sized = None
+
+    def read(self, buf=None):
+        ret, frame = self.cap.read(self._raw)
+        if not ret:
+            # конец файла — сначала
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(self._raw)
+            if not ret:
+                return False, None
+        self._raw = frame
+        if self.size and frame.shape[1::-1] != self.size:
+            frame = self._sized = cv2.resize(frame, self.size, dst=self._sized, interpolation=cv2.INTER_AREA)
+        self._pace()
+        return self._deliver(frame, buf)
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirSource(Source):
+    """Картинки из папки по кругу (загружаются один раз, в порядке имён)"""
+
+    def __init__(self, target, width=None, height=None, fps=30):
+        super().__init__(fps)
+        names = sorted(n for n in os.listdir(target) if n.lower().endswith(IMAGE_EXTS))
+        self.images = []
+        for n in names:
+            img = cv2.imread(os.path.join(target, n), cv2.IMREAD_COLOR)
+            if img is None:
+                continue
+            if width and height and img.shape[1::-1] != (width, height):
+                img = cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
+            self.images.append(img)
+        if not self.images:
+            raise FileNotFoundError(f"В папке нет картинок: {target}")
+
+    def read(self, buf=None):
+        frame = self.images[self.frames % len(self.images)]
+        self._pace()
+        return self._deliver(frame, buf)
+
+
+class SyntheticSource(Source):
+    """Генератор тестовых кадров без камеры.
+
+    pattern='gradient' — цветные градиенты, ползущие по кадру;
+    pattern='timestamp' — цветные полосы со штампом номера кадра и времени
+    (читается decode_stamp). Градиент считается один раз с запасом в
+    период по ширине, кадр — это сдвинутый вид на него.
+    """
+
+    PATTERNS = ("gradient", "timestamp")
+
+    def __init__(self, target="gradient", width=640, height=480, fps=0):
+        super().__init__(fps)
+        pattern = target or "gradient"
+        if pattern not in self.PATTERNS:
+            raise ValueError(f"Неизвестный шаблон: {pattern}")
+        self.pattern = pattern
+        self.shape = (height, width, 3)
+        self._bgr = None      # кадр до перевода в I420 (pix_fmt="i420")
+        self._t0 = time.monotonic()
+        if pattern == "gradient":
+            x = np.arange(width + 256)
+            y = np.arange(height)[:, None]
+            self._base = np.stack([
+                (x + y // 2) % 256,
+                np.broadcast_to((x // 2) % 256, (height, width + 256)),
+                (255 - (x + y) % 256),
+            ], axis=-1).astype(np.uint8)
+        else:
+            bars = np.array([[255, 255, 255], [0, 255, 255], [255, 255, 0], [0, 255, 0],
+                             [255, 0, 255], [0, 0, 255], [255, 0, 0], [0, 0, 0]], np.uint8)
+            self._base = bars[np.arange(width) * len(bars) // width][None].repeat(height, 0)
+
+    def read(self, buf=None):
+        self._pace()
+        frame = buf if self.pix_fmt == "bgr" else self._bgr
+        if frame is None or frame.shape != self.shape:
+            frame = np.empty(self.shape, np.uint8)
+        if self.pattern == "gradient":
+            off = (self.frames * 4) % 256
+            np.copyto(frame, self._base[:, off:off + self.shape[1]])
+        else:
+            np.copyto(frame, self._base)
+            stamp(frame, self.frames, int((time.monotonic() - self._t0) * 1000))
+        if self.pix_fmt != "bgr":
+            self._bgr = frame
+            return self._deliver(frame, buf)
+        self.frames += 1
+        self.last_ts = time.monotonic()
+        return True, frame
+
+
+def _stamp_cell(width):
+    return max(2, width // STAMP_BITS)
+
+
+def stamp(frame, index, ms):
+    """Записать номер кадра и время (мс) чёрно-белыми клетками в верх кадра"""
+    cell = _stamp_cell(frame.shape[1])
+    for row, value in enumerate((index, ms)):
+        value &= (1 << STAMP_BITS) - 1
+        bits = (value >> np.arange(STAMP_BITS - 1, -1, -1)) & 1
+        line = np.repeat(bits.astype(np.uint8) * 255, cell)
+        frame[row * cell:(row + 1) * cell, :len(line)] = line[None, :, None]
+
+
+def decode_stamp(frame):
+    """(номер кадра, время в мс) из штампа stamp(); кадр должен быть без эффектов"""
+    cell = _stamp_cell(frame.shape[1])
+    values = []
+    for row in range(STAMP_ROWS):
+        y = row * cell + cell // 2
+        centers = np.arange(STAMP_BITS) * cell + cell // 2
+        bits = frame[y, centers].mean(axis=-1) > 127
+        values.append(int(np.dot(bits, 1 << np.arange(STAMP_BITS - 1, -1, -1, dtype=np.int64))))
+    return tuple(values)
+
+
+SOURCES = {
+    "device": DeviceSource,
+    "video": VideoFileSource,
+    "images": ImageDirSource,
+    "synthetic": SyntheticSource,
+}
+
+
+def guess_source(src):
+    """Вид источника по --src: папка, файл, шаблон генератора или камера"""
+    src = str(src)
+    if src in SyntheticSource.PATTERNS:
+        return "synthetic"
+    if os.path.isdir(src):
+        return "images"
+    if os.path.isfile(src) and not src.startswith("/dev/"):
+        return "video"
+    return "device"
+
+
+def open_source(kind, target, width=None, height=None, fps=None, **opts):
+    """Открыть источник; fps=None — частота по умолчанию для вида источника"""
+    try:
+        cls = SOURCES[kind]
+    except KeyError:
+        raise KeyError(f"Неизвестный источник: {kind}") from None
+    if fps is None:
+        return cls(target, width, height, **opts)
+    return cls(target, width, height, fps, **opts)
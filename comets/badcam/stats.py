@@ -0,0 +1,63 @@
+"""Публикация метрик BadCam в канал статистики LuminaX (modules/stats_channel.py).
+
+Отдельный поток раз в period секунд собирает счётчики рантайма (темп,
+очереди, выпадения) и задержки стадий за этот период (trace.counters:
+среднее и максимум, трасса для этого не включается) и пишет снимок в
+общую память. Панель в настройках LuminaX читает его без разбора stdout.
+"""
+
+import os
+import threading
+import time
+
+from comets.badcam import trace
+from modules.stats_channel import StatsWriter
+
+
+class StatsPublisher:
+    def __init__(self, rt, comet="badcam", period=0.5):
+        self.rt = rt
+        self.comet = comet
+        self.period = period
+        self.writer = None
+        self.counters = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.counters = trace.enable_counters()
+        self.writer = StatsWriter(self.comet)
+        self._thread = threading.Thread(target=self._loop, name="badcam-stats", daemon=True)
+        self._thread.start()
+
+    def snapshot(self):
+        rt = self.rt
+        data = {
+            "comet": self.comet,
+            "pid": os.getpid(),
+            "time": time.time(),
+            "preset": rt.preset_name,
+            "size": [rt.W, rt.H],
+            "target_fps": rt.fps,
+            "runner": rt.stats(),
+        }
+        if self.counters is not None:
+            data["stages"] = [[name, s["mean_ms"], s["max_ms"]] for name, s in self.counters.take().items()]
+        return data
+
+    def _loop(self):
+        while not self._stop.wait(self.period):
+            try:
+                self.writer.publish(self.snapshot())
+            except Exception as e:
+                print("Ошибка публикации статистики:", e)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        trace.disable_counters()
+        self.counters = None
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
@@ -0,0 +1,212 @@
+"""Трассировка BadCam: длительности стадий и ввода-вывода по кадрам.
+
+По умолчанию выключена: конвейер и циклы проверяют одну глобальную
+переменную `tracer` и при None ничего не меряют. enable() включает
+запись отрезков (имя, поток, начало, длительность, номер кадра) в
+кольцевой буфер фиксированного размера — старые отрезки затираются,
+память не растёт. dump() пишет буфер в формате Chrome trace_event
+(открывается в chrome://tracing и Perfetto) и рядом — сводку с
+гистограммами длительностей по каждому имени.
+
+Из CLI: --trace PATH включает запись; дамп снимается при выходе и по
+сигналу SIGUSR1 (его же шлёт кнопка в GUI).
+
+Отдельно от трассы — `counters` (enable_counters()): только сумма, число
+и максимум длительности стадий с прошлого снятия, без отрезков и кольца.
+Их включает --stats для панели производительности.
+"""
+
+import contextlib
+import itertools
+import json
+import os
+import signal
+import threading
+import time
+
+import numpy as np
+
+# границы корзин гистограммы, мкс
+HIST_EDGES_US = (0, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, float("inf"))
+
+tracer = None
+counters = None
+_NULL = contextlib.nullcontext()
+
+
+class Tracer:
+    def __init__(self, capacity=1 << 16):
+        self.capacity = capacity
+        self.names = []
+        self._name_ids = {}
+        self._threads = {}
+        self._name_id = np.zeros(capacity, np.int32)
+        self._tid = np.zeros(capacity, np.int64)
+        self._ts = np.zeros(capacity, np.int64)
+        self._dur = np.zeros(capacity, np.int64)
+        self._frame = np.zeros(capacity, np.int64)
+        # next() у itertools.count атомарен под GIL: запись из разных потоков без блокировки
+        self._counter = itertools.count()
+        self._written = 0
+        self._t0 = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def name_id(self, name):
+        nid = self._name_ids.get(name)
+        if nid is None:
+            with self._lock:
+                nid = self._name_ids.get(name)
+                if nid is None:
+                    nid = self._name_ids[name] = len(self.names)
+                    self.names.append(name)
+        return nid
+
+    def record(self, name, t0, t1, frame=-1):
+        """Отрезок [t0, t1) в нс perf_counter_ns()"""
+        n = next(self._counter)
+        i = n % self.capacity
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        self._name_id[i] = self.name_id(name)
+        self._tid[i] = tid
+        self._ts[i] = t0
+        self._dur[i] = t1 - t0
+        self._frame[i] = frame
+        if n < self.capacity:
+            self._written = max(self._written, i + 1)
+
+    def span(self, name, frame=-1):
+        return _Span(self, name, frame)
+
+    # ------------------ Выгрузка ------------------
+    def snapshot(self):
+        """Записанные отрезки по времени начала: (имя, поток, начало нс, длительность нс, кадр)"""
+        n = self._written
+        order = np.argsort(self._ts[:n], kind="stable")
+        return (self._name_id[order], self._tid[order], self._ts[order],
+                self._dur[order], self._frame[order])
+
+    def events(self):
+        """Отрезки в формате Chrome trace_event (время в мкс)"""
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                  for tid, name in self._threads.items()]
+        for nid, tid, ts, dur, frame in zip(*(a.tolist() for a in self.snapshot())):
+            event = {"name": self.names[nid], "ph": "X", "pid": pid, "tid": tid,
+                     "ts": (ts - self._t0) / 1e3, "dur": dur / 1e3}
+            if frame >= 0:
+                event["args"] = {"frame": frame}
+            events.append(event)
+        return events
+
+    def summary(self):
+        """По каждому имени: число, среднее/p50/p99/max в мс и гистограмма в мкс"""
+        name_ids, _, _, dur, _ = self.snapshot()
+        out = {}
+        for nid, name in enumerate(self.names):
+            d = dur[name_ids == nid]
+            if not len(d):
+                continue
+            counts, _ = np.histogram(d / 1e3, bins=HIST_EDGES_US)
+            out[name] = {
+                "count": int(len(d)),
+                "mean_ms": round(float(d.mean()) / 1e6, 4),
+                "p50_ms": round(float(np.percentile(d, 50)) / 1e6, 4),
+                "p99_ms": round(float(np.percentile(d, 99)) / 1e6, 4),
+                "max_ms": round(float(d.max()) / 1e6, 4),
+                "hist_us": {"edges": [e for e in HIST_EDGES_US[:-1]], "counts": counts.tolist()},
+            }
+        return out
+
+    def dump(self, path):
+        """Chrome trace в path и сводку в <path без .json>.summary.json; вернуть сводку"""
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events(), "displayTimeUnit": "ms"}, f)
+        summary = self.summary()
+        base = path[:-5] if path.endswith(".json") else path
+        with open(base + ".summary.json", "w") as f:
+            json.dump(summary, f, indent=1, ensure_ascii=False)
+        return summary
+
+
+class Counters:
+    """Длительности по имени: сумма, число и максимум с прошлого take()"""
+
+    def __init__(self):
+        self._acc = {}
+
+    def record(self, name, t0, t1):
+        d = t1 - t0
+        acc = self._acc.get(name)
+        if acc is None:
+            acc = self._acc[name] = [0, 0, 0]
+        acc[0] += d
+        acc[1] += 1
+        if d > acc[2]:
+            acc[2] = d
+
+    def take(self):
+        """Снять накопленное и начать заново: имя -> {count, mean_ms, max_ms}"""
+        # подмена словаря атомарна под GIL; запись, попавшая в старый словарь, теряется
+        acc, self._acc = self._acc, {}
+        return {name: {"count": n, "mean_ms": round(total / n / 1e6, 4), "max_ms": round(top / 1e6, 4)}
+                for name, (total, n, top) in acc.items()}
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "frame", "t0")
+
+    def __init__(self, tracer, name, frame):
+        self.tracer, self.name, self.frame = tracer, name, frame
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.t0, time.perf_counter_ns(), self.frame)
+
+
+def span(name, frame=-1):
+    """with trace.span("capture"): ... — отрезок, если трасса включена, иначе пустой контекст"""
+    t = tracer
+    return _NULL if t is None else t.span(name, frame)
+
+
+def enable(capacity=1 << 16):
+    global tracer
+    tracer = Tracer(capacity)
+    return tracer
+
+
+def disable():
+    global tracer
+    tracer = None
+
+
+def enable_counters():
+    global counters
+    counters = Counters()
+    return counters
+
+
+def disable_counters():
+    global counters
+    counters = None
+
+
+def print_summary(summary):
+    print(f"{'отрезок':>28} {'n':>7} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, s in sorted(summary.items(), key=lambda kv: -kv[1]["mean_ms"] * kv[1]["count"]):
+        print(f"{name:>28} {s['count']:7d} {s['mean_ms']:9.3f} {s['p50_ms']:9.3f} "
+              f"{s['p99_ms']:9.3f} {s['max_ms']:9.3f}")
+
+
+def dump_on_signal(path, signum=signal.SIGUSR1):
+    """Снимать дамп в path по сигналу (по умолчанию SIGUSR1)"""
+    def handler(signo, frame):
+        if tracer is not None:
+            tracer.dump(path)
+            print(f"[BadCam] трасса записана: {path}")
+    signal.signal(signum, handler)
@@ -0,0 +1,84 @@
+"""Фоновая загрузка комет.
+
+Модуль кометы (comets/<id>/main.py) может тянуть тяжёлые библиотеки —
+BadCam при импорте грузит cv2 и numpy, это сотни миллисекунд. Чтобы GUI
+стартовал только с PyQt6, модули комет импортируются в фоновом потоке
+после показа окна, по одному; выбранная пользователем комета идёт
+вне очереди. Страницы (виджеты) всё равно создаются в потоке GUI — по
+сигналу loaded.
+
+Точку входа и тяжёлые зависимости комета объявляет в манифесте
+(comet.json, см. comet_registry): "requires": ["numpy", "cv2"]. Эти
+библиотеки грузим первыми — в сводке видно, сколько стоит каждая.
+"""
+
+import importlib
+import threading
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from modules.comet_registry import entry_point
+
+
+class CometLoader(QObject):
+    """Импорт модулей комет в фоновом потоке; loaded(id) — модуль готов (или не загрузился)"""
+
+    loaded = pyqtSignal(str)
+
+    def __init__(self, comets):
+        super().__init__()
+        self.comets = comets  # id -> манифест
+        self.queue = list(comets)
+        self.modules = {}   # id -> модуль или None (модуля нет)
+        self.errors = {}    # id -> исключение импорта
+        self.timings = {}   # id -> {зависимость или "main": с}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="comet-loader", daemon=True)
+        self._thread.start()
+
+    def request(self, comet_id):
+        """Загрузить комету вне очереди (пользователь её уже выбрал)"""
+        with self._lock:
+            if comet_id in self.queue:
+                self.queue.remove(comet_id)
+                self.queue.insert(0, comet_id)
+
+    def ready(self, comet_id):
+        return comet_id in self.modules or comet_id in self.errors
+
+    def _next(self):
+        with self._lock:
+            return self.queue.pop(0) if self.queue else None
+
+    def _run(self):
+        while True:
+            comet_id = self._next()
+            if comet_id is None:
+                return
+            timings = self.timings[comet_id] = {}
+            module_name, _ = entry_point(self.comets[comet_id])
+            try:
+                for name in self.comets[comet_id]["requires"]:
+                    t0 = time.perf_counter()
+                    importlib.import_module(name)
+                    timings[name] = time.perf_counter() - t0
+                t0 = time.perf_counter()
+                self.modules[comet_id] = importlib.import_module(module_name)
+                timings["main"] = time.perf_counter() - t0
+            except ModuleNotFoundError as e:
+                if e.name == module_name:
+                    self.modules[comet_id] = None
+                else:
+                    self.errors[comet_id] = e
+            except Exception as e:
+                self.errors[comet_id] = e
+            self.loaded.emit(comet_id)
+
+    def wait(self, timeout=None):
+        """Дождаться конца фоновой загрузки (для замеров)"""
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,170 @@
+"""Реестр комет из манифестов comets/<id>/comet.json.
+
+Манифест описывает комету без импорта её кода: имя, точка входа
+(модуль:функция страницы), конфиги, возможности, тяжёлые зависимости и
+подсказки по ресурсам. Все манифесты собираются в индекс, который
+кэшируется на диске (~/.cache/luminax/comets-index.json). При загрузке
+индекс сверяется по mtime каталога комет (комету добавили или удалили)
+и mtime каждого манифеста; каталоги при этом не обходятся. Если что-то
+поменялось, индекс пересобирается.
+
+Меню комет, выбор конфигов и консольные утилиты читают одну и ту же
+структуру, модуль не зависит от PyQt6:
+    python3 -m modules.comet_registry
+    python3 -m modules.comet_registry --rebuild
+"""
+
+import argparse
+import json
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMETS_DIR = os.path.join(ROOT_DIR, "comets")
+MANIFEST = "comet.json"
+INDEX_VERSION = 1
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "luminax")
+INDEX_PATH = os.path.join(CACHE_DIR, "comets-index.json")
+
+_registry = None
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+# ------------------ Манифесты ------------------
+def normalize(comet_id, manifest):
+    """Манифест с полями по умолчанию; конфиги — списком словарей"""
+    m = {
+        "id": comet_id,
+        "name": comet_id.replace("_", " ").title(),
+        "entry": f"comets.{comet_id}.main:create_page",
+        "description": "",
+        "requires": [],
+        "capabilities": [],
+        "resources": {},
+        **manifest,
+    }
+    configs = []
+    for cfg in m.get("configs", []):
+        if "id" not in cfg:
+            raise ValueError(f"{comet_id}: у конфига нет id")
+        configs.append({"title": cfg["id"], "module": f"comets.{comet_id}.configs.{cfg['id']}", **cfg})
+    m["configs"] = configs
+    return m
+
+
+def read_manifest(comets_dir, comet_id):
+    """Манифест кометы; у каталога без comet.json — поля по умолчанию"""
+    path = os.path.join(comets_dir, comet_id, MANIFEST)
+    if not os.path.exists(path):
+        return normalize(comet_id, {"manifest": False})
+    with open(path, encoding="utf-8") as f:
+        return normalize(comet_id, json.load(f))
+
+
+# ------------------ Индекс ------------------
+def build_index(comets_dir=COMETS_DIR):
+    """Обойти каталог комет и прочитать все манифесты"""
+    comets = {}
+    mtimes = {}
+    for comet_id in sorted(os.listdir(comets_dir)):
+        if comet_id.startswith(("_", ".")) or not os.path.isdir(os.path.join(comets_dir, comet_id)):
+            continue
+        try:
+            comets[comet_id] = read_manifest(comets_dir, comet_id)
+        except (OSError, ValueError) as e:
+            print(f"Манифест кометы {comet_id} не прочитан:", e)
+            continue
+        mtimes[comet_id] = _mtime(os.path.join(comets_dir, comet_id, MANIFEST))
+    return {
+        "version": INDEX_VERSION,
+        "comets_dir": os.path.abspath(comets_dir),
+        "dir_mtime": _mtime(comets_dir),
+        "mtimes": mtimes,
+        "comets": comets,
+    }
+
+
+def index_valid(index, comets_dir=COMETS_DIR):
+    """Индекс годен: тот же каталог, его mtime и mtime всех манифестов не менялись"""
+    if index.get("version") != INDEX_VERSION or index.get("comets_dir") != os.path.abspath(comets_dir):
+        return False
+    if index.get("dir_mtime") != _mtime(comets_dir):
+        return False
+    return all(_mtime(os.path.join(comets_dir, cid, MANIFEST)) == mt for cid, mt in index["mtimes"].items())
+
+
+def load_index(comets_dir=COMETS_DIR, cache=INDEX_PATH, rebuild=False):
+    """Индекс из кэша, если он годен, иначе собрать заново и сохранить"""
+    if not rebuild:
+        try:
+            with open(cache, encoding="utf-8") as f:
+                index = json.load(f)
+            if index_valid(index, comets_dir):
+                return index
+        except (OSError, ValueError):
+            pass
+    index = build_index(comets_dir)
+    try:
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        tmp = f"{cache}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp, cache)
+    except OSError as e:
+        print("Индекс комет не сохранён:", e)
+    return index
+
+
+# ------------------ Доступ ------------------
+def registry():
+    """Кометы {id: манифест} (индекс читается один раз на процесс)"""
+    global _registry
+    if _registry is None:
+        _registry = load_index()["comets"]
+    return _registry
+
+
+def comet(comet_id):
+    try:
+        return registry()[comet_id]
+    except KeyError:
+        raise KeyError(f"Неизвестная комета: {comet_id}") from None
+
+
+def config(comet_id, config_id):
+    for cfg in comet(comet_id)["configs"]:
+        if cfg["id"] == config_id:
+            return cfg
+    raise KeyError(f"У кометы {comet_id} нет конфига {config_id}")
+
+
+def entry_point(manifest):
+    """(модуль, функция страницы) из поля entry"""
+    module, _, func = manifest["entry"].partition(":")
+    return module, func or "create_page"
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Кометы LuminaX из манифестов")
+    p.add_argument("--rebuild", action="store_true", help="пересобрать индекс, не глядя на кэш")
+    p.add_argument("--json", action="store_true", help="вывести индекс целиком")
+    args = p.parse_args(argv)
+    index = load_index(rebuild=args.rebuild)
+    if args.json:
+        print(json.dumps(index, ensure_ascii=False, indent=1))
+        return
+    for cid, m in index["comets"].items():
+        caps = ", ".join(m["capabilities"]) or "—"
+        print(f"{m['name']} ({cid}): {m['description'] or 'без описания'}")
+        print(f"  вход {m['entry']}, возможности: {caps}, зависимости: {', '.join(m['requires']) or '—'}")
+        for cfg in m["configs"]:
+            print(f"  - {cfg['id']}: {cfg['title']}" + (f" — {cfg['description']}" if cfg.get("description") else ""))
+
+
+if __name__ == "__main__":
+    main()
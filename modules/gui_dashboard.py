@@ -0,0 +1,138 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QTimer
+import os
+import time
+
+from modules.stats_channel import StatsReader, channels
+
+REFRESH_MS = 1000   # раз в секунду: панель сама почти не тратит CPU
+STALE_AFTER = 3.0   # снимок старше — комета не отвечает
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def proc_usage(pid):
+    """(процессорное время в с, RSS в МБ) процесса из /proc или None"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    # utime и stime — 14-е и 15-е поля, после имени процесса это 12-е и 13-е
+    cpu = (int(fields[11]) + int(fields[12])) / CLK_TCK
+    return cpu, rss_pages * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+
+
+class PerformancePanel(QWidget):
+    """Живые метрики запущенных комет из каналов статистики.
+
+    Обновляется по таймеру только пока панель видна.
+    """
+
+    def __init__(self):
+        super().__init__()
+        layout = QVBoxLayout()
+        layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
+        title = QLabel("📈 Производительность комет")
+        title.setFont(QFont("Arial", 13))
+        title.setStyleSheet("color: #00fff7;")
+        layout.addWidget(title)
+
+        self.body = QLabel("Нет запущенных комет")
+        self.body.setFont(QFont("Monospace", 10))
+        self.body.setStyleSheet("color: #9d9dff;")
+        self.body.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(self.body)
+        self.setLayout(layout)
+
+        self.readers = {}
+        self._cpu = {}   # pid -> (время замера, процессорное время)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start(REFRESH_MS)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    # ------------------ Данные ------------------
+    def read_all(self):
+        """{комета: снимок} по всем живым каналам; каналы упавших комет удаляются"""
+        found = set(channels())
+        for comet in list(self.readers):
+            if comet not in found:
+                self.readers.pop(comet).close()
+        snapshots = {}
+        for comet in found:
+            reader = self.readers.get(comet)
+            if reader is None:
+                try:
+                    reader = self.readers[comet] = StatsReader(comet)
+                except (FileNotFoundError, ValueError):
+                    continue
+            data = reader.read()
+            if data is None:
+                continue
+            if not os.path.exists(f"/proc/{data['pid']}"):
+                reader.unlink()
+                self.readers.pop(comet).close()
+                continue
+            snapshots[comet] = data
+        return snapshots
+
+    def cpu_percent(self, pid):
+        usage = proc_usage(pid)
+        if usage is None:
+            return None, None
+        cpu, rss = usage
+        now = time.monotonic()
+        prev = self._cpu.get(pid)
+        self._cpu[pid] = (now, cpu)
+        if prev is None or now <= prev[0]:
+            return None, rss
+        return 100.0 * (cpu - prev[1]) / (now - prev[0]), rss
+
+    # ------------------ Отрисовка ------------------
+    def refresh(self):
+        snapshots = self.read_all()
+        if not snapshots:
+            self.body.setText("Нет запущенных комет")
+            return
+        blocks = [self.format(comet, data) for comet, data in sorted(snapshots.items())]
+        self.body.setText("\n\n".join(blocks))
+
+    def format(self, comet, data):
+        r = data.get("runner", {})
+        lines = [f"{comet}: пресет {data.get('preset')}  {data['size'][0]}x{data['size'][1]}"]
+        if time.time() - data.get("time", 0) > STALE_AFTER:
+            lines.append("  (нет свежих данных)")
+        fps = r.get("fps")
+        lines.append(f"  FPS {fps if fps is not None else '—'} / {data.get('target_fps')}"
+                     f"   джиттер {r.get('jitter_ms', '—')} мс   макс. пауза {r.get('max_gap_ms', '—')} мс")
+        lines.append(f"  выпало {r.get('withheld', 0)}   повторов {r.get('repeated', 0)}"
+                     f"   опозданий {r.get('late', 0)}")
+        if "in_depth" in r:
+            lines.append(f"  очереди: вход {r['in_depth']} (макс. {r['in_max']}, выкинуто {r['in_dropped']})"
+                         f"   выход {r['out_depth']} (макс. {r['out_max']}, выкинуто {r['out_dropped']})")
+        if "captured" in r:
+            lines.append(f"  кадров: захвачено {r['captured']}   записано {r['written']}")
+        if "age_ms" in r:
+            drained = f"   выброшено из очереди камеры {r['cap_drained']}" if "cap_drained" in r else ""
+            lines.append(f"  возраст кадра {r['age_ms']} мс (макс. {r['age_max_ms']}){drained}")
+        cpu, rss = self.cpu_percent(data["pid"])
+        cpu_text = f"{cpu:.0f}%" if cpu is not None else "—"
+        rss_text = f"{rss:.0f} МБ" if rss is not None else "—"
+        lines.append(f"  CPU {cpu_text}   RSS {rss_text}   pid {data['pid']}")
+        stages = data.get("stages")
+        if stages:
+            lines.append("  стадия                      среднее, мс  макс., мс")
+            for name, mean, top in sorted(stages, key=lambda s: -s[1]):
+                lines.append(f"  {name[:26]:<26} {mean:12.3f} {top:10.3f}")
+        return "\n".join(lines)
@@ -3,7 +3,7 @@ from PyQt6.QtWidgets import (
     QStackedLayout, QLabel
 )
 from PyQt6.QtGui import QPalette, QColor, QFont
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from modules.gui_settings import SettingsMenu
 from modules.gui_menu import CometMenu  # твой рабочий модуль с кометами
 
@@ -58,4 +58,6 @@ class LuminaXGUI:
 
     def run(self):
         self.window.show()
+        # кометы (с их cv2/numpy) грузятся в фоне, когда окно уже нарисовано
+        QTimer.singleShot(0, self.menu.start_loading)
         self.app.exec()
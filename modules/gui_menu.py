@@ -1,10 +1,9 @@
-from PyQt6.QtWidgets import QPushButton, QWidget, QListWidget, QVBoxLayout, QLabel, QFrame
+from PyQt6.QtWidgets import QPushButton, QWidget, QListWidget, QListWidgetItem, QVBoxLayout, QLabel, QFrame
 from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
-import os
-import importlib
 
-COMETS_DIR = "comets"
+from modules import comet_registry
+from modules.comet_loader import CometLoader
 
 class CometMenu:
     def __init__(self, parent_window, stacked_layout, empty_label, settings_menu):
@@ -47,7 +46,10 @@ class CometMenu:
         layout.addWidget(self.menu_list)
         self.menu_frame.setLayout(layout)
 
-        self.load_comets()
+        self.comets = self.load_comets()
+        # модули комет грузятся в фоне после показа окна (start_loading)
+        self.loader = CometLoader(self.comets)
+        self.loader.loaded.connect(self.on_comet_loaded)
 
     def toggle_menu(self):
         if self.menu_frame.isVisible():
@@ -60,13 +62,20 @@ class CometMenu:
             self.menu_frame.show()
 
     def load_comets(self):
+        """Пункты меню из реестра комет (манифесты, без импорта кода комет)"""
         self.menu_list.clear()
         self.menu_list.addItem("Главная")
-        if not os.path.exists(COMETS_DIR):
-            os.makedirs(COMETS_DIR)
-        for comet_name in sorted(os.listdir(COMETS_DIR)):
-            if os.path.isdir(os.path.join(COMETS_DIR, comet_name)):
-                self.menu_list.addItem(comet_name.replace("_", " ").title())
+        comets = comet_registry.registry()
+        for comet_id, manifest in comets.items():
+            item = QListWidgetItem(manifest["name"])
+            item.setData(Qt.ItemDataRole.UserRole, comet_id)
+            if manifest["description"]:
+                item.setToolTip(manifest["description"])
+            self.menu_list.addItem(item)
+        return comets
+
+    def start_loading(self):
+        self.loader.start()
 
     def on_comet_selected(self, current, previous):
         self.menu_frame.hide()
@@ -74,26 +83,51 @@ class CometMenu:
             return
 
         name = current.text()
-        if name == "Главная":
+        comet_id = current.data(Qt.ItemDataRole.UserRole)
+        if comet_id is None:
             self.stacked_layout.setCurrentWidget(self.empty_label)
             self.settings_menu.reset()
             return
 
-        comet_id = name.lower().replace(" ", "_")
         if comet_id not in self.pages:
-            page = self.create_comet_page(comet_id)
+            if self.loader.ready(comet_id):
+                page = self.create_comet_page(comet_id)
+            else:
+                # модуль ещё грузится: заглушка сейчас, настоящая страница — по сигналу loaded
+                self.loader.request(comet_id)
+                page = self.message_page(f"Загрузка кометы {name}...")
+                page.placeholder = True
             self.pages[comet_id] = page
             self.stacked_layout.addWidget(page)
         self.stacked_layout.setCurrentWidget(self.pages[comet_id])
         self.settings_menu.reset()
 
+    def on_comet_loaded(self, comet_id):
+        """Модуль кометы загружен в фоне: заменить заглушку, если её уже показали"""
+        placeholder = self.pages.get(comet_id)
+        if placeholder is None or not getattr(placeholder, "placeholder", False):
+            return
+        page = self.create_comet_page(comet_id)
+        self.pages[comet_id] = page
+        self.stacked_layout.addWidget(page)
+        if self.stacked_layout.currentWidget() is placeholder:
+            self.stacked_layout.setCurrentWidget(page)
+        self.stacked_layout.removeWidget(placeholder)
+        placeholder.deleteLater()
+
     def create_comet_page(self, comet_id):
-        module_path = f"comets.{comet_id}.main"
-        try:
-            comet_module = importlib.import_module(module_path)
-            return comet_module.create_page()
-        except ModuleNotFoundError:
-            lbl = QLabel(f"Комета {comet_id} пустая")
-            lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            lbl.setStyleSheet("color: #00fff7;")
-            return lbl
+        if comet_id in self.loader.errors:
+            print(f"Ошибка загрузки кометы {comet_id}:", self.loader.errors[comet_id])
+            return self.message_page(f"Комета {comet_id} не загрузилась")
+        comet_module = self.loader.modules.get(comet_id)
+        _, func = comet_registry.entry_point(self.comets[comet_id])
+        if comet_module is None or not hasattr(comet_module, func):
+            return self.message_page(f"Комета {comet_id} пустая")
+        return getattr(comet_module, func)()
+
+    @staticmethod
+    def message_page(text):
+        lbl = QLabel(text)
+        lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        lbl.setStyleSheet("color: #00fff7;")
+        return lbl
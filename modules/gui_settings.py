@@ -1,6 +1,7 @@
 from PyQt6.QtWidgets import QPushButton, QWidget, QListWidget, QVBoxLayout, QLabel
 from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
+from modules.gui_dashboard import PerformancePanel
 
 class SettingsMenu:
     @staticmethod
@@ -51,6 +52,8 @@ class SettingsMenu:
         page_label.setFont(QFont("Arial", 16))
         page_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         page_layout.addWidget(page_label)
+        self.performance = PerformancePanel()
+        page_layout.addWidget(self.performance)
         self.settings_page.setLayout(page_layout)
         self.stacked_layout.addWidget(self.settings_page)
 
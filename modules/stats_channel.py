@@ -0,0 +1,94 @@
+"""Канал статистики комет: небольшой блок общей памяти с последним снимком.
+
+Комета (процесс конфига) раз в полсекунды пишет словарь метрик в JSON в
+сегмент /dev/shm/luminax-stats-<имя>; панель в настройках LuminaX
+находит такие сегменты и читает последний снимок. Блокировок нет:
+счётчик seq нечётный, пока идёт запись, читатель повторяет чтение, если
+застал запись или seq поменялся за время копирования.
+
+Раскладка: seq (uint64), длина данных (uint32), данные JSON.
+"""
+
+import json
+import os
+import struct
+
+PREFIX = "luminax-stats-"
+SHM_DIR = "/dev/shm"
+_HEAD = struct.Struct("=QI")
+
+
+def channel_name(comet):
+    return PREFIX + comet
+
+
+def channels():
+    """Имена комет, у которых сейчас есть канал статистики"""
+    try:
+        names = os.listdir(SHM_DIR)
+    except OSError:
+        return []
+    return sorted(n[len(PREFIX):] for n in names if n.startswith(PREFIX))
+
+
+class StatsWriter:
+    def __init__(self, comet, size=1 << 16):
+        from multiprocessing import shared_memory  # тяжёлый импорт: GUI грузит модуль при старте
+        name = channel_name(comet)
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # сегмент остался от прошлого запуска
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.seq = 0
+        _HEAD.pack_into(self.shm.buf, 0, 0, 0)
+
+    def publish(self, data):
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+        if len(payload) > self.shm.size - _HEAD.size:
+            raise ValueError(f"Снимок статистики не влезает в канал: {len(payload)} байт")
+        buf = self.shm.buf
+        self.seq += 1
+        _HEAD.pack_into(buf, 0, self.seq, 0)             # нечётный — идёт запись
+        buf[_HEAD.size:_HEAD.size + len(payload)] = payload
+        self.seq += 1
+        _HEAD.pack_into(buf, 0, self.seq, len(payload))
+
+    def close(self):
+        self.shm.unlink()
+        self.shm.close()
+
+
+class StatsReader:
+    def __init__(self, comet):
+        from multiprocessing import resource_tracker, shared_memory  # только когда панель открыта
+        self.shm = shared_memory.SharedMemory(name=channel_name(comet))
+        # сегмент принадлежит комете: трекер читателя не должен удалять его при выходе
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.seq = None
+
+    def read(self, retries=3):
+        """Последний снимок или None, если его нет или запись не удалось застать целой"""
+        buf = self.shm.buf
+        for _ in range(retries):
+            seq, length = _HEAD.unpack_from(buf, 0)
+            if seq == 0 or seq % 2:
+                continue
+            payload = bytes(buf[_HEAD.size:_HEAD.size + length])
+            if _HEAD.unpack_from(buf, 0)[0] == seq:
+                self.seq = seq
+                return json.loads(payload)
+        return None
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        """Удалить сегмент упавшей кометы"""
+        try:
+            os.unlink(os.path.join(SHM_DIR, self.shm.name))
+        except FileNotFoundError:
+            pass